@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from datetime import datetime
 import random
 from typing import Literal
@@ -16,7 +17,8 @@ from dogscogs.converters.percent import Percent
 
 from .embed import BattlerRaceEmbed, BattlerStatusEmbed
 from .config import BattlerConfig, BattleUserConfig, KeyType, Race, Equipment
-from .classes import BattleUser, applyModifiers
+from .catalog import get_catalog, invalidate_guild, invalidate_member, track_equipment, track_race, untrack_member
+from .classes import BattleUser, get_battle_user
 from .views.races import AdminRacePaginatedEmbed, SelectRacePaginatedEmbed
 from .views.equipment import AdminEquipmentPaginatedEmbed, PurchaseEquipmentPaginatedEmbed
 
@@ -48,6 +50,9 @@ DEFAULT_MEMBER: BattleUserConfig = {
     "is_silent": False,
 }
 
+RECENT_SPEAKERS_LIMIT = 50
+COLLATERAL_HISTORY_LIMIT = 200
+
 class _BattleMessageParts(typing.TypedDict):
     verb: str
     color: discord.Color
@@ -198,16 +203,19 @@ class Battler(commands.Cog):
         self.config.register_guild(**DEFAULT_GUILD)
         self.config.register_member(**DEFAULT_MEMBER)
 
+        self.recent_speakers: typing.Dict[int, typing.OrderedDict[int, None]] = {}
+        self.seeded_channel_ids: typing.Set[int] = set()
+
     @staticmethod
     async def _get(member: discord.Member) -> BattleUser:
-        """Returns a read-only copy of the member's battler configuration."""
+        """Returns the member's cached battler loadout.  It is shared between callers and must not be mutated."""
         config = Config.get_conf(
             cog_instance=None,
             cog_name="Battler",
             identifier=COG_IDENTIFIER,
             force_registration=True,
         )
-        return await BattleUser(config=config, member=member).collect()
+        return await get_battle_user(config, member)
 
     @staticmethod
     async def _battle(
@@ -234,14 +242,13 @@ class Battler(commands.Cog):
         )
         guild : discord.Guild = attacker.guild
 
+        catalog = await get_catalog(config, guild)
+
         attacker_battle_user = await Battler._get(attacker)
         defender_battle_user = await Battler._get(defender)
 
-        attacker_roll = await config.guild(guild).attacker_roll()
-        defender_roll = await config.guild(guild).defender_roll()
-
-        attacker_roll = applyModifiers(attacker_roll, attacker_battle_user, battle_types, ['attack', 'both'])
-        defender_roll = applyModifiers(defender_roll, defender_battle_user, battle_types, ['defend', 'both'])
+        attacker_roll = attacker_battle_user.compile(catalog.attacker_roll, battle_types, ['attack', 'both'])
+        defender_roll = defender_battle_user.compile(catalog.defender_roll, battle_types, ['defend', 'both'])
 
         attacker_result = d20.roll(attacker_roll)
 
@@ -250,7 +257,7 @@ class Battler(commands.Cog):
         else:
             defender_result = d20.roll(defender_roll)
 
-        if await config.guild(guild).attacker_wins_ties():
+        if catalog.attacker_wins_ties:
             def predicate(x, y):
                 return x >= y
         else:
@@ -275,14 +282,32 @@ class Battler(commands.Cog):
         count: int = 1
     ):
         collateral_list: typing.List[discord.Member] = []
-        fetched: typing.List[discord.Message] = [
-            message async for message in ctx.channel.history(limit=200)
-        ]
-        
-        potentials: typing.List[discord.Member] = list(
-            set([msg.author for msg in fetched])  # type: ignore[misc]
-        )
-        
+
+        cog: typing.Optional[Battler] = ctx.bot.get_cog("Battler")  # type: ignore[assignment]
+
+        if cog is not None and ctx.channel.id in cog.seeded_channel_ids:
+            potentials: typing.List[discord.Member] = [
+                member
+                for member in [
+                    ctx.guild.get_member(member_id)
+                    for member_id in cog.recent_speakers.get(ctx.channel.id, {})
+                ]
+                if member is not None
+            ]
+        else:
+            fetched: typing.List[discord.Message] = [
+                message async for message in ctx.channel.history(limit=COLLATERAL_HISTORY_LIMIT)
+            ]
+
+            if cog is not None:
+                for message in reversed(fetched):
+                    cog._record_speaker(message)
+                cog.seeded_channel_ids.add(ctx.channel.id)
+
+            potentials = list(
+                set([msg.author for msg in fetched])  # type: ignore[misc]
+            )
+
         potentials = [
             t
             for t in potentials
@@ -294,7 +319,23 @@ class Battler(commands.Cog):
             pass
 
         return collateral_list
-    
+
+    def _record_speaker(self, message: discord.Message) -> None:
+        """Marks the author as the most recent speaker in the channel's window."""
+        if message.guild is None or message.author.bot:
+            return
+
+        speakers = self.recent_speakers.setdefault(message.channel.id, OrderedDict())
+        speakers[message.author.id] = None
+        speakers.move_to_end(message.author.id)
+
+        while len(speakers) > RECENT_SPEAKERS_LIMIT:
+            speakers.popitem(last=False)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message) -> None:
+        self._record_speaker(message)
+
     @staticmethod
     def _battle_message(
         *,
@@ -477,6 +518,7 @@ class Battler(commands.Cog):
     async def clear_all(self, ctx: commands.GuildContext) -> None:
         """Clear all battler data."""
         await self.config.guild(ctx.guild).clear()
+        invalidate_guild(ctx.guild.id)
         await ctx.reply("All battler data has been cleared for this server.")
         pass
 
@@ -505,6 +547,12 @@ class Battler(commands.Cog):
             raise commands.BadArgument(f"Key `{key}` not found.")
 
         await self.config.member(member).set_raw(key, value=parsed_value)
+        invalidate_member(ctx.guild.id, member.id)
+
+        if key == 'race_id':
+            track_race(ctx.guild.id, member.id, parsed_value)  # type: ignore[arg-type]
+        else:
+            track_equipment(ctx.guild.id, member.id, parsed_value)  # type: ignore[arg-type]
         await ctx.reply(f"Set `{key}` to `{value}` for {member.display_name}")
         pass
 
@@ -514,6 +562,8 @@ class Battler(commands.Cog):
     async def clear(self, ctx: commands.GuildContext, member: discord.Member) -> None:
         """Clear a member's battler data."""
         await self.config.member(member).clear()
+        invalidate_member(ctx.guild.id, member.id)
+        untrack_member(ctx.guild.id, member.id)
         await ctx.reply(f"Cleared battler data for {member.display_name}")
         pass
 
@@ -698,3 +748,4 @@ class Battler(commands.Cog):
                     guilds[id]['races'][i]['role_id'] = None
                     
             await self.config.guild_from_id(id).races.set(guilds[id]['races'])
+            invalidate_guild(id)
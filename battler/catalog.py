@@ -0,0 +1,126 @@
+import typing
+import discord
+from redbot.core.config import Config
+
+from .config import BattleUserConfig, Equipment, Race
+
+if typing.TYPE_CHECKING:
+    from .classes import BattleUser
+
+class GuildCatalog():
+    """An in-memory, ID-indexed copy of a guild's battler configuration."""
+    equipment: typing.Dict[int, Equipment]
+    races: typing.Dict[int, Race]
+    attacker_roll: str
+    defender_roll: str
+    attacker_wins_ties: bool
+
+    def __init__(
+            self,
+            *,
+            equipment: typing.List[Equipment],
+            races: typing.List[Race],
+            attacker_roll: str,
+            defender_roll: str,
+            attacker_wins_ties: bool,
+        ):
+        self.equipment = {e['id']: e for e in equipment}
+        self.races = {r['id']: r for r in races}
+        self.attacker_roll = attacker_roll
+        self.defender_roll = defender_roll
+        self.attacker_wins_ties = attacker_wins_ties
+
+_catalogs: typing.Dict[int, GuildCatalog] = {}
+_battle_users: typing.Dict[typing.Tuple[int, int], "BattleUser"] = {}
+
+async def get_catalog(config: Config, guild: discord.Guild) -> GuildCatalog:
+    """Returns the guild's compiled catalog, building it from Config on first use."""
+    if guild.id not in _catalogs:
+        guild_config = await config.guild(guild).all()
+        _catalogs[guild.id] = GuildCatalog(
+            equipment=guild_config['equipment'],
+            races=guild_config['races'],
+            attacker_roll=guild_config['attacker_roll'],
+            defender_roll=guild_config['defender_roll'],
+            attacker_wins_ties=guild_config['attacker_wins_ties'],
+        )
+
+    return _catalogs[guild.id]
+
+def invalidate_guild(guild_id: int) -> None:
+    """Drops the guild's catalog and every member loadout compiled against it.
+
+    Call after changing the guild's equipment, races or roll settings.
+    """
+    _catalogs.pop(guild_id, None)
+
+    for key in [key for key in _battle_users if key[0] == guild_id]:
+        del _battle_users[key]
+
+def invalidate_member(guild_id: int, member_id: int) -> None:
+    """Drops a member's compiled loadout.
+
+    Call after changing the member's equipment or race.
+    """
+    _battle_users.pop((guild_id, member_id), None)
+
+class GuildPopulation():
+    """Tracks which members belong to each race and own each piece of equipment."""
+    race_members: typing.Dict[int, typing.Set[int]]
+    equipment_owners: typing.Dict[int, typing.Set[int]]
+
+    def __init__(self, all_members: typing.Dict[int, BattleUserConfig]):
+        self.race_members = {}
+        self.equipment_owners = {}
+        self._member_race_ids: typing.Dict[int, typing.Optional[int]] = {}
+        self._member_equipment_ids: typing.Dict[int, typing.List[int]] = {}
+
+        for member_id, member_data in all_members.items():
+            self.set_race(member_id, member_data.get('race_id'))
+            self.set_equipment(member_id, member_data.get('equipment_ids', []))
+
+    def set_race(self, member_id: int, race_id: typing.Optional[int]) -> None:
+        previous_race_id = self._member_race_ids.pop(member_id, None)
+        if previous_race_id is not None:
+            self.race_members.get(previous_race_id, set()).discard(member_id)
+
+        if race_id is not None:
+            self._member_race_ids[member_id] = race_id
+            self.race_members.setdefault(race_id, set()).add(member_id)
+
+    def set_equipment(self, member_id: int, equipment_ids: typing.List[int]) -> None:
+        for equipment_id in self._member_equipment_ids.pop(member_id, []):
+            self.equipment_owners.get(equipment_id, set()).discard(member_id)
+
+        if len(equipment_ids) > 0:
+            self._member_equipment_ids[member_id] = list(equipment_ids)
+            for equipment_id in equipment_ids:
+                self.equipment_owners.setdefault(equipment_id, set()).add(member_id)
+
+    def remove(self, member_id: int) -> None:
+        self.set_race(member_id, None)
+        self.set_equipment(member_id, [])
+
+_populations: typing.Dict[int, GuildPopulation] = {}
+
+async def get_population(config: Config, guild: discord.Guild) -> GuildPopulation:
+    """Returns the guild's race and equipment population, scanning member data on first use."""
+    if guild.id not in _populations:
+        _populations[guild.id] = GuildPopulation(await config.all_members(guild))
+
+    return _populations[guild.id]
+
+def track_race(guild_id: int, member_id: int, race_id: typing.Optional[int]) -> None:
+    """Records a member's new race in the guild's population, if it has been built."""
+    if guild_id in _populations:
+        _populations[guild_id].set_race(member_id, race_id)
+
+def track_equipment(guild_id: int, member_id: int, equipment_ids: typing.List[int]) -> None:
+    """Records a member's new equipment in the guild's population, if it has been built."""
+    if guild_id in _populations:
+        _populations[guild_id].set_equipment(member_id, equipment_ids)
+
+def untrack_member(guild_id: int, member_id: int) -> None:
+    """Removes a cleared member from the guild's population, if it has been built."""
+    if guild_id in _populations:
+        _populations[guild_id].remove(member_id)
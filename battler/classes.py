@@ -1,10 +1,14 @@
 import typing
 import discord
+import d20  # type: ignore[import-untyped]
 from redbot.core.config import Config
 from redbot.core import commands
 
+from .catalog import _battle_users, get_catalog
 from .config import BonusType, Equipment, KeyType, Modifier, Race
 
+CompiledKey = typing.Tuple[str, typing.Optional[typing.Tuple[KeyType, ...]], typing.Optional[typing.Tuple[BonusType, ...]]]
+
 class BattleUser():
     equipment: typing.List[Equipment]
     race: typing.Union[Race, None] = None
@@ -16,21 +20,52 @@ class BattleUser():
             config: Config, 
             member: discord.Member
         ):
+        self.config = config
+        self.member = member
         self.guild_config = config.guild(member.guild)
         self.member_config = config.member(member)
+        self.compiled: typing.Dict[CompiledKey, typing.Any] = {}
 
     async def collect(self) -> 'BattleUser':
-        equipment_ids = await self.member_config.equipment_ids()
-        race_id = await self.member_config.race_id()
-
-        guild_equipment : typing.List[Equipment] = await self.guild_config.equipment()
-        guild_races : typing.List[Race] = await self.guild_config.races()
+        member_data = await self.member_config.all()
+        catalog = await get_catalog(self.config, self.member.guild)
 
-        self.equipment = [e for e in guild_equipment if e["id"] in equipment_ids]
-        self.race = next((r for r in guild_races if r['id'] == race_id), None)
+        self.equipment = [catalog.equipment[id] for id in member_data['equipment_ids'] if id in catalog.equipment]
+        self.race = catalog.races.get(member_data['race_id']) if member_data['race_id'] is not None else None
+        self.compiled = {}
 
         return self
 
+    def compile(
+            self,
+            roll: str,
+            curse_types: typing.Optional[typing.List[KeyType]],
+            attack_type: typing.Optional[typing.List[BonusType]],
+        ) -> typing.Any:
+        """Returns the parsed d20 expression for this roll with the member's modifiers applied.
+
+        Each (roll, curse_types, attack_type) combination is parsed once and reused.
+        """
+        key : CompiledKey = (
+            roll,
+            tuple(curse_types) if curse_types is not None else None,
+            tuple(attack_type) if attack_type is not None else None,
+        )
+
+        if key not in self.compiled:
+            self.compiled[key] = d20.parse(applyModifiers(roll, self, curse_types, attack_type))
+
+        return self.compiled[key]
+
+async def get_battle_user(config: Config, member: discord.Member) -> BattleUser:
+    """Returns the member's cached battle loadout, collecting it on first use."""
+    key = (member.guild.id, member.id)
+
+    if key not in _battle_users:
+        _battle_users[key] = await BattleUser(config=config, member=member).collect()
+
+    return _battle_users[key]
+
 
 def applyModifier(roll: str, modifier: Modifier):
     if modifier['operator'] == 'add':
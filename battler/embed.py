@@ -3,6 +3,7 @@ import discord
 from redbot.core.bot import Red
 from redbot.core.config import Config
 
+from .catalog import get_population
 from .config import BattleUserConfig, BonusType, Equipment, KeyType, Modifier, OperatorType, Race, SlotType, BattlerConfig
 
 TOKEN_BONUS_TYPE = "$BONUS$"
@@ -122,14 +123,8 @@ class BattlerRaceEmbed(discord.Embed):
 
             count = 0
 
-            all_members: typing.Dict[int, BattleUserConfig] = (
-                await self.config.all_members(self.guild)
-            )
-            filtered_members = [
-                id
-                for id, member_data in all_members.items()
-                if member_data["race_id"] == self.race_id
-            ]
+            population = await get_population(self.config, self.guild)
+            filtered_members = list(population.race_members.get(self.race_id, set()))
             count = len(filtered_members)
 
             stats_string += f"__Users:__ {count}"
@@ -195,14 +190,8 @@ class BattlerEquipmentEmbed(discord.Embed):
 
             count = 0
 
-            all_members: typing.Dict[int, BattleUserConfig] = (
-                await self.config.all_members(self.guild)
-            )
-            filtered_members = [
-                id
-                for id, member_data in all_members.items()
-                if any(id == self.equipment_id for id in member_data["equipment_ids"])
-            ]
+            population = await get_population(self.config, self.guild)
+            filtered_members = list(population.equipment_owners.get(self.equipment_id, set()))
             count = len(filtered_members)
 
             stats_string += f"__Users:__ {count}"
@@ -12,7 +12,8 @@ from coins import Coins
 
 from .utils import EditModifierView
 from ..embed import BattlerEquipmentEmbed, get_modifier_strings
-from ..config import BattleUserConfig, BonusType, Modifier, OperatorType, Equipment, KeyType, SlotType
+from ..config import BonusType, Modifier, OperatorType, Equipment, KeyType, SlotType
+from ..catalog import get_population, invalidate_guild, invalidate_member, track_equipment
 
 DEFAULT_NAME = "<NAME>"
 DEFAULT_DESCRIPTION = "<DESCRIPTION>"
@@ -76,6 +77,7 @@ class EditEquipmentDetailsModal(discord.ui.Modal):
             equipment.sort(key=lambda e: e['name'])
 
             await self.config.guild(self.guild).equipment.set(equipment)
+            invalidate_guild(self.guild.id)
 
     async def collect(self) -> "EditEquipmentDetailsModal":
         equipment : typing.List[Equipment] = await self.config.guild(self.guild).equipment()
@@ -350,6 +352,7 @@ class AdminEquipmentConfigure(discord.ui.View):
             equipment.sort(key=lambda e: e['name'])
 
             await self.config.guild(self.guild).equipment.set(equipment)
+            invalidate_guild(self.guild.id)
 
     async def collect(self) -> "AdminEquipmentConfigure":
         equipment = await self._get_config()
@@ -576,6 +579,7 @@ class AdminEquipmentPaginatedEmbed(_EquipmentPaginatedEmbed):
         equipment.append(new_equipment)
 
         await self.config.guild(self.guild).equipment.set(equipment)
+        invalidate_guild(self.guild.id)
 
         self.index = len(equipment) - 1
 
@@ -633,20 +637,18 @@ class AdminEquipmentPaginatedEmbed(_EquipmentPaginatedEmbed):
             await interaction.delete_original_response()
             return
         
-        member_data : typing.Dict[int, BattleUserConfig] = await self.config.all_members(self.guild)
-        filtered_member_ids = [
-            id
-            for id, data in member_data.items()
-            if any(id == equipment['id'] for id in data['equipment_ids'])
-        ]
+        population = await get_population(self.config, self.guild)
+        filtered_member_ids = list(population.equipment_owners.get(equipment['id'], set()))
 
         async with self.config.get_members_lock(self.guild):
             for id in filtered_member_ids:
                 member_equipment = await self.config.member_from_ids(self.guild.id, id).equipment_ids()
                 member_equipment = [id for id in member_equipment if id != equipment['id']]
                 await self.config.member_from_ids(self.guild.id, id).equipment_ids.set(member_equipment)
+                track_equipment(self.guild.id, id, member_equipment)
 
         await self.config.guild(self.guild).equipment.set(guild_equipment)
+        invalidate_guild(self.guild.id)
 
         await interaction.delete_original_response()
 
@@ -700,6 +702,8 @@ class PurchaseEquipmentPaginatedEmbed(_EquipmentPaginatedEmbed):
             await Coins._add_balance(i.user, member_piece_sell_value) # type: ignore[arg-type]
 
             await self.config.member(i.user).equipment_ids.set(revised_member_equipment)  # type: ignore[arg-type]
+            invalidate_member(self.guild.id, i.user.id)
+            track_equipment(self.guild.id, i.user.id, revised_member_equipment)
 
             return True
 
@@ -742,6 +746,8 @@ class PurchaseEquipmentPaginatedEmbed(_EquipmentPaginatedEmbed):
         member_equipment_ids.append(equipment['id'])
 
         await self.config.member(interaction.user).equipment_ids.set(member_equipment_ids) # type: ignore[arg-type]
+        invalidate_member(self.guild.id, interaction.user.id)
+        track_equipment(self.guild.id, interaction.user.id, member_equipment_ids)
 
         response_string = ""
 
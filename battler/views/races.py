@@ -10,7 +10,8 @@ from dogscogs.constants.discord.views import MAX_SELECT_OPTIONS as DISCORD_MAX_S
 
 from .utils import EditModifierView
 from ..embed import BattlerRaceEmbed, get_modifier_strings              
-from ..config import BattleUserConfig, BonusType, Modifier, OperatorType, Race, KeyType
+from ..config import BonusType, Modifier, OperatorType, Race, KeyType
+from ..catalog import get_population, invalidate_guild, invalidate_member, track_race
 
 DEFAULT_NAME = "<NAME>"
 DEFAULT_DESCRIPTION = "<DESCRIPTION>"
@@ -129,6 +130,7 @@ class EditRaceDetailsModal(discord.ui.Modal):
             races.sort(key=lambda r: r['name'])
             
             await self.config.guild(self.guild).races.set(races)
+            invalidate_guild(self.guild.id)
         pass
         
 
@@ -355,6 +357,7 @@ class AdminRaceConfigure(discord.ui.View):
             races.sort(key=lambda r: r['name'])
             
             await self.config.guild(self.guild).races.set(races)
+            invalidate_guild(self.guild.id)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.author_id:
@@ -510,6 +513,7 @@ class AdminRacePaginatedEmbed(_RacePaginatedEmbed):
         races.append(new_race)
 
         await self.config.guild(self.guild).races.set(races)
+        invalidate_guild(self.guild.id)
 
         self.index = len(races) - 1
 
@@ -576,18 +580,16 @@ class AdminRacePaginatedEmbed(_RacePaginatedEmbed):
             await interaction.delete_original_response()
             return
 
-        member_data : typing.Dict[int, BattleUserConfig] = await self.config.all_members(self.guild)
-        filtered_member_ids = [
-            id
-            for id, data in member_data.items()
-            if data['race_id'] == race['id']
-        ]
+        population = await get_population(self.config, self.guild)
+        filtered_member_ids = list(population.race_members.get(race['id'], set()))
 
         async with self.config.get_members_lock(self.guild):
             for id in filtered_member_ids:
                 await self.config.member_from_ids(self.guild.id, id).race_id.set(default_member['race_id'])
+                track_race(self.guild.id, id, default_member['race_id'])
 
         await self.config.guild(self.guild).races.set(races)
+        invalidate_guild(self.guild.id)
 
         await interaction.delete_original_response()
 
@@ -652,6 +654,8 @@ class SelectRacePaginatedEmbed(_RacePaginatedEmbed):
             return
         
         await self.config.member(interaction.user).race_id.set(chosen_config['id'])     # type: ignore[arg-type]
+        invalidate_member(self.guild.id, interaction.user.id)
+        track_race(self.guild.id, interaction.user.id, chosen_config['id'])
 
         await interaction.delete_original_response()
 
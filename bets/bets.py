@@ -15,7 +15,7 @@ DEFAULT_BET_DESCRIPTION = "This is a new bet."
 KEY_OPERATORs = ["=", ":"]
 
 from .config import BetGuildConfig, BetConfig, generate_bet_config
-from .views import BetAdministrationView, BetListPaginatedEmbed
+from .views import BetAdministrationView, BetListPaginatedEmbed, REFRESH_METRICS
 from .embed import BetEmbed
 
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
@@ -181,6 +181,25 @@ class Bets(commands.Cog):
         ).generate())
         pass
 
+    @bet.command(hidden=True)
+    @commands.is_owner()
+    async def refreshstats(self, ctx: commands.GuildContext):
+        """
+        Show how many bet clicks were coalesced into message refreshes.
+        """
+        clicks = sum(metrics["clicks"] for metrics in REFRESH_METRICS.values())
+        edits = sum(metrics["edits"] for metrics in REFRESH_METRICS.values())
+        coalesced = sum(metrics["coalesced_clicks"] for metrics in REFRESH_METRICS.values())
+        total_latency = sum(metrics["total_edit_latency"] for metrics in REFRESH_METRICS.values())
+
+        await ctx.send(
+            f"Tracked Bets: `{len(REFRESH_METRICS)}`\n"
+            f"Clicks: `{clicks}`\n"
+            f"Coalesced Clicks: `{coalesced}`\n"
+            f"Message Edits: `{edits}`\n"
+            f"Average Edit Latency: `{(total_latency / edits if edits > 0 else 0) * 1000:.1f}ms`"
+        )
+
     @bet.command()
     @commands.guild_only()
     @commands.permissions_check(permissions_check) # type: ignore[arg-type]
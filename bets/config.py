@@ -24,6 +24,9 @@ class BetConfig(typing.TypedDict):
     betters: typing.List[Better]
     base_value: int
     winning_option_id: typing.Union[int, None]
+    paid_out: bool
+    # Members already credited, so a retried payout skips them.
+    paid_member_ids: typing.List[int]
     created_at : float
     last_edited_at : typing.Union[float, None]
     closed_at : typing.Union[float, None]
@@ -43,6 +46,8 @@ def generate_bet_config(
     description: str,
     options: typing.List[BetOption] = [],
     winning_option_id: typing.Optional[int] = None,
+    paid_out: bool = False,
+    paid_member_ids: typing.List[int] = [],
     betters: typing.List[Better] = [],
     base_value: int = 0,
     created_at : datetime = datetime.now(),
@@ -58,6 +63,8 @@ def generate_bet_config(
         "description": description,
         "options": options,
         "winning_option_id": winning_option_id,
+        "paid_out": paid_out,
+        "paid_member_ids": list(paid_member_ids),
         "betters": betters,
         "base_value": base_value,
         "created_at": created_at.timestamp(),
@@ -4,6 +4,7 @@ from redbot.core import commands
 from redbot.core.config import Config
 
 from .config import BetConfig
+from .payouts import get_cached_bet_totals
 
 MAX_BAR_WIDTH = 25
 
@@ -40,22 +41,9 @@ class BetEmbed(discord.Embed):
         self.title = f"{title_prefix}{bet_config['title']}"
         self.description = bet_config['description']
 
-        class ValueEntry(typing.TypedDict):
-            total_value: int
-            who: typing.List[int]
-
-        values : typing.Dict[int, ValueEntry]= { 
-            option['id']: { 
-                'total_value': 0, 
-                'who': []
-            } 
-            for option in bet_config['options'] 
-        }
-        for better in bet_config['betters']:
-            values[better['bet_option_id']]['total_value'] += better['bet_amount']
-            values[better['bet_option_id']]['who'].append(better['member_id'])
-
-        bet_total = sum(values[option['id']]['total_value'] for option in bet_config['options'])
+        totals = get_cached_bet_totals(bet_config)
+
+        bet_total = sum(totals.amounts.values())
         pool_total = bet_total + bet_config['base_value']
 
         member = self.guild.get_member(bet_config['author_id']) or await self.ctx.bot.fetch_user(bet_config['author_id'])
@@ -80,16 +68,16 @@ class BetEmbed(discord.Embed):
                 options_field += f"🎉 __{option['option_name']}__ 🎉: "
             else:
                 options_field += f"__{option['option_name']}__: " 
-            options_field += f"{values[option['id']]['total_value']}"
+            options_field += f"{totals.amounts[option['id']]}"
             if bet_total > 0:
-                count = sum(1 for better in bet_config['betters'] if better['bet_option_id'] == option['id'])
+                count = totals.counts[option['id']]
                 if count > 0:
                     options_field += f" [{count} User{'s' if count > 1 else ''}]"
                 options_field += "\n"
 
-                scale_factor = max(1,(values[option['id']]['total_value'] / bet_total if bet_total > 0 else 0) * MAX_BAR_WIDTH)
+                scale_factor = max(1,(totals.amounts[option['id']] / bet_total if bet_total > 0 else 0) * MAX_BAR_WIDTH)
                 options_field += ''.join(['█' for _ in range(int(scale_factor))])
-                options_field += f" ({values[option['id']]['total_value']/bet_total:.2%})"
+                options_field += f" ({totals.amounts[option['id']]/bet_total:.2%})"
                 options_field += '\n'
 
             options_field += '\n'
@@ -0,0 +1,123 @@
+import typing
+
+from .config import BetConfig
+
+
+def get_bet_totals(bet_config: BetConfig) -> typing.Dict[int, int]:
+    """Sums the amount bet on each option.
+
+    Args:
+        bet_config (BetConfig): The bet to total.
+
+    Returns:
+        typing.Dict[int, int]: Option IDs mapped to the total amount bet on them.
+    """
+    bet_totals = {option["id"]: 0 for option in bet_config["options"]}
+    for better in bet_config["betters"]:
+        bet_totals[better["bet_option_id"]] += better["bet_amount"]
+    return bet_totals
+
+
+class BetTotals:
+    """The amount bet on each option of one bet and how many members bet on it."""
+
+    def __init__(self, bet_config: BetConfig) -> None:
+        self.amounts = {option["id"]: 0 for option in bet_config["options"]}
+        self.counts = {option["id"]: 0 for option in bet_config["options"]}
+        for better in bet_config["betters"]:
+            self.add(better["bet_option_id"], better["bet_amount"], is_new_better=True)
+
+    def add(self, option_id: int, amount: int, *, is_new_better: bool) -> None:
+        self.amounts[option_id] += amount
+        if is_new_better:
+            self.counts[option_id] += 1
+
+
+# Shared by every message showing the same bet, so a bet placed through one updates them all.
+BET_TOTALS: typing.Dict[int, BetTotals] = {}
+
+
+def get_cached_bet_totals(bet_config: BetConfig) -> BetTotals:
+    """Returns the bet's shared totals, building them from its betters on first use.  Settled
+    bets can't change, so their totals are built fresh and not kept."""
+    if bet_config["state"] in ("resolved", "cancelled"):
+        return BetTotals(bet_config)
+
+    totals = BET_TOTALS.get(bet_config["id"])
+    if totals is None or set(totals.amounts) != {option["id"] for option in bet_config["options"]}:
+        totals = BET_TOTALS[bet_config["id"]] = BetTotals(bet_config)
+    return totals
+
+
+def record_bet(bet_config_id: int, option_id: int, amount: int, *, is_new_better: bool) -> None:
+    """Adds a placed bet to the bet's shared totals, if they've been built.
+
+    Call while holding the `active_bets` lock the bet was written under, so the totals can't
+    drift from the stored betters.
+    """
+    totals = BET_TOTALS.get(bet_config_id)
+    if totals is not None and option_id in totals.amounts:
+        totals.add(option_id, amount, is_new_better=is_new_better)
+
+
+def forget_bet_totals(bet_config_id: int) -> None:
+    BET_TOTALS.pop(bet_config_id, None)
+
+
+def compute_payouts(bet_config: BetConfig) -> typing.Dict[int, int]:
+    """Splits the pool between the betters on the winning option.
+
+    Each winner gets the floor of their proportional share.  Coins left over from rounding
+    are handed out one at a time by largest fractional remainder (ties go to the larger bet,
+    then the lower member ID), so the payouts always sum to exactly the pool total and the
+    result is the same every time it is computed.
+
+    Args:
+        bet_config (BetConfig): The resolved bet.
+
+    Returns:
+        typing.Dict[int, int]: Member IDs mapped to their winnings.
+    """
+    winning_option_id = bet_config["winning_option_id"]
+    if winning_option_id is None:
+        return {}
+
+    bet_totals = get_bet_totals(bet_config)
+    winning_total = bet_totals.get(winning_option_id, 0)
+    if winning_total == 0:
+        return {}
+
+    pool_total = sum(bet_totals.values()) + bet_config["base_value"]
+
+    payouts: typing.Dict[int, int] = {}
+    remainders: typing.List[typing.Tuple[int, int, int]] = []
+
+    for better in bet_config["betters"]:
+        if better["bet_option_id"] != winning_option_id:
+            continue
+        share, remainder = divmod(pool_total * better["bet_amount"], winning_total)
+        payouts[better["member_id"]] = payouts.get(better["member_id"], 0) + share
+        remainders.append((remainder, better["bet_amount"], better["member_id"]))
+
+    leftover = pool_total - sum(payouts.values())
+    remainders.sort(key=lambda entry: (-entry[0], -entry[1], entry[2]))
+
+    for _, _, member_id in remainders[:leftover]:
+        payouts[member_id] += 1
+
+    return payouts
+
+
+def compute_refunds(bet_config: BetConfig) -> typing.Dict[int, int]:
+    """Returns every better's stake for a cancelled bet.
+
+    Args:
+        bet_config (BetConfig): The cancelled bet.
+
+    Returns:
+        typing.Dict[int, int]: Member IDs mapped to the amount to refund.
+    """
+    refunds: typing.Dict[int, int] = {}
+    for better in bet_config["betters"]:
+        refunds[better["member_id"]] = refunds.get(better["member_id"], 0) + better["bet_amount"]
+    return refunds
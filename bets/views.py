@@ -19,15 +19,47 @@ from dogscogs.constants.discord.views import (
 )
 
 from coins import Coins
+from coins.coins import BatchDeposit
 
 from .bets import DEFAULT_BET_DESCRIPTION, DEFAULT_BET_TITLE
 from .config import BetConfig, BetOption, BetState, Better
 from .embed import BetEmbed
+from .payouts import (
+    compute_payouts,
+    compute_refunds,
+    forget_bet_totals,
+    get_bet_totals,
+    get_cached_bet_totals,
+    record_bet,
+)
 
 REFRESH_INTERVAL = 10
 MAX_WINNERS_DISPLAY_LENGTH = 3
 
 
+class RefreshMetrics(typing.TypedDict):
+    clicks: int
+    edits: int
+    coalesced_clicks: int
+    last_edit_latency: float
+    total_edit_latency: float
+
+
+REFRESH_METRICS: typing.Dict[int, RefreshMetrics] = {}
+
+
+def get_refresh_metrics(bet_config_id: int) -> RefreshMetrics:
+    if bet_config_id not in REFRESH_METRICS:
+        REFRESH_METRICS[bet_config_id] = {
+            "clicks": 0,
+            "edits": 0,
+            "coalesced_clicks": 0,
+            "last_edit_latency": 0,
+            "total_edit_latency": 0,
+        }
+    return REFRESH_METRICS[bet_config_id]
+
+
 class BetListPaginatedEmbed(PaginatedEmbed):
     config: Config
     ctx: commands.GuildContext
@@ -327,7 +359,7 @@ class BetButton(discord.ui.Button):
         config: Config,
         bet_config_id: int,
         option_id: int,
-        callback: typing.Optional[typing.Callable[[], typing.Awaitable[None]]],
+        callback: typing.Optional[typing.Callable[[int, int], None]],
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
@@ -365,6 +397,7 @@ class BetButton(discord.ui.Button):
             config = active_bets[str(self.bet_config_id)]
 
             better: Better = self._get_better(config["betters"], member)
+            is_new_better = better is None
 
             if better is None:
                 better = {
@@ -382,6 +415,8 @@ class BetButton(discord.ui.Button):
             active_bets.update({str(self.bet_config_id): config})
 
             await self.config.guild(self.guild).active_bets.set(active_bets)
+            # Raises go to the option the member first bet on.
+            record_bet(self.bet_config_id, better["bet_option_id"], amount, is_new_better=is_new_better)
 
     async def callback(self, interaction: discord.Interaction) -> None:
         config = await self._get_config()
@@ -420,7 +455,7 @@ class BetButton(discord.ui.Button):
         await message.delete(delay=15)
 
         if self.parent_callback is not None:
-            await self.parent_callback()
+            self.parent_callback(self.option_id, amount)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         config = await self._get_config()
@@ -465,6 +500,9 @@ class BetAdministrationView(discord.ui.View):
     is_configed: bool = False
     last_update_timestamp: float = 0
 
+    _pending_clicks: int = 0
+    _refresh_task: typing.Optional[asyncio.Task] = None
+
     def __init__(
         self,
         *args,
@@ -490,6 +528,8 @@ class BetAdministrationView(discord.ui.View):
         self.check_bet.custom_id = f"check_bet:{self.bet_config_id}"
         self.list_winners.custom_id = f"list_winners:{self.bet_config_id}"
 
+        self.refresh_metrics = get_refresh_metrics(self.bet_config_id)
+
         pass
 
     async def _get_config(self) -> BetConfig:
@@ -521,6 +561,7 @@ class BetAdministrationView(discord.ui.View):
                 config["minimum_bet"] = minimum_bet
             if options is not None:
                 config["options"] = options
+                forget_bet_totals(self.bet_config_id)
             if state is not None:
                 config["state"] = state
 
@@ -631,29 +672,9 @@ class BetAdministrationView(discord.ui.View):
             self.add_item(self.cancel)
             self.add_item(self.add_pool)
 
-            bet_totals = {option["id"]: 0 for option in config["options"]}
-            for better in config["betters"]:
-                bet_totals[better["bet_option_id"]] += better["bet_amount"]
-
+            bet_totals = get_cached_bet_totals(config).amounts
             bet_total = sum(bet_totals.values())
 
-            async def throttled_regenerate():
-                current_time = datetime.now().timestamp()
-                time_since_last_run = current_time - self.last_update_timestamp
-
-                if time_since_last_run > REFRESH_INTERVAL:
-                    await self._regenerate_message()
-                    self.last_update_timestamp = current_time
-                else:
-                    await asyncio.sleep(REFRESH_INTERVAL)
-
-                    current_time = datetime.now().timestamp()
-                    time_since_last_run = current_time - self.last_update_timestamp
-
-                    if time_since_last_run > REFRESH_INTERVAL:
-                        await self._regenerate_message()
-                        self.last_update_timestamp = current_time
-
             buttons = [
                 BetButton(
                     guild=self.guild,
@@ -664,7 +685,7 @@ class BetAdministrationView(discord.ui.View):
                     label=f"{option['option_name']}",
                     emoji=discord.PartialEmoji(name="💸"),
                     row=1,
-                    callback=throttled_regenerate,
+                    callback=self._on_bet_placed,
                 )
                 for option in config["options"]
             ]
@@ -718,7 +739,47 @@ class BetAdministrationView(discord.ui.View):
             )
         ) or await self._author_check(interaction)
 
+    async def _settle_payout(self, deposit: typing.Optional[BatchDeposit]) -> None:
+        """Records who was credited, and clears the payout claim if anyone still needs crediting
+        so the payout can be retried."""
+        async with self.config.guild(self.guild).active_bets.get_lock():
+            active_bets: typing.Dict[str, BetConfig] = await self.config.guild(
+                self.guild
+            ).active_bets()
+            config = active_bets[str(self.bet_config_id)]
+
+            paid_member_ids = config.get("paid_member_ids", [])
+            if deposit is not None:
+                paid_member_ids.extend(deposit.balances.keys())
+            config["paid_member_ids"] = paid_member_ids
+
+            if deposit is None or len(deposit.errors) > 0:
+                config["paid_out"] = False
+
+            active_bets.update({str(self.bet_config_id): config})
+            await self.config.guild(self.guild).active_bets.set(active_bets)
+
+    async def _pay(self, amounts: typing.Dict[int, int]) -> BatchDeposit:
+        """Credits every member, then records the result on the bet.
+
+        Raises:
+            Exception: The first failed deposit, after the successful ones are recorded.
+        """
+        try:
+            deposit = await Coins._add_balances(self.guild, amounts)
+        except Exception:
+            await self._settle_payout(None)
+            raise
+
+        await self._settle_payout(deposit)
+
+        if len(deposit.errors) > 0:
+            raise next(iter(deposit.errors.values()))
+
+        return deposit
+
     async def _regenerate_message(self):
+        started = time.perf_counter()
         await self.generate()
         await self.original_message.edit(
             embed=await BetEmbed(
@@ -726,6 +787,39 @@ class BetAdministrationView(discord.ui.View):
             ).generate(),
             view=self,
         )
+        self.last_update_timestamp = time.monotonic()
+
+        latency = time.perf_counter() - started
+        self.refresh_metrics["edits"] += 1
+        self.refresh_metrics["last_edit_latency"] = latency
+        self.refresh_metrics["total_edit_latency"] += latency
+
+    def _on_bet_placed(self, option_id: int, amount: int) -> None:
+        """Queues a coalesced refresh of the message.  The shared totals were already updated when the bet was written."""
+        self.refresh_metrics["clicks"] += 1
+        self._pending_clicks += 1
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        """Edits the message at most once per `REFRESH_INTERVAL`, folding in every bet placed meanwhile."""
+        while self._pending_clicks > 0:
+            wait = REFRESH_INTERVAL - (time.monotonic() - self.last_update_timestamp)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            clicks = self._pending_clicks
+            self._pending_clicks = 0
+            self.refresh_metrics["coalesced_clicks"] += clicks - 1
+
+            try:
+                await self._regenerate_message()
+            except discord.HTTPException:
+                self._pending_clicks = 0
+                return
+            except Exception as e:
+                print(f"Bets: Failed to refresh bet `{self.bet_config_id}` in {self.guild.name}: {e}")
 
     @discord.ui.button(
         custom_id=f"edit_config:",
@@ -893,20 +987,27 @@ class BetAdministrationView(discord.ui.View):
 
         config["state"] = "resolved"
         await self._set_config(state=config["state"])
+        REFRESH_METRICS.pop(self.bet_config_id, None)
+        forget_bet_totals(self.bet_config_id)
 
         async with self.config.guild(self.guild).active_bets.get_lock():
             active_bets: typing.Dict[str, BetConfig] = await self.config.guild(
                 self.guild
             ).active_bets()
             config = active_bets[str(self.bet_config_id)]
+
+            if config.get("paid_out", False):
+                message = await interaction.followup.send(
+                    "❌ ERROR: This bet has already been paid out.", ephemeral=True, wait=True
+                )
+                await message.delete(delay=10)
+                return
+
             config["winning_option_id"] = action_bar.select_winner.bet_config[
                 "winning_option_id"
             ]
 
-            bet_totals = {option["id"]: 0 for option in config["options"]}
-            for better in config["betters"]:
-                bet_totals[better["bet_option_id"]] += better["bet_amount"]
-
+            bet_totals = get_bet_totals(config)
             bet_total = sum(bet_totals.values())
 
             if bet_total == 0:
@@ -931,35 +1032,41 @@ class BetAdministrationView(discord.ui.View):
                 raise ValueError(
                     f"Winning option `{config['winning_option_id']}` not found."
                 )
-            
-            winners : typing.List[discord.Member] = []
-
-            results_msg = ""
-
-            for better in config["betters"]:
-                member = self.guild.get_member(
-                    better["member_id"]
-                ) or await self.ctx.bot.fetch_user(better["member_id"])
-                if better["bet_option_id"] == winning_option["id"]:
-                    share = better["bet_amount"] / bet_totals[winning_option["id"]]
-                    total_winnings = int(pool_total * share)
-                    winners.append(member)
-                    new_balance = await Coins._add_balance(member, total_winnings)  # type: ignore[arg-type]
-                    # results_msg += f"💸 {member.mention} won `{total_winnings}` " + \
-                    #                   f"(+{total_winnings/better['bet_amount'] - 1:.2%}) " if total_winnings != better['bet_amount'] else '' + \
-                    #                   f"from the bet `{config['title']}`. New Balance: `{new_balance}`" # type: ignore[arg-type]
-                else:
-                    # await member.send(f"🧾 `{config['title']}` has resolved. ", silent=True)
-                    pass
 
-            message = await interaction.followup.send(
-                f"🎉 The winning option is `{winning_option['option_name']}`. Total pool: `{pool_total}`\nWinners: {', '.join([m.mention for m in winners])}",
-                wait=True,
-            )
+            paid_member_ids = config.get("paid_member_ids", [])
+            payouts = {
+                member_id: amount
+                for member_id, amount in compute_payouts(config).items()
+                if member_id not in paid_member_ids
+            }
 
+            # Claim the payout before releasing the lock so a retried or concurrent
+            # resolve can never credit the same winners twice.
+            config["paid_out"] = True
             active_bets.update({str(self.bet_config_id): config})
             await self.config.guild(self.guild).active_bets.set(active_bets)
 
+        deposit = await self._pay(payouts)
+
+        winners = [
+            member.mention if member else f"`{member_id}`"
+            for member_id, member in (
+                (member_id, self.guild.get_member(member_id)) for member_id in payouts
+            )
+        ]
+
+        message = await interaction.followup.send(
+            f"🎉 The winning option is `{winning_option['option_name']}`. Total pool: `{pool_total}`\nWinners: {', '.join(winners)}",
+            wait=True,
+        )
+
+        if len(deposit.missing) > 0:
+            await interaction.followup.send(
+                "⚠️ These winners have left the server and could not be paid: "
+                + ", ".join(f"`{member_id}` (`{payouts[member_id]}`)" for member_id in deposit.missing),
+                ephemeral=True,
+            )
+
         await self._regenerate_message()
         pass
 
@@ -974,6 +1081,8 @@ class BetAdministrationView(discord.ui.View):
         config = await self._get_config()
         config["state"] = "cancelled"
         await self._set_config(state=config["state"])
+        REFRESH_METRICS.pop(self.bet_config_id, None)
+        forget_bet_totals(self.bet_config_id)
 
         await self._regenerate_message()
 
@@ -987,12 +1096,28 @@ class BetAdministrationView(discord.ui.View):
             ).active_bets()
             config = active_bets[str(self.bet_config_id)]
 
-            for better in config["betters"]:
-                member = self.guild.get_member(
-                    better["member_id"]
-                ) or await self.ctx.bot.fetch_user(better["member_id"])
-                await Coins._add_balance(member, better["bet_amount"])  # type: ignore[arg-type]
-                # await member.send(f"💸 Your bet of `{better['bet_amount']}` has been refunded for the cancelled bet `{config['title']}`", silent=True) # type: ignore[arg-type]
+            if config.get("paid_out", False):
+                return
+
+            paid_member_ids = config.get("paid_member_ids", [])
+            refunds = {
+                member_id: amount
+                for member_id, amount in compute_refunds(config).items()
+                if member_id not in paid_member_ids
+            }
+
+            config["paid_out"] = True
+            active_bets.update({str(self.bet_config_id): config})
+            await self.config.guild(self.guild).active_bets.set(active_bets)
+
+        deposit = await self._pay(refunds)
+
+        if len(deposit.missing) > 0:
+            await interaction.followup.send(
+                "⚠️ These betters have left the server and could not be refunded: "
+                + ", ".join(f"`{member_id}` (`{refunds[member_id]}`)" for member_id in deposit.missing),
+                ephemeral=True,
+            )
         pass
 
     @discord.ui.button(label="Check Bet", style=discord.ButtonStyle.secondary, row=2)
@@ -1012,14 +1137,6 @@ class BetAdministrationView(discord.ui.View):
             None,
         )
 
-        bet_totals = {option["id"]: 0 for option in config["options"]}
-        for b in config["betters"]:
-            bet_totals[b["bet_option_id"]] += b["bet_amount"]
-
-        bet_total = sum(bet_totals.values())
-
-        pool_total = bet_total + config["base_value"]
-
         if better:
             bet_option = next(
                 (
@@ -1036,8 +1153,7 @@ class BetAdministrationView(discord.ui.View):
 
             if config["state"] == "resolved":
                 if better["bet_option_id"] == config["winning_option_id"]:
-                    share = better["bet_amount"] / bet_totals[config["winning_option_id"]]  # type: ignore[index]
-                    total_winnings = int(pool_total * share)
+                    total_winnings = compute_payouts(config).get(better["member_id"], 0)
 
                     balance = await Coins._get_balance(interaction.user)  # type: ignore[arg-type]
 
@@ -1085,11 +1201,8 @@ class BetAdministrationView(discord.ui.View):
             )
             return
 
-        bet_totals = {option["id"]: 0 for option in config["options"]}
-        for better in config["betters"]:
-            bet_totals[better["bet_option_id"]] += better["bet_amount"]
-
-        bet_total = sum(bet_totals.values())
+        bet_total = sum(get_bet_totals(config).values())
+        payouts = compute_payouts(config)
 
         pool_total = bet_total + config["base_value"]
         remainder = pool_total
@@ -1110,11 +1223,7 @@ class BetAdministrationView(discord.ui.View):
         results_msg += f"Total Payout: `{pool_total}`\n\n"
         for i, better in enumerate(betters_list):
             member = self.guild.get_member(better["member_id"])
-            if better["bet_option_id"] == config["winning_option_id"]:
-                share = better["bet_amount"] / bet_totals[config["winning_option_id"]]  # type: ignore[index]
-                total_winnings = int(pool_total * share)
-            else:
-                total_winnings = 0
+            total_winnings = payouts.get(better["member_id"], 0)
 
             if i < MAX_WINNERS_DISPLAY_LENGTH:
                 if better["bet_option_id"] == config["winning_option_id"]:
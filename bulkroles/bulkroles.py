@@ -0,0 +1,47 @@
+from typing import Literal
+
+import discord
+from redbot.core import commands
+from redbot.core.bot import Red
+
+from .executor import BulkRoleExecutor, get_executor
+
+RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
+
+
+class BulkRoles(commands.Cog):
+    """
+    Shared bulk role editing used by other cogs.
+    """
+
+    def __init__(self, bot: Red) -> None:
+        self.bot = bot
+        self.executor: BulkRoleExecutor = get_executor(bot)
+
+    async def cog_load(self) -> None:
+        await self.executor.resume()
+
+    @commands.group(invoke_without_command=True)
+    @commands.is_owner()
+    async def bulkroles(self, ctx: commands.Context):
+        """List bulk role edits in progress."""
+        runs = list(self.executor.runs.values())
+
+        if len(runs) == 0:
+            await ctx.send("No bulk role edits are running.")
+            return
+
+        await ctx.send(
+            "\n\n".join(f"`{run.run_id}`\n{run.progress()}" for run in runs),
+            allowed_mentions=discord.AllowedMentions.none(),
+        )
+
+    @bulkroles.command(name="cancel")
+    @commands.is_owner()
+    async def bulkroles_cancel(self, ctx: commands.Context, run_id: str):
+        """Stop a bulk role edit after the members already in progress."""
+        if not self.executor.cancel(run_id):
+            await ctx.send(f"No bulk role edit `{run_id}` is running.")
+            return
+
+        await ctx.send(f"Cancelling `{run_id}`.")
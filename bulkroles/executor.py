@@ -0,0 +1,392 @@
+import asyncio
+import time
+import typing
+
+import discord
+from redbot.core.bot import Red
+from redbot.core.config import Config
+
+from dogscogs.constants import COG_IDENTIFIER
+
+BOT_ATTRIBUTE = "dogscogs_bulk_roles"
+
+# Members edited at once.  The limit starts low and grows while requests come back quickly.
+INITIAL_CONCURRENCY = 2
+MAX_CONCURRENCY = 8
+
+# discord.py waits out rate limits inside the request, so a request taking this long (or far
+# longer than usual) is treated as having been held back by one.
+RATE_LIMITED_SECS = 1.0
+RATE_LIMITED_FACTOR = 3
+
+# Quick requests in a row before the limit is raised by one.
+GROWTH_STREAK = 10
+
+PROGRESS_INTERVAL_SECS = 5
+
+EditRecord = typing.List[typing.Any]  # [member_id, add_role_ids, remove_role_ids]
+# Called with each edited member and the data the run was started with.
+ChangedCallback = typing.Callable[[discord.Member, typing.Dict[str, typing.Any]], typing.Awaitable[None]]
+
+
+class BulkRoleRecord(typing.TypedDict):
+    namespace: str
+    guild_id: int
+    channel_id: typing.Optional[int]
+    message_id: typing.Optional[int]
+    description: str
+    reason: str
+    # Caller data journaled with the run and passed to its namespace's callback.
+    data: typing.Dict[str, typing.Any]
+    edits: typing.List[EditRecord]
+    # Every edit before the cursor is finished.
+    cursor: int
+    changed: int
+    unchanged: int
+    missing: int
+    failed: int
+
+
+class BulkRoleResult(typing.NamedTuple):
+    changed: int
+    unchanged: int
+    missing: int
+    failed: int
+
+
+DEFAULT_GLOBAL = {
+    "runs": {},
+}
+
+
+class AdaptiveLimiter:
+    """Caps concurrent requests, halving the cap when requests slow down and growing it by one
+    after a streak of quick ones."""
+
+    def __init__(self, initial: int = INITIAL_CONCURRENCY, maximum: int = MAX_CONCURRENCY) -> None:
+        self.limit = initial
+        self.maximum = maximum
+        self.active = 0
+        self.streak = 0
+        self.baseline: typing.Optional[float] = None
+        self.condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self, duration: typing.Optional[float]) -> None:
+        """Frees a slot.  Pass the request's duration, or None if no request was sent."""
+        async with self.condition:
+            self.active -= 1
+
+            if duration is None:
+                self.condition.notify_all()
+                return
+
+            is_throttled = duration >= RATE_LIMITED_SECS or (
+                self.baseline is not None and duration >= self.baseline * RATE_LIMITED_FACTOR
+            )
+
+            if is_throttled:
+                self.limit = max(1, self.limit // 2)
+                self.streak = 0
+            else:
+                self.baseline = duration if self.baseline is None else self.baseline * 0.9 + duration * 0.1
+                self.streak += 1
+                if self.streak >= GROWTH_STREAK and self.limit < self.maximum:
+                    self.limit += 1
+                    self.streak = 0
+
+            self.condition.notify_all()
+
+
+class BulkRoleRun:
+    """One bulk edit in progress."""
+
+    def __init__(self, run_id: str, record: BulkRoleRecord) -> None:
+        self.run_id = run_id
+        self.record = record
+        self.limiter = AdaptiveLimiter()
+        self.started_at = time.monotonic()
+        self.processed = 0
+        self.is_cancelled = False
+
+    @property
+    def total(self) -> int:
+        return len(self.record["edits"])
+
+    @property
+    def done(self) -> int:
+        return self.record["cursor"]
+
+    def eta_secs(self) -> typing.Optional[float]:
+        elapsed = time.monotonic() - self.started_at
+        if self.processed == 0 or elapsed <= 0:
+            return None
+        return (self.total - self.done) / (self.processed / elapsed)
+
+    def progress(self) -> str:
+        percent = self.done / self.total * 100 if self.total > 0 else 100
+        text = f"{self.record['description']}\n`{self.done} / {self.total}` members ({percent:.0f}%)"
+
+        eta = self.eta_secs()
+        if eta is not None and self.done < self.total:
+            text += f", about {int(eta // 60)}m {int(eta % 60)}s left"
+
+        return text + f" (`{self.limiter.limit}` at a time)."
+
+    def summary(self) -> str:
+        record = self.record
+        text = (
+            f"{record['description']}\n"
+            f"Finished: `{record['changed']}` updated, `{record['unchanged']}` already set"
+        )
+        if record["missing"] > 0:
+            text += f", `{record['missing']}` no longer in the server"
+        if record["failed"] > 0:
+            text += f", `{record['failed']}` failed"
+        if self.is_cancelled:
+            text += " (cancelled)"
+        return text + "."
+
+    def result(self) -> BulkRoleResult:
+        return BulkRoleResult(
+            changed=self.record["changed"],
+            unchanged=self.record["unchanged"],
+            missing=self.record["missing"],
+            failed=self.record["failed"],
+        )
+
+
+class BulkRoleExecutor:
+    """Applies role changes to many members of a guild, shared between cogs.
+
+    Each member's additions and removals are merged into a single `member.edit(roles=...)`.
+    Members are edited concurrently under an adaptive limit.  Runs are journaled in Config and
+    resumed from their last checkpoint by `resume` after a restart.  Cogs that need to act on each
+    edited member register a callback for their namespace, so resumed runs still call it.
+    """
+
+    def __init__(self, bot: Red) -> None:
+        self.bot = bot
+        self.config = Config.get_conf(
+            None,
+            identifier=COG_IDENTIFIER,
+            cog_name="BulkRoles",
+            force_registration=True,
+        )
+        self.config.register_global(**DEFAULT_GLOBAL)
+
+        self.runs: typing.Dict[str, BulkRoleRun] = {}
+        self.callbacks: typing.Dict[str, ChangedCallback] = {}
+
+    def register_callback(self, namespace: str, on_changed: ChangedCallback) -> None:
+        """Calls `on_changed` after each member is edited by the namespace's runs, including runs resumed after a restart."""
+        self.callbacks[namespace] = on_changed
+
+    def unregister_callback(self, namespace: str) -> None:
+        self.callbacks.pop(namespace, None)
+
+    async def run(
+        self,
+        namespace: str,
+        guild: discord.Guild,
+        edits: typing.Iterable[typing.Tuple[int, typing.Iterable[int], typing.Iterable[int]]],
+        *,
+        description: str,
+        reason: str,
+        message: typing.Optional[discord.Message] = None,
+        data: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ) -> BulkRoleResult:
+        """Adds and removes roles for many members, then waits for it to finish.
+
+        Args:
+            namespace (str): The calling cog.
+            guild (discord.Guild): The guild the members belong to.
+            edits (typing.Iterable[typing.Tuple[int, typing.Iterable[int], typing.Iterable[int]]]): Member IDs with the role IDs to add and to remove.
+            description (str): Shown above the progress and summary.
+            reason (str): The audit log reason.
+            message (typing.Optional[discord.Message], optional): Edited with progress, then a summary.
+            data (typing.Optional[typing.Dict[str, typing.Any]], optional): Journaled with the run and passed to the namespace's callback.  Must be JSON serializable.
+        """
+        record: BulkRoleRecord = {
+            "namespace": namespace,
+            "guild_id": guild.id,
+            "channel_id": message.channel.id if message is not None else None,
+            "message_id": message.id if message is not None else None,
+            "description": description,
+            "reason": reason,
+            "data": data if data is not None else {},
+            "edits": [
+                [member_id, sorted(set(add_ids)), sorted(set(remove_ids))]
+                for member_id, add_ids, remove_ids in edits
+            ],
+            "cursor": 0,
+            "changed": 0,
+            "unchanged": 0,
+            "missing": 0,
+            "failed": 0,
+        }
+
+        run_id = f"{namespace}:{guild.id}:{message.id if message is not None else int(time.time())}"
+        await self.config.runs.set_raw(run_id, value=record)
+
+        return await self._execute(BulkRoleRun(run_id, record))
+
+    async def resume(self) -> int:
+        """Restarts every journaled run in the background.
+
+        Returns:
+            int: The number of runs resumed.
+        """
+        records: typing.Dict[str, BulkRoleRecord] = await self.config.runs()
+
+        for run_id, record in records.items():
+            if run_id not in self.runs:
+                asyncio.create_task(self._execute(BulkRoleRun(run_id, record)))
+
+        return len(records)
+
+    def cancel(self, run_id: str) -> bool:
+        run = self.runs.get(run_id)
+        if run is None:
+            return False
+        run.is_cancelled = True
+        return True
+
+    def _get_message(self, record: BulkRoleRecord) -> typing.Optional[discord.PartialMessage]:
+        if record["channel_id"] is None or record["message_id"] is None:
+            return None
+
+        channel = self.bot.get_channel(record["channel_id"])
+        if channel is None or not hasattr(channel, "get_partial_message"):
+            return None
+
+        return channel.get_partial_message(record["message_id"])  # type: ignore[union-attr]
+
+    async def _report(self, run: BulkRoleRun, content: str) -> None:
+        message = self._get_message(run.record)
+        if message is None:
+            return
+
+        try:
+            await message.edit(content=content, view=None)
+        except discord.HTTPException:
+            pass
+
+    async def _checkpoint(self, run: BulkRoleRun) -> None:
+        for key in ("cursor", "changed", "unchanged", "missing", "failed"):
+            await self.config.runs.set_raw(run.run_id, key, value=run.record[key])
+
+    async def _edit(self, run: BulkRoleRun, guild: discord.Guild, edit: EditRecord) -> None:
+        member_id, add_ids, remove_ids = edit
+        record = run.record
+
+        await run.limiter.acquire()
+        duration: typing.Optional[float] = None
+        try:
+            # `roles=` replaces every role, so the list is built from the cache only once a slot
+            # is free.  Roles changed while waiting are kept.
+            member = guild.get_member(member_id)
+            if member is None:
+                record["missing"] += 1
+                return
+
+            roles_to_add = [
+                role for role in [guild.get_role(role_id) for role_id in add_ids]
+                if role is not None and member.get_role(role.id) is None and role.id not in remove_ids
+            ]
+            is_removing = any(member.get_role(role_id) is not None for role_id in remove_ids)
+
+            if len(roles_to_add) == 0 and not is_removing:
+                record["unchanged"] += 1
+                return
+
+            roles = [role for role in member.roles if not role.is_default() and role.id not in remove_ids]
+            roles.extend(roles_to_add)
+
+            start = time.monotonic()
+            try:
+                await member.edit(roles=roles, reason=record["reason"])
+            finally:
+                duration = time.monotonic() - start
+            record["changed"] += 1
+        except discord.NotFound:
+            record["missing"] += 1
+            return
+        except discord.HTTPException as e:
+            print(f"BulkRoles: Failed to edit roles for {member} ({member.id}) in {guild.name}: {e}")
+            record["failed"] += 1
+            return
+        finally:
+            await run.limiter.release(duration)
+
+        on_changed = self.callbacks.get(record["namespace"])
+        if on_changed is not None:
+            try:
+                # Runs journaled before `data` existed have none.
+                await on_changed(member, record.get("data", {}))
+            except Exception as e:
+                print(f"BulkRoles: Callback for {member.id} in `{run.run_id}` failed: {e}")
+
+    async def _execute(self, run: BulkRoleRun) -> BulkRoleResult:
+        self.runs[run.run_id] = run
+        record = run.record
+
+        try:
+            await self.bot.wait_until_red_ready()
+
+            guild = self.bot.get_guild(record["guild_id"])
+            if guild is None:
+                # Left the guild; nothing more can be done.
+                await self.config.runs.clear_raw(run.run_id)
+                return run.result()
+
+            finished: typing.Set[int] = set()
+            pending: typing.Set[asyncio.Task] = set()
+            last_report = time.monotonic()
+
+            async def edit(index: int) -> None:
+                try:
+                    await self._edit(run, guild, record["edits"][index])
+                finally:
+                    run.processed += 1
+                    finished.add(index)
+                    while record["cursor"] in finished:
+                        finished.discard(record["cursor"])
+                        record["cursor"] += 1
+
+            for index in range(record["cursor"], len(record["edits"])):
+                if run.is_cancelled:
+                    break
+
+                # Wait for a free slot here so only a handful of tasks exist at once.
+                while len(pending) >= run.limiter.limit:
+                    _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                pending.add(asyncio.create_task(edit(index)))
+
+                if time.monotonic() - last_report >= PROGRESS_INTERVAL_SECS:
+                    last_report = time.monotonic()
+                    await self._checkpoint(run)
+                    await self._report(run, run.progress())
+
+            if len(pending) > 0:
+                await asyncio.wait(pending)
+
+            await self.config.runs.clear_raw(run.run_id)
+            await self._report(run, run.summary())
+
+            return run.result()
+        finally:
+            self.runs.pop(run.run_id, None)
+
+
+def get_executor(bot: Red) -> BulkRoleExecutor:
+    """Returns the bot-wide bulk role executor, creating it on first use."""
+    if not hasattr(bot, BOT_ATTRIBUTE):
+        setattr(bot, BOT_ATTRIBUTE, BulkRoleExecutor(bot))
+
+    return getattr(bot, BOT_ATTRIBUTE)
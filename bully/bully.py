@@ -47,6 +47,29 @@ DEFAULT_GUILD = {
 }
 
 
+def normalize(text: str) -> str:
+    return re.sub("[^a-z0-9]", "", text.lower())
+
+
+class BullyMatcher():
+    """A guild's bully triggers compiled into one pattern, along with its cooldown."""
+    enabled: bool
+    pattern: typing.Optional[re.Pattern]
+    cooldown_timestamp: float
+
+    def __init__(self, guild_config: dict):
+        self.enabled = guild_config["enabled"]
+        self.cooldown_timestamp = guild_config["cooldown_timestamp"]
+
+        triggers = sorted({normalize(t) for t in guild_config["triggers"]}, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(t) for t in triggers)) if len(triggers) > 0 else None
+
+    def matches(self, content: str) -> bool:
+        if not self.enabled or self.pattern is None:
+            return False
+        return self.pattern.search(normalize(content)) is not None
+
+
 class Bully(commands.Cog):
     """
     Bully users who upset the bot.
@@ -62,8 +85,15 @@ class Bully(commands.Cog):
 
         self.config.register_guild(**DEFAULT_GUILD)
 
+        self.matchers : typing.Dict[int, BullyMatcher] = {}
         pass
 
+    async def get_matcher(self, guild: discord.Guild) -> BullyMatcher:
+        """Returns the guild's compiled triggers, reading Config only on first use."""
+        if guild.id not in self.matchers:
+            self.matchers[guild.id] = BullyMatcher(await self.config.guild(guild).all())
+        return self.matchers[guild.id]
+
     @commands.group()
     @commands.has_guild_permissions(manage_roles=True)
     async def bully(self, ctx: commands.GuildContext):
@@ -94,6 +124,7 @@ class Bully(commands.Cog):
         await ctx.send(f"Bullying is currently {status_msg}.")
 
         await self.config.guild(ctx.guild).enabled.set(bool)
+        self.matchers.pop(ctx.guild.id, None)
         pass
 
     @bully.command()
@@ -141,6 +172,7 @@ class Bully(commands.Cog):
 
             await self.config.guild(ctx.guild).cooldown_timestamp.set(current_cooldown)
             await self.config.guild(ctx.guild).cooldown_minutes.set(minutes)
+            self.matchers.pop(ctx.guild.id, None)
 
             await ctx.send(f"Set the cooldown to greet users to {minutes} minutes.")
         else:
@@ -285,6 +317,7 @@ class Bully(commands.Cog):
         triggers.append(phrase)
 
         await self.config.guild(ctx.guild).triggers.set(triggers)
+        self.matchers.pop(ctx.guild.id, None)
 
         await ctx.send(f"Added ``{phrase}`` to the list of bully triggers.")
         pass
@@ -319,6 +352,7 @@ class Bully(commands.Cog):
             removed_phrase = phrase 
         
         await self.config.guild(ctx.guild).triggers.set(triggers)
+        self.matchers.pop(ctx.guild.id, None)
         await ctx.send(f"Removed ``{removed_phrase}`` to the list of triggers for bully responses.")
         pass
 
@@ -419,6 +453,14 @@ class Bully(commands.Cog):
         if message.author.id == 386960058636042245:
             return
 
+        if message.guild is None:
+            return
+
+        matcher = await self.get_matcher(message.guild)
+
+        if not matcher.matches(message.content):
+            return
+
         prefix = await self.bot.get_prefix(message)
 
         if isinstance(prefix, str):
@@ -427,51 +469,40 @@ class Bully(commands.Cog):
         else:
             if any(message.content.startswith(p) for p in prefix):
                 return
-            
-        if message.guild is None:
-            return
 
         config = self.config.guild(message.guild)
 
-        if await config.enabled():
-            content = message.content.lower()
-            content = re.sub("[^a-z0-9]", "", message.content.lower())
-            triggers = await config.triggers()
-            triggers = [re.sub("[^a-z0-9]", "", t) for t in triggers]
-            if any([
-                t in content and
-                content.index(t) > -1
-                for t in triggers
-            ]):
-                always_list = await config.always_list()
-                cooldown_timestamp = await config.cooldown_timestamp()
-                is_firing = False
-                if datetime.datetime.now().timestamp() > cooldown_timestamp:
-                    if message.author.id in always_list:
-                        is_firing = True
-                    else:
-                        chance = await config.chance()
-                        is_firing = random.random() < chance
-
-                if is_firing:
-                    # Kick User
-                    responses = await config.responses()
-                    response = replace_tokens(random.choice(
-                        responses), member=message.author, use_mentions=True) # type: ignore[arg-type]
-
-                    timeout = await config.timeout_mins()
-
-                    try:
-                        await message.reply(response)
-                        if timeout > 0:
-                            await message.author.timeout(datetime.timedelta(minutes=timeout), reason=response) # type: ignore[union-attr]
-                        else:
-                            await message.author.kick(reason=response) # type: ignore[union-attr]
-                    except Exception as e:
-                        # Couldn't timeout or kick the user, which is fine.
-                        pass
-                    pass
-
-                    cooldown_minutes = await config.cooldown_minutes()
-
-                    await config.cooldown_timestamp.set((datetime.datetime.now() + datetime.timedelta(minutes=d20.roll(cooldown_minutes).total)).timestamp())
+        always_list = await config.always_list()
+        chance = await config.chance()
+        cooldown_minutes = await config.cooldown_minutes()
+
+        # Checked and claimed with no await in between, so messages handled concurrently can't
+        # all slip in under the old cooldown.
+        is_firing = False
+        if datetime.datetime.now().timestamp() > matcher.cooldown_timestamp:
+            if message.author.id in always_list:
+                is_firing = True
+            else:
+                is_firing = random.random() < chance
+
+        if is_firing:
+            matcher.cooldown_timestamp = (datetime.datetime.now() + datetime.timedelta(minutes=d20.roll(cooldown_minutes).total)).timestamp()
+            await config.cooldown_timestamp.set(matcher.cooldown_timestamp)
+
+            # Kick User
+            responses = await config.responses()
+            response = replace_tokens(random.choice(
+                responses), member=message.author, use_mentions=True) # type: ignore[arg-type]
+
+            timeout = await config.timeout_mins()
+
+            try:
+                await message.reply(response)
+                if timeout > 0:
+                    await message.author.timeout(datetime.timedelta(minutes=timeout), reason=response) # type: ignore[union-attr]
+                else:
+                    await message.author.kick(reason=response) # type: ignore[union-attr]
+            except Exception as e:
+                # Couldn't timeout or kick the user, which is fine.
+                pass
+            pass
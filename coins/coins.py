@@ -1,3 +1,4 @@
+import asyncio
 import random
 from typing import Literal
 import typing
@@ -280,6 +281,12 @@ class BalanceAdjustmentButtons(discord.ui.View):
         await modal.wait()
         await self.embed_message.edit(view=self, embed=await BalanceEmbed(self.config, self.target).collect())
 
+class BatchDeposit(typing.NamedTuple):
+    balances: typing.Dict[int, int]  # Credited member IDs -> new balance
+    missing: typing.List[int]  # Members no longer in the guild, who weren't credited
+    errors: typing.Dict[int, BaseException]  # Members whose deposit failed -> the error
+
+
 class Coins(commands.Cog):
     """
     Manages local guild coins.
@@ -318,6 +325,59 @@ class Coins(commands.Cog):
             amount = max_balance - current_balance + offset
         return await bank.deposit_credits(user, amount) + offset  # type: ignore[arg-type]
 
+    @staticmethod
+    async def _add_balances(
+        guild: discord.Guild, amounts: typing.Dict[int, int]
+    ) -> BatchDeposit:
+        """Add balance to many members' accounts at once.
+
+        Guild settings are read a single time and every deposit is issued concurrently.  A failed
+        deposit doesn't stop the others, so check `errors` to see who still needs crediting.
+
+        Args:
+            guild (discord.Guild): The guild the members belong to.
+            amounts (typing.Dict[int, int]): Member IDs mapped to the amount to deposit.
+        """
+        config = Config.get_conf(
+            cog_instance=None,
+            cog_name="Coins",
+            identifier=COG_IDENTIFIER,
+            force_registration=True,
+        )
+        offset = await config.guild(guild).offset()
+        max_balance = await bank.get_max_balance(guild)  # type: ignore[arg-type]
+
+        async def deposit(member: discord.Member, amount: int) -> int:
+            current_balance = await bank.get_balance(member)
+            new_balance = min(current_balance + amount, max_balance)
+            return await bank.set_balance(member, new_balance) + offset
+
+        members: typing.List[discord.Member] = []
+        missing: typing.List[int] = []
+        for member_id, amount in amounts.items():
+            if amount == 0:
+                continue
+            member = guild.get_member(member_id)
+            if member is None:
+                missing.append(member_id)
+                continue
+            members.append(member)
+
+        results = await asyncio.gather(
+            *[deposit(member, amounts[member.id]) for member in members],
+            return_exceptions=True,
+        )
+
+        balances: typing.Dict[int, int] = {}
+        errors: typing.Dict[int, BaseException] = {}
+        for member, result in zip(members, results):
+            if isinstance(result, BaseException):
+                errors[member.id] = result
+            else:
+                balances[member.id] = result
+
+        return BatchDeposit(balances=balances, missing=missing, errors=errors)
+
     @staticmethod
     async def _remove_balance(user: discord.Member, amount: int) -> int:
         """Remove balance from a user's account.
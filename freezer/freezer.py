@@ -1,4 +1,3 @@
-from asyncio import sleep
 import asyncio
 from typing import Literal
 import typing
@@ -10,6 +9,8 @@ from redbot.core.config import Config
 
 from dogscogs.constants import INDENT_SIZE, COG_IDENTIFIER
 
+from .reorder import plan_reorder
+
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
 
 FreezerEntryType = discord.CategoryChannel | discord.VoiceChannel | discord.TextChannel
@@ -48,6 +49,28 @@ DEFAULT_GUILD = {
     "is_moving_categories": False
 }
 
+# Channel updates arriving within this window are handled by a single sort.
+SORT_DEBOUNCE_SECS = 2
+
+
+class FrozenLayout():
+    """An in-memory copy of a guild's frozen channel order and freezer settings."""
+    is_enabled: bool
+    is_moving_categories: bool
+    orders: typing.Dict[int, typing.List[int]]
+    frozen_channel_ids: typing.Set[int]
+
+    def __init__(self, guild_config: dict):
+        self.is_enabled = guild_config['is_enabled']
+        self.is_moving_categories = guild_config['is_moving_categories']
+        self.orders = {}
+        self.frozen_channel_ids = set()
+
+        for category_id, entry in guild_config['freezer_entries'].items():
+            children = sorted(entry['children'], key=lambda c: c['position'])
+            self.orders[int(category_id)] = [child['id'] for child in children]
+            self.frozen_channel_ids.update(self.orders[int(category_id)])
+
 
 class Freezer(commands.Cog):
     """
@@ -67,35 +90,64 @@ class Freezer(commands.Cog):
         self.is_running = False
 
         self.current_movers : typing.List[_FreezerEntry] = []
+
+        self.pending_sorts : typing.Dict[int, asyncio.Task] = {}
+        self.layouts : typing.Dict[int, FrozenLayout] = {}
         pass
 
-    async def sort_channels(self, guild: discord.Guild):
-        freezer_entries: typing.Dict[str, _FreezerEntry] = await self.config.guild(guild).freezer_entries()
-        operations = []
-        categories = guild.categories
-
-        # Identify all of the channels that need to be corrected.
-        for category in categories:
-            if str(category.id) in freezer_entries.keys():
-                correct_channels = sorted(freezer_entries[str(category.id)]['children'], key=lambda c: c['position'])
-                
-                for k in range(0, len(correct_channels)):
-                    channel = next(c for c in category.channels if c.id == correct_channels[k]['id'])
+    async def get_layout(self, guild: discord.Guild) -> FrozenLayout:
+        """Returns the guild's frozen layout, reading Config only on first use."""
+        if guild.id not in self.layouts:
+            self.layouts[guild.id] = FrozenLayout(await self.config.guild(guild).all())
+        return self.layouts[guild.id]
+
+    async def cog_unload(self):
+        for task in self.pending_sorts.values():
+            task.cancel()
 
+    async def sort_channels(self, guild: discord.Guild):
+        layout = await self.get_layout(guild)
+        positions: typing.Dict[int, int] = {}
+
+        # Plan the fewest moves that restore each frozen category's order.
+        for category in guild.categories:
+            if category.id in layout.orders:
+                # Discord positions text-like and voice-like channels separately, so each
+                # sorting bucket is planned on its own.
+                buckets: typing.Dict[int, typing.Dict[int, int]] = {}
+                for channel in category.channels:
                     # check for permissions
                     if channel.permissions_for(guild.me).manage_channels:
-                        print(f"Channel {channel.name} is at position {channel.position} and should be at {correct_channels[k]['position']}")
-                        operations.append(channel.edit(position=correct_channels[k]['position']))
-                    
+                        buckets.setdefault(channel._sorting_bucket, {})[channel.id] = channel.position
+
+                for current in buckets.values():
+                    positions.update(plan_reorder(current, layout.orders[category.id]))
+
+        if len(positions) > 0:
+            print(f"Freezer: Moving {len(positions)} channels in {guild.name} ({guild.id})")
+            await self.bot.http.bulk_channel_update(
+                guild.id,
+                [{"id": channel_id, "position": position} for channel_id, position in positions.items()],  # type: ignore[misc]
+                reason="Restoring frozen channel order.",
+            )
+
+    def queue_sort(self, guild: discord.Guild):
+        """Sorts the guild's channels once the current burst of channel updates settles."""
+        if guild.id in self.pending_sorts:
+            return
+
+        async def debounced_sort():
+            try:
+                await asyncio.sleep(SORT_DEBOUNCE_SECS)
+            finally:
+                self.pending_sorts.pop(guild.id, None)
 
-        if len(operations) > 0:
-            await self.config.guild(guild).is_moving_categories.set(True)
-            print("Running operations")
-            for operation in operations:
-                await operation
-                await sleep(3)
-            print("Done running operations")
-            await self.config.guild(guild).is_moving_categories.set(False)
+            try:
+                await self.sort_channels(guild)
+            except discord.HTTPException as e:
+                print(f"Freezer: Failed to sort channels in {guild.name} ({guild.id}): {e}")
+
+        self.pending_sorts[guild.id] = asyncio.create_task(debounced_sort())
 
 
     @commands.group()
@@ -111,6 +163,7 @@ class Freezer(commands.Cog):
         """Enable the freezer.
         """
         await self.config.guild(ctx.guild).is_enabled.set(True)
+        self.layouts.pop(ctx.guild.id, None)
         await ctx.send("Freezer enabled.")
         pass
 
@@ -120,6 +173,7 @@ class Freezer(commands.Cog):
         """Disable the freezer.
         """
         await self.config.guild(ctx.guild).is_enabled.set(False)
+        self.layouts.pop(ctx.guild.id, None)
         await ctx.send("Freezer disabled.")
         pass
 
@@ -135,6 +189,7 @@ class Freezer(commands.Cog):
             bool = await self.config.guild(ctx.guild).is_enabled()
 
         await self.config.guild(ctx.guild).is_enabled.set(bool)
+        self.layouts.pop(ctx.guild.id, None)
 
         await ctx.send(f"Freezer is {'enabled' if bool else 'disabled'}.")
         pass
@@ -148,6 +203,7 @@ class Freezer(commands.Cog):
             bool = await self.config.guild(ctx.guild).is_moving_categories()
 
         await self.config.guild(ctx.guild).is_moving_categories.set(bool)
+        self.layouts.pop(ctx.guild.id, None)
 
         await ctx.send(f"Currently {'moving' if bool else 'not moving'} channels.")
         pass
@@ -182,6 +238,7 @@ class Freezer(commands.Cog):
         await ctx.send(f"Froze {category.name if category is not None else 'all channels'} successfully")
 
         await self.config.guild(ctx.guild).freezer_entries.set(freezer_entries)
+        self.layouts.pop(ctx.guild.id, None)
         pass
 
     @freezer.command(aliases=["unlock"])
@@ -214,6 +271,7 @@ class Freezer(commands.Cog):
         await ctx.send(f"Unfroze {category.name if category is not None else 'all channels'} successfully")
 
         await self.config.guild(ctx.guild).freezer_entries.set(freezer_entries)
+        self.layouts.pop(ctx.guild.id, None)
         pass
 
     @freezer.command()
@@ -260,6 +318,7 @@ class Freezer(commands.Cog):
 
         await ctx.send(embed=embed)
         await self.config.guild(ctx.guild).freezer_entries.set(freezer_entries)
+        self.layouts.pop(ctx.guild.id, None)
 
         pass
 
@@ -288,6 +347,7 @@ class Freezer(commands.Cog):
         """
         if bool != None:
             await self.config.guild(ctx.guild).is_moving_categories.set(bool)
+            self.layouts.pop(ctx.guild.id, None)
         
         bool = await self.config.guild(ctx.guild).is_moving_categories()
 
@@ -303,12 +363,18 @@ class Freezer(commands.Cog):
             before (FreezerEntryType): Before state of the channel.
             after (FreezerEntryType): After state of the channel.
         """
-        if not await self.config.guild(before.guild).is_enabled():
+        # Permission, name and topic edits can't change the order.
+        if before.position == after.position and before.category_id == after.category_id:
             return
-        
-        if await self.config.guild(before.guild).is_moving_categories():
+
+        layout = await self.get_layout(after.guild)
+
+        if not layout.is_enabled or layout.is_moving_categories:
+            return
+
+        if after.id not in layout.frozen_channel_ids:
             return
         
-        await self.sort_channels(before.guild)
+        self.queue_sort(after.guild)
 
         pass
@@ -0,0 +1,97 @@
+import bisect
+import typing
+
+
+def longest_increasing_subsequence(values: typing.Sequence[int]) -> typing.List[int]:
+    """Returns the indices of one longest strictly increasing subsequence of `values`, in O(n log n)."""
+    tails: typing.List[int] = []  # tails[k]: smallest tail value of an increasing run of length k + 1
+    tail_indices: typing.List[int] = []
+    previous: typing.List[typing.Optional[int]] = [None] * len(values)
+
+    for i, value in enumerate(values):
+        k = bisect.bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[k] = value
+            tail_indices[k] = i
+        previous[i] = tail_indices[k - 1] if k > 0 else None
+
+    indices: typing.List[int] = []
+    index = tail_indices[-1] if len(tail_indices) > 0 else None
+    while index is not None:
+        indices.append(index)
+        index = previous[index]
+
+    return indices[::-1]
+
+
+def plan_reorder(
+    current: typing.Dict[int, int], desired_order: typing.Sequence[int]
+) -> typing.Dict[int, int]:
+    """Works out the fewest position changes that put channels into the desired order.
+
+    Channels on a longest increasing subsequence of the current order (ranked by desired order)
+    are already correct relative to each other and stay put.  The rest are slotted into the gaps
+    between them.  If a gap is too narrow, every channel is renumbered from the lowest position.
+
+    Args:
+        current (typing.Dict[int, int]): Channel IDs mapped to their current positions.
+        desired_order (typing.Sequence[int]): Channel IDs in the order they should appear.  IDs missing from `current` are ignored.
+
+    Returns:
+        typing.Dict[int, int]: Channel IDs mapped to new positions, only for channels that need to move.
+    """
+    desired = [channel_id for channel_id in desired_order if channel_id in current]
+    if len(desired) < 2:
+        return {}
+
+    rank = {channel_id: i for i, channel_id in enumerate(desired)}
+    # Discord breaks position ties by ID.
+    current_order = sorted(desired, key=lambda channel_id: (current[channel_id], channel_id))
+
+    kept = {
+        current_order[i]
+        for i in longest_increasing_subsequence([rank[channel_id] for channel_id in current_order])
+    }
+
+    if len(kept) == len(desired):
+        return {}
+
+    positions: typing.Dict[int, int] = {}
+    previous_position: typing.Optional[int] = None
+
+    for i, channel_id in enumerate(desired):
+        if channel_id in kept:
+            positions[channel_id] = current[channel_id]
+            previous_position = current[channel_id]
+            continue
+
+        later_kept = next((j for j in range(i + 1, len(desired)) if desired[j] in kept), None)
+        next_kept_position = current[desired[later_kept]] if later_kept is not None else None
+
+        if previous_position is not None:
+            position = previous_position + 1
+        else:
+            # Leading channels count back from the first kept one.
+            position = next_kept_position - (later_kept - i)  # type: ignore[operator]
+
+        if position < 0 or (next_kept_position is not None and position >= next_kept_position):
+            break
+
+        positions[channel_id] = position
+        previous_position = position
+    else:
+        return {
+            channel_id: position
+            for channel_id, position in positions.items()
+            if position != current[channel_id]
+        }
+
+    base = min(current[channel_id] for channel_id in desired)
+    return {
+        channel_id: base + i
+        for i, channel_id in enumerate(desired)
+        if base + i != current[channel_id]
+    }
@@ -49,6 +49,37 @@ def get_role_depth(head_id: int, role_id: int, registry: typing.List['Registered
 
     return depth
 
+class CompiledRegistry():
+    """A guild's registry indexed by role, with every role's depth worked out up front."""
+    enabled: bool
+    head_id: typing.Union[None, int]
+    entries: typing.Dict[int, 'RegisteredRole']
+    depths: typing.Dict[int, int]
+    exclusive_role_ids: typing.Set[int]
+
+    def __init__(self, guild_config: 'GuildConfig'):
+        self.enabled = guild_config['enabled']
+        self.head_id = guild_config['head_id']
+        self.entries = {entry['role_id']: entry for entry in guild_config['registry']}
+        self.exclusive_role_ids = {entry['role_id'] for entry in guild_config['registry'] if entry['exclusive']}
+
+        # Same walk as `get_role_depth`: follow the first link from the head.  Roles off that
+        # path get the depth the walk stops at.
+        chain : typing.List[int] = []
+        current_id = self.head_id
+        while current_id is not None and current_id not in chain:
+            chain.append(current_id)
+            current_entry = self.entries.get(current_id)
+            if current_entry is None or len(current_entry['next_ids']) == 0:
+                break
+            current_id = current_entry['next_ids'][0]
+
+        self.depths = {role_id: depth for depth, role_id in enumerate(chain)}
+        self.default_depth = max(len(chain) - 1, 0)
+
+    def get_depth(self, role_id: int) -> int:
+        return self.depths.get(role_id, self.default_depth)
+
 class GuildConfig(typing.TypedDict):
     enabled: bool
     head_id: typing.Union[None, int]
@@ -8,13 +8,17 @@ from redbot.core.config import Config
 from dogscogs.constants import COG_IDENTIFIER
 from dogscogs.views.confirmation import ConfirmationView
 
-from .config import GuildConfig, MemberConfig, RegisteredRole, get_registry_entry, get_role_depth
+from bulkroles import get_executor
+
+from .config import CompiledRegistry, GuildConfig, MemberConfig, RegisteredRole
 from .embeds import GraduationConfigEmbed
 
 REGISTERED_ROLE_TOKEN = "$REGISTERED_ROLES$"
 REGISTERED_ROLE_COUNT_TOKEN = "$REGISTERED_ROLE_COUNT$"
 ASSIGNED_ROLE_TOKEN = "$ASSIGNED_ROLE$"
 
+BULK_NAMESPACE = "Graduation"
+
 DEFAULT_GUILD: GuildConfig = {
     "enabled": True,
     "head_id": 1313226901799833680,
@@ -105,51 +109,52 @@ class Graduation(commands.Cog):
         self.config.register_guild(**DEFAULT_GUILD)
         self.config.register_member(**DEFAULT_MEMBER)
 
+        self.registries : typing.Dict[int, CompiledRegistry] = {}
+
+    async def cog_load(self) -> None:
+        get_executor(self.bot).register_callback(BULK_NAMESPACE, self._record_promotion)
+
+    async def cog_unload(self) -> None:
+        get_executor(self.bot).unregister_callback(BULK_NAMESPACE)
+
+    async def _record_promotion(self, member: discord.Member, data: typing.Dict[str, typing.Any]) -> None:
+        if data.get("promoted_at") is not None:
+            await self.config.member(member).last_promotion_timestamp.set(data["promoted_at"])
+
+    async def get_registry(self, guild: discord.Guild) -> CompiledRegistry:
+        """Returns the guild's compiled registry, reading Config only on first use."""
+        if guild.id not in self.registries:
+            self.registries[guild.id] = CompiledRegistry(await self.config.guild(guild).all())
+        return self.registries[guild.id]
+
     async def __find_users(self, ctx: commands.GuildContext) -> typing.List[typing.Tuple[discord.Member, typing.List[discord.Role]]]:
         """
         Find all users who have registered roles.
         """
         
-        registry = await self.config.guild(ctx.guild).registry()
-        registered_role_ids = [entry["role_id"] for entry in registry]
+        registry = await self.get_registry(ctx.guild)
         
         members : typing.List[typing.Tuple[discord.Member, typing.List[discord.Role]]] = []
 
         for member in ctx.guild.members:
-            found_roles = [role for role in member.roles if role.id in registered_role_ids]
+            found_roles = [role for role in member.roles if role.id in registry.entries]
             if len(found_roles) > 0:
-                members.append((member, [get_registry_entry(role.id, registry) for role in found_roles]))
+                members.append((member, [registry.entries[role.id] for role in found_roles]))
 
         return members
 
-    async def __promote(self, ctx: commands.GuildContext, member: discord.Member) -> bool:
+    def __plan_promotion(self, registry: typing.List[RegisteredRole], member: discord.Member) -> typing.Optional[typing.Tuple[int, typing.List[int], typing.List[int]]]:
         """
-        Graduate a user to the next tier in the registry.
+        Work out the roles to add and remove to graduate a user to the next tier in the registry.
         """
-
-        registry : typing.List[RegisteredRole] = await self.config.guild(ctx.guild).registry()
         member_role_ids = [role.id for role in member.roles]
 
         found_entry = next((entry for entry in registry if entry["role_id"] in member_role_ids and len(entry["next_ids"]) > 0), None)
 
         if found_entry is None:
-            return False
-        
-        try:
-            await member.remove_roles(discord.utils.get(ctx.guild.roles, id=int(found_entry['role_id'])), reason="Graduating to next tier.")
-        except discord.Forbidden:
-            await self.bot.send_to_owners(f"Graduation: I do not have permission to remove roles for {member.mention} in {ctx.guild.name}.")
+            return None
 
-        roles_to_be_added = [r for r in [discord.utils.get(ctx.guild.roles, id=int(next_id)) for next_id in found_entry["next_ids"]] if r is not None]
-
-        try:
-            await member.add_roles(*roles_to_be_added, reason="Graduating to next tier.")
-        except discord.Forbidden:
-            await self.bot.send_to_owners(f"Graduation: I do not have permission to add roles for {member.mention} in {ctx.guild.name}.")
-
-        await self.config.member(member).last_promotion_timestamp.set(ctx.message.created_at.timestamp())
-
-        return True
+        return (member.id, [int(next_id) for next_id in found_entry["next_ids"]], [int(found_entry["role_id"])])
 
 
     @commands.group()
@@ -172,6 +177,7 @@ class Graduation(commands.Cog):
             is_enabled = await self.config.guild(ctx.guild).enabled()
 
         await self.config.guild(ctx.guild).enabled.set(is_enabled)
+        self.registries.pop(ctx.guild.id, None)
         await ctx.send(f"Graduation system is now {'ENABLED' if is_enabled else 'DISABLED'}.")
 
     @graduation.command()
@@ -193,6 +199,7 @@ class Graduation(commands.Cog):
         Clear all guild data.
         """
         await self.config.guild(ctx.guild).clear()
+        self.registries.pop(ctx.guild.id, None)
         await ctx.send("All guild data has been cleared.")
 
     @graduation.command(aliases=['convert', 'promote', 'convertusers'])
@@ -215,13 +222,24 @@ class Graduation(commands.Cog):
 
         if not await view.wait() and view.value:
             await confirmation_message.edit(content="Promoting users...", view=None)
-            count = 0
 
-            for member, _ in found:
-                if await self.__promote(ctx, member):
-                    count += 1
+            registry : typing.List[RegisteredRole] = await self.config.guild(ctx.guild).registry()
+            edits = [self.__plan_promotion(registry, member) for member, _ in found]
+
+            result = await get_executor(self.bot).run(
+                BULK_NAMESPACE,
+                ctx.guild,
+                [edit for edit in edits if edit is not None],
+                description="Promoting users...",
+                reason="Graduating to next tier.",
+                message=confirmation_message,
+                data={"promoted_at": ctx.message.created_at.timestamp()},
+            )
 
-            await ctx.send(f"Promoted `{count}` users.")
+            if result.failed > 0:
+                await self.bot.send_to_owners(f"Graduation: I could not update roles for {result.failed} members in {ctx.guild.name}.")
+
+            await ctx.send(f"Promoted `{result.changed}` users.")
 
         await confirmation_message.delete()
 
@@ -240,26 +258,20 @@ class Graduation(commands.Cog):
         if len(before.roles) >= len(after.roles):
             return
         
-        if not await self.config.guild(before.guild).enabled():
-            return
-        
-        exclusive_registered_role_ids = []
-        registry : typing.List[RegisteredRole] = await self.config.guild(before.guild).registry()
-        head_id = await self.config.guild(before.guild).head_id()
+        registry = await self.get_registry(before.guild)
 
-        for entry in registry:
-            if entry["exclusive"]:
-                exclusive_registered_role_ids.append(entry["role_id"])
+        if not registry.enabled:
+            return
 
         roles_to_be_removed : typing.List[discord.Role] = []
 
-        found_roles = [role for role in after.roles if role.id in exclusive_registered_role_ids]
+        found_roles = [role for role in after.roles if role.id in registry.exclusive_role_ids]
         best_depth = 0
         best_role = None
 
         if len(found_roles) > 1:
             for role in found_roles:        
-                depth = get_role_depth(head_id, role.id, registry)
+                depth = registry.get_depth(role.id)
                 if depth > best_depth:
                     best_depth = depth
                     best_role = role
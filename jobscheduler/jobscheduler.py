@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Literal
+import typing
+
+from redbot.core import commands
+from redbot.core.bot import Red
+from redbot.core.utils.chat_formatting import pagify
+
+from apscheduler.job import Job  # type: ignore[import-untyped]
+
+from .service import SchedulerService, get_scheduler
+
+RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
+
+
+class JobScheduler(commands.Cog):
+    """
+    Shared, persistent job scheduling used by other cogs.
+    """
+
+    def __init__(self, bot: Red) -> None:
+        self.bot = bot
+        self.service: SchedulerService = get_scheduler(bot)
+
+    @commands.group(invoke_without_command=True)
+    @commands.is_owner()
+    async def jobs(self, ctx: commands.Context, namespace: typing.Optional[str] = None):
+        """List scheduled jobs, optionally for a single namespace."""
+        jobs: typing.List[Job] = self.service.get_jobs(namespace)
+
+        if len(jobs) == 0:
+            await ctx.send("No jobs are scheduled.")
+            return
+
+        description = ""
+
+        for job in sorted(jobs, key=lambda j: j.id):
+            next_run_time: typing.Optional[datetime] = job.next_run_time
+
+            description += f"`{job.name}`"
+
+            if next_run_time is not None:
+                description += f" @ <t:{int(next_run_time.timestamp())}:R>"
+
+            if self.service.is_persisted(job):
+                description += " (persisted)"
+
+            description += "\n"
+
+        for page in pagify(f"Jobs ({len(jobs)}):\n{description}"):
+            await ctx.send(page)
+
+    @jobs.command(name="namespaces")
+    @commands.is_owner()
+    async def jobs_namespaces(self, ctx: commands.Context):
+        """Count scheduled jobs per namespace."""
+        counts: typing.Dict[str, int] = {}
+
+        for job in self.service.get_jobs():
+            namespace = job.id.split(":", 1)[0]
+            counts[namespace] = counts.get(namespace, 0) + 1
+
+        if len(counts) == 0:
+            await ctx.send("No jobs are scheduled.")
+            return
+
+        await ctx.send(
+            "\n".join(
+                f"`{namespace}`: {count} job{'s' if count != 1 else ''} ({len(self.service.handlers.get(namespace, {}))} handlers)"
+                for namespace, count in sorted(counts.items())
+            )
+        )
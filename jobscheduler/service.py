@@ -0,0 +1,323 @@
+import asyncio
+from datetime import datetime, timedelta
+import typing
+
+from redbot.core.bot import Red
+from redbot.core.config import Config
+
+from apscheduler.job import Job  # type: ignore[import-untyped]
+from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore[import-untyped]
+from apscheduler.triggers.date import DateTrigger  # type: ignore[import-untyped]
+
+from dogscogs.constants import COG_IDENTIFIER, TIMEZONE
+
+BOT_ATTRIBUTE = "dogscogs_scheduler"
+
+JobHandler = typing.Callable[..., typing.Awaitable[None]]
+
+# How long to wait before running a deferred or failed job again.
+RETRY_SECS = 5 * 60
+
+# Failed attempts before a persisted job is dropped.  Deferrals don't count.
+MAX_ATTEMPTS = 5
+
+
+class JobDeferred(Exception):
+    """Raised by a handler that can't run yet, e.g. because its guild isn't available.
+
+    The job stays journaled and is retried after `RETRY_SECS`.
+    """
+
+
+class JobRecord(typing.TypedDict):
+    handler: str
+    run_at: float
+    payload: typing.Dict[str, typing.Any]
+    name: typing.Optional[str]
+
+
+DEFAULT_GLOBAL = {
+    "jobs": {},
+    "seeded_namespaces": [],
+}
+
+
+class SchedulerService:
+    """A single bot-wide scheduler shared between cogs.
+
+    Every cog schedules under its own namespace.  Jobs added with `schedule` are written to a
+    Config-backed journal and replayed by `restore` after a restart; jobs added with `add_job`
+    live in memory only and are expected to be rebuilt by their owner.
+    """
+
+    def __init__(self, bot: Red) -> None:
+        self.bot = bot
+        self.config = Config.get_conf(
+            None,
+            identifier=COG_IDENTIFIER,
+            cog_name="JobScheduler",
+            force_registration=True,
+        )
+        self.config.register_global(**DEFAULT_GLOBAL)
+
+        self.scheduler = AsyncIOScheduler(timezone="US/Eastern")
+        self.handlers: typing.Dict[str, typing.Dict[str, JobHandler]] = {}
+        self.records: typing.Dict[str, typing.Dict[str, JobRecord]] = {}
+        self.attempts: typing.Dict[str, int] = {}
+
+        self._is_loaded = False
+        self._load_lock = asyncio.Lock()
+
+    def start(self) -> None:
+        if not self.scheduler.running:
+            self.scheduler.start()
+
+    @staticmethod
+    def _job_id(namespace: str, job_id: str) -> str:
+        return f"{namespace}:{job_id}"
+
+    async def _load(self) -> None:
+        """Reads the whole journal in one pass, the first time it's needed."""
+        async with self._load_lock:
+            if self._is_loaded:
+                return
+            self.records = await self.config.jobs()
+            self._is_loaded = True
+
+    def register(self, namespace: str, handlers: typing.Dict[str, JobHandler]) -> None:
+        """Registers the coroutines that run a namespace's persisted jobs.
+
+        Args:
+            namespace (str): The owning cog's namespace.
+            handlers (typing.Dict[str, JobHandler]): Handler names mapped to coroutine functions, called with the job's payload as keyword arguments.
+        """
+        self.handlers[namespace] = handlers
+
+    def unregister(self, namespace: str) -> None:
+        """Drops a namespace's handlers and in-memory jobs.  Persisted jobs stay journaled until restored."""
+        self.handlers.pop(namespace, None)
+        self.remove_namespace_jobs(namespace)
+
+    async def restore(self, namespace: str) -> int:
+        """Re-adds every journaled job for the namespace.  Overdue jobs run immediately.
+
+        Returns:
+            int: The number of jobs restored.
+        """
+        await self._load()
+
+        records = self.records.get(namespace, {})
+        for job_id, record in records.items():
+            self._add_persisted(namespace, job_id, record)
+
+        return len(records)
+
+    async def is_seeded(self, namespace: str) -> bool:
+        """Whether the namespace has already moved its existing jobs into the journal."""
+        return namespace in await self.config.seeded_namespaces()
+
+    async def mark_seeded(self, namespace: str) -> None:
+        async with self.config.seeded_namespaces.get_lock():
+            seeded_namespaces: typing.List[str] = await self.config.seeded_namespaces()
+            if namespace not in seeded_namespaces:
+                seeded_namespaces.append(namespace)
+                await self.config.seeded_namespaces.set(seeded_namespaces)
+
+    async def schedule(
+        self,
+        namespace: str,
+        job_id: str,
+        *,
+        handler: str,
+        run_at: datetime,
+        payload: typing.Dict[str, typing.Any],
+        name: typing.Optional[str] = None,
+    ) -> Job:
+        """Schedules a persisted, one-off job.  Replaces any job with the same ID.
+
+        Args:
+            namespace (str): The owning cog's namespace.
+            job_id (str): An ID unique within the namespace.
+            handler (str): The registered handler to call.
+            run_at (datetime): When the job should run.
+            payload (typing.Dict[str, typing.Any]): JSON-serializable keyword arguments for the handler.
+            name (typing.Optional[str], optional): A readable name for introspection. Defaults to the ID.
+        """
+        await self._load()
+
+        record: JobRecord = {
+            "handler": handler,
+            "run_at": run_at.timestamp(),
+            "payload": payload,
+            "name": name,
+        }
+
+        self.records.setdefault(namespace, {})[job_id] = record
+        await self.config.set_raw("jobs", namespace, job_id, value=record)
+
+        return self._add_persisted(namespace, job_id, record)
+
+    def _add_persisted(
+        self, namespace: str, job_id: str, record: JobRecord, *, run_at: typing.Optional[datetime] = None
+    ) -> Job:
+        run_date = max(
+            run_at or datetime.fromtimestamp(record["run_at"], tz=TIMEZONE),
+            datetime.now(tz=TIMEZONE),
+        )
+
+        self.start()
+
+        return self.scheduler.add_job(
+            self._run,
+            DateTrigger(run_date=run_date),
+            id=self._job_id(namespace, job_id),
+            name=self._job_id(namespace, record["name"] or job_id),
+            args=[namespace, job_id],
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+
+    async def _run(self, namespace: str, job_id: str) -> None:
+        # Jobs restored during startup would otherwise run before any guild is cached.
+        await self.bot.wait_until_red_ready()
+
+        record = self.records.get(namespace, {}).get(job_id)
+        if record is None:
+            return
+
+        handler = self.handlers.get(namespace, {}).get(record["handler"])
+        if handler is None:
+            # The owning cog isn't loaded; leave the job journaled for its next restore.
+            return
+
+        full_id = self._job_id(namespace, job_id)
+
+        try:
+            await handler(**record["payload"])
+        except JobDeferred:
+            self._retry(namespace, job_id, record)
+            return
+        except Exception as e:
+            self.attempts[full_id] = self.attempts.get(full_id, 0) + 1
+            if self.attempts[full_id] < MAX_ATTEMPTS:
+                print(f"JobScheduler: Job `{full_id}` failed, retrying: {e}")
+                self._retry(namespace, job_id, record)
+                return
+            print(f"JobScheduler: Job `{full_id}` failed {MAX_ATTEMPTS} times, dropping it: {e}")
+
+        self.attempts.pop(full_id, None)
+        await self._forget(namespace, job_id, record)
+
+    def _retry(self, namespace: str, job_id: str, record: JobRecord) -> None:
+        # Skipped if the job was rescheduled while the handler ran.
+        if self.records.get(namespace, {}).get(job_id) is not record:
+            return
+
+        self._add_persisted(
+            namespace, job_id, record, run_at=datetime.now(tz=TIMEZONE) + timedelta(seconds=RETRY_SECS)
+        )
+
+    async def _forget(self, namespace: str, job_id: str, record: typing.Optional[JobRecord] = None) -> None:
+        """Drops a job from the journal.  If `record` is given, only while it's still the current one."""
+        records = self.records.get(namespace, {})
+        if job_id not in records or (record is not None and records[job_id] is not record):
+            return
+
+        del records[job_id]
+        await self.config.clear_raw("jobs", namespace, job_id)
+
+    async def cancel(self, namespace: str, job_id: str) -> None:
+        """Removes a job from both the scheduler and the journal."""
+        await self._load()
+        self.remove_job(namespace, job_id)
+        await self._forget(namespace, job_id)
+
+    async def cancel_where(
+        self, namespace: str, predicate: typing.Callable[[JobRecord], bool]
+    ) -> int:
+        """Cancels every persisted job in the namespace whose record matches the predicate.
+
+        Returns:
+            int: The number of jobs cancelled.
+        """
+        await self._load()
+
+        job_ids = [
+            job_id
+            for job_id, record in self.records.get(namespace, {}).items()
+            if predicate(record)
+        ]
+
+        for job_id in job_ids:
+            await self.cancel(namespace, job_id)
+
+        return len(job_ids)
+
+    def add_job(
+        self,
+        namespace: str,
+        job_id: str,
+        func: typing.Callable,
+        trigger: typing.Any,
+        *,
+        args: typing.Optional[typing.List[typing.Any]] = None,
+        kwargs: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        name: typing.Optional[str] = None,
+    ) -> Job:
+        """Adds an in-memory job that won't survive a restart.  Replaces any job with the same ID."""
+        self.start()
+
+        if asyncio.iscoroutinefunction(func):
+            args = [func, *(args or [])]
+            func = self._run_when_ready
+
+        return self.scheduler.add_job(
+            func,
+            trigger,
+            id=self._job_id(namespace, job_id),
+            name=self._job_id(namespace, name or job_id),
+            args=args,
+            kwargs=kwargs,
+            replace_existing=True,
+        )
+
+    async def _run_when_ready(self, func: typing.Callable[..., typing.Awaitable[typing.Any]], *args: typing.Any, **kwargs: typing.Any) -> None:
+        await self.bot.wait_until_red_ready()
+        await func(*args, **kwargs)
+
+    def get_job(self, namespace: str, job_id: str) -> typing.Optional[Job]:
+        return self.scheduler.get_job(self._job_id(namespace, job_id))
+
+    def remove_job(self, namespace: str, job_id: str) -> None:
+        """Removes a job from the scheduler only.  Does nothing if it isn't scheduled."""
+        if self.get_job(namespace, job_id) is not None:
+            self.scheduler.remove_job(self._job_id(namespace, job_id))
+
+    def get_jobs(self, namespace: typing.Optional[str] = None) -> typing.List[Job]:
+        """Lists scheduled jobs, optionally limited to a single namespace."""
+        jobs: typing.List[Job] = self.scheduler.get_jobs()
+
+        if namespace is None:
+            return jobs
+
+        return [job for job in jobs if job.id.startswith(f"{namespace}:")]
+
+    def remove_namespace_jobs(self, namespace: str) -> None:
+        """Removes every in-memory job in the namespace.  Journaled records are kept."""
+        for job in self.get_jobs(namespace):
+            self.scheduler.remove_job(job.id)
+
+    def is_persisted(self, job: Job) -> bool:
+        namespace, _, job_id = job.id.partition(":")
+        return job_id in self.records.get(namespace, {})
+
+
+def get_scheduler(bot: Red) -> SchedulerService:
+    """Returns the bot-wide scheduler, creating and starting it on first use."""
+    if not hasattr(bot, BOT_ATTRIBUTE):
+        setattr(bot, BOT_ATTRIBUTE, SchedulerService(bot))
+
+    service: SchedulerService = getattr(bot, BOT_ATTRIBUTE)
+    service.start()
+
+    return service
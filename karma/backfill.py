@@ -0,0 +1,199 @@
+import asyncio
+import datetime
+import time
+import typing
+
+import discord
+from redbot.core.config import Config
+
+# Channels scanned at once.
+CONCURRENCY = 4
+
+# History pages (of up to 100 messages) requested per second across every channel.
+PAGES_PER_SECOND = 4.0
+
+# Matched messages held in memory before counts and checkpoints are written.
+BATCH_SIZE = 5000
+
+PROGRESS_INTERVAL_SECS = 10
+
+SERVER_ERROR_RETRY_SECS = 5
+
+
+class ChannelCheckpoint(typing.TypedDict):
+    last_message_id: typing.Optional[int]
+    done: bool
+
+
+class BackfillState(typing.TypedDict):
+    until: typing.Optional[float]
+    channels: typing.Dict[str, ChannelCheckpoint]
+
+
+DEFAULT_BACKFILL_STATE: BackfillState = {
+    "until": None,
+    "channels": {},
+}
+
+ApplyCounts = typing.Callable[[int, typing.Dict[int, typing.Dict[str, int]]], typing.Awaitable[None]]
+
+
+class RateBudget:
+    """A token bucket shared by every channel being scanned."""
+
+    def __init__(self, per_second: float) -> None:
+        self.per_second = per_second
+        self.tokens = per_second
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.per_second, self.tokens + (now - self.updated_at) * self.per_second)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.per_second)
+
+
+class KarmaBackfill:
+    """Recounts a guild's sticker karma from channel history.
+
+    Channels are scanned concurrently and counts are kept in memory, then written along with
+    each channel's position in a few large batches.  An interrupted run resumes from the last
+    batch written.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        guild: discord.Guild,
+        *,
+        valid_sticker_ids: typing.Iterable[str],
+        after: datetime.datetime,
+        apply_counts: ApplyCounts,
+    ) -> None:
+        self.config = config
+        self.guild = guild
+        self.valid_sticker_ids = set(valid_sticker_ids)
+        self.after = after
+        self.apply_counts = apply_counts
+
+        self.budget = RateBudget(PAGES_PER_SECOND)
+        self.flush_lock = asyncio.Lock()
+
+        self.state: BackfillState = {"until": None, "channels": {}}
+        self.deltas: typing.Dict[int, typing.Dict[str, int]] = {}
+        self.pending_matches = 0
+
+        self.scanned = 0
+        self.started_at = time.monotonic()
+
+    @property
+    def until(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.state["until"], tz=datetime.timezone.utc)  # type: ignore[arg-type]
+
+    def channels_done(self) -> int:
+        return len([c for c in self.state["channels"].values() if c["done"]])
+
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.scanned / elapsed if elapsed > 0 else 0.0
+
+    def progress(self) -> str:
+        return (
+            f"Scanned `{self.scanned}` messages in `{self.channels_done()} / {len(self.state['channels'])}` channels "
+            f"(`{self.rate():.0f}` messages/s)."
+        )
+
+    async def flush(self) -> None:
+        """Writes the counts gathered so far, then every channel's position."""
+        async with self.flush_lock:
+            deltas, self.deltas = self.deltas, {}
+            self.pending_matches = 0
+            # Positions are copied before the counts are awaited, so they never run ahead of them.
+            channels = {channel_id: dict(checkpoint) for channel_id, checkpoint in self.state["channels"].items()}
+
+            await self.apply_counts(self.guild.id, deltas)
+            await self.config.guild(self.guild).backfill.set({**self.state, "channels": channels})
+
+    def _count(self, message: discord.Message) -> None:
+        matched_sticker_ids = {
+            str(sticker.id) for sticker in message.stickers if str(sticker.id) in self.valid_sticker_ids
+        }
+        if len(matched_sticker_ids) == 0:
+            return
+
+        member_deltas = self.deltas.setdefault(message.author.id, {})
+        for sticker_id in matched_sticker_ids:
+            member_deltas[sticker_id] = member_deltas.get(sticker_id, 0) + 1
+
+        self.pending_matches += 1
+
+    async def _scan(self, channel: discord.TextChannel) -> None:
+        checkpoint = self.state["channels"][str(channel.id)]
+        after = (
+            discord.Object(id=checkpoint["last_message_id"])
+            if checkpoint["last_message_id"] is not None
+            else self.after
+        )
+
+        scanned = 0
+
+        async for message in channel.history(limit=None, after=after, before=self.until, oldest_first=True):
+            if scanned % 100 == 0:
+                await self.budget.acquire()
+            scanned += 1
+            self.scanned += 1
+
+            if hasattr(message.author, "guild"):
+                self._count(message)
+
+            checkpoint["last_message_id"] = message.id
+
+            if self.pending_matches >= BATCH_SIZE:
+                await self.flush()
+
+        checkpoint["done"] = True
+
+    async def _worker(self, queue: "asyncio.Queue[discord.TextChannel]") -> None:
+        while not queue.empty():
+            channel = queue.get_nowait()
+            try:
+                await self._scan(channel)
+            except discord.Forbidden:
+                self.state["channels"][str(channel.id)]["done"] = True
+            except discord.DiscordServerError:
+                await asyncio.sleep(SERVER_ERROR_RETRY_SECS)
+                queue.put_nowait(channel)
+
+    async def run(self, *, on_progress: typing.Optional[typing.Callable[[str], typing.Awaitable[None]]] = None) -> None:
+        """Scans every text channel not yet finished, resuming from the saved positions.
+
+        Args:
+            on_progress (typing.Optional[typing.Callable[[str], typing.Awaitable[None]]], optional): Called periodically with a progress line.
+        """
+        self.state = await self.config.guild(self.guild).backfill()
+
+        for channel in self.guild.text_channels:
+            self.state["channels"].setdefault(str(channel.id), {"last_message_id": None, "done": False})
+
+        queue: "asyncio.Queue[discord.TextChannel]" = asyncio.Queue()
+        for channel in self.guild.text_channels:
+            if not self.state["channels"][str(channel.id)]["done"]:
+                queue.put_nowait(channel)
+
+        workers = asyncio.gather(*[self._worker(queue) for _ in range(CONCURRENCY)])
+
+        while not workers.done():
+            await asyncio.wait([workers], timeout=PROGRESS_INTERVAL_SECS)
+            if on_progress is not None and not workers.done():
+                await on_progress(self.progress())
+
+        await workers
+        await self.flush()
@@ -1,4 +1,3 @@
-import asyncio
 import datetime
 from typing import Literal
 import typing
@@ -8,25 +7,53 @@ from redbot.core import commands
 from redbot.core.bot import Red
 from redbot.core.config import Config
 
+from .backfill import DEFAULT_BACKFILL_STATE, KarmaBackfill
 from .embeds import KarmaEmbed
 
 from dogscogs.constants import COG_IDENTIFIER
 
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
 
+DEFAULT_GLOBAL = {
+    # Set once every guild with member data has been checked for the old format.
+    "schema_version": 0,
+}
+
 DEFAULT_GUILD = {
     "valid_stickers": {
         1258093939076890726 : 1,
         1277034875416739943 : 0,
         1258094007460954123 : -1,
     },
-    "after_timestamp": 1719990000
+    "after_timestamp": 1719990000,
+    "sticker_totals": {},
+    "leaderboard": {},
+    "schema_version": 0,
+    "backfill": DEFAULT_BACKFILL_STATE,
 }
 
 DEFAULT_MEMBER = {
-    "stickers_found": {},
+    "sticker_counts": {},
+    "recent_message_ids": [],
 } # type: ignore[var-annotated]
 
+SCHEMA_VERSION = 1
+
+# How many of a member's latest counted message IDs are kept to avoid counting a message twice.
+RECENT_MESSAGE_IDS_LIMIT = 100
+
+# How many members are ranked per sticker in `topkarma`.
+LEADERBOARD_SIZE = 10
+
+def _rank(leaderboard: typing.Dict[str, int], member_id: str, count: int) -> None:
+    """Updates a sticker's top members with a member's new count.  Counts only ever grow, so
+    members that fall off the board never need to come back without a new count."""
+    if member_id in leaderboard or len(leaderboard) < LEADERBOARD_SIZE:
+        leaderboard[member_id] = count
+    elif count > min(leaderboard.values()):
+        del leaderboard[min(leaderboard, key=lambda k: leaderboard[k])]
+        leaderboard[member_id] = count
+
 class Karma(commands.Cog):
     """
     Karma for using stickers.
@@ -40,31 +67,137 @@ class Karma(commands.Cog):
             force_registration=True,
         )
 
+        self.config.register_global(**DEFAULT_GLOBAL)
         self.config.register_guild(**DEFAULT_GUILD)
         self.config.register_member(**DEFAULT_MEMBER)
 
+    async def cog_load(self) -> None:
+        if await self.config.schema_version() < SCHEMA_VERSION:
+            # Guilds that never stored a setting have no schema version of their own, so the
+            # first upgrade has to look at every member.
+            for guild_id, members in (await self.config.all_members()).items():
+                await self._migrate_guild(guild_id, members)
+            await self.config.schema_version.set(SCHEMA_VERSION)
+            return
+
+        for guild_id, guild_data in (await self.config.all_guilds()).items():
+            if guild_data["schema_version"] < SCHEMA_VERSION:
+                await self._migrate_guild(guild_id, await self.config.all_members(discord.Object(id=guild_id)))  # type: ignore[arg-type]
+
+    async def _migrate_guild(self, guild_id: int, members: typing.Dict[int, dict]) -> None:
+        """Folds the old per-member lists of message IDs into counters and builds the guild's totals.
+
+        Every count is written as an absolute value rebuilt from the member data, so a migration
+        cut short by a restart can run again without counting anything twice.
+        """
+        guild_config = self.config.guild_from_id(guild_id)
+
+        if await guild_config.schema_version() >= SCHEMA_VERSION:
+            return
+
+        member_counts : typing.Dict[int, typing.Dict[str, int]] = {}
+        recent_message_ids : typing.Dict[int, typing.List[int]] = {}
+
+        for member_id, member_data in members.items():
+            stickers_found : typing.Dict[str, typing.List[int]] = member_data.get("stickers_found", {})
+            if len(stickers_found) == 0:
+                # Either never used a sticker or already folded by an earlier, interrupted run.
+                member_counts[member_id] = member_data.get("sticker_counts", {})
+                continue
+
+            member_counts[member_id] = {
+                sticker_id: len(set(message_ids)) for sticker_id, message_ids in stickers_found.items()
+            }
+            recent_message_ids[member_id] = sorted(
+                {message_id for message_ids in stickers_found.values() for message_id in message_ids}
+            )[-RECENT_MESSAGE_IDS_LIMIT:]
+
+        async with guild_config.get_lock():
+            for member_id, message_ids in recent_message_ids.items():
+                member_config = self.config.member_from_ids(guild_id, member_id)
+                # Counts are stored before the old lists are cleared, so a rerun finds one or the other.
+                await member_config.sticker_counts.set(member_counts[member_id])
+                await member_config.recent_message_ids.set(message_ids)
+                await member_config.clear_raw("stickers_found")
+
+            sticker_totals : typing.Dict[str, int] = {}
+            leaderboard : typing.Dict[str, typing.Dict[str, int]] = {}
+
+            for member_id, sticker_counts in member_counts.items():
+                for sticker_id, count in sticker_counts.items():
+                    sticker_totals[sticker_id] = sticker_totals.get(sticker_id, 0) + count
+                    _rank(leaderboard.setdefault(sticker_id, {}), str(member_id), count)
+
+            await guild_config.sticker_totals.set(sticker_totals)
+            await guild_config.leaderboard.set(leaderboard)
+            await guild_config.schema_version.set(SCHEMA_VERSION)
+
+    async def _apply_counts(self, guild_id: int, deltas: typing.Dict[int, typing.Dict[str, int]]) -> None:
+        """Adds sticker counts to members and keeps the guild's totals and leaderboard in step.
+
+        Args:
+            guild_id (int): The guild the counts belong to.
+            deltas (typing.Dict[int, typing.Dict[str, int]]): Member IDs mapped to sticker IDs and how many more times they were used.
+        """
+        if len(deltas) == 0:
+            return
+
+        guild_config = self.config.guild_from_id(guild_id)
+
+        async with guild_config.get_lock():
+            sticker_totals : typing.Dict[str, int] = await guild_config.sticker_totals()
+            leaderboard : typing.Dict[str, typing.Dict[str, int]] = await guild_config.leaderboard()
+
+            for member_id, sticker_deltas in deltas.items():
+                member_config = self.config.member_from_ids(guild_id, member_id)
+                sticker_counts : typing.Dict[str, int] = await member_config.sticker_counts()
+
+                for sticker_id, delta in sticker_deltas.items():
+                    sticker_counts[sticker_id] = sticker_counts.get(sticker_id, 0) + delta
+                    sticker_totals[sticker_id] = sticker_totals.get(sticker_id, 0) + delta
+                    _rank(leaderboard.setdefault(sticker_id, {}), str(member_id), sticker_counts[sticker_id])
+
+                await member_config.sticker_counts.set(sticker_counts)
+
+            await guild_config.sticker_totals.set(sticker_totals)
+            await guild_config.leaderboard.set(leaderboard)
+
+    async def _clear_counts(self, guild: discord.Guild) -> None:
+        """Clears every member's counts and the guild's totals, keeping the guild's settings."""
+        guild_config = self.config.guild(guild)
+
+        async with guild_config.get_lock():
+            await self.config.clear_all_members(guild)
+            await guild_config.sticker_totals.clear()
+            await guild_config.leaderboard.clear()
+
     async def _count_stickers(self, message: discord.Message) -> None:    
         # if message.type != discord.MessageType.reply:
         #     return
             
         valid_sticker_ids = await self.config.guild(message.guild).valid_stickers()
-        message_sticker_ids = [sticker.id for sticker in message.stickers]
+        matched_sticker_ids = {
+            str(sticker.id) for sticker in message.stickers if str(sticker.id) in valid_sticker_ids.keys()
+        }
+
+        if len(matched_sticker_ids) == 0:
+            return
+
+        member_config = self.config.member(message.author)
 
-        stickers_found : typing.Dict[str, typing.List[int]]= await self.config.member(message.author).stickers_found()
-        write = False
+        async with member_config.recent_message_ids.get_lock():
+            recent_message_ids : typing.List[int] = await member_config.recent_message_ids()
 
-        for sticker_id in message_sticker_ids:
-            if str(sticker_id) in valid_sticker_ids.keys():
-                if str(sticker_id) not in stickers_found:
-                    stickers_found[str(sticker_id)] = []
-                    write = True
+            if message.id in recent_message_ids:
+                return
 
-                if message.id not in stickers_found[str(sticker_id)]:
-                    stickers_found[str(sticker_id)].append(int(message.id))
-                    write = True
+            recent_message_ids.append(message.id)
+            await member_config.recent_message_ids.set(recent_message_ids[-RECENT_MESSAGE_IDS_LIMIT:])
 
-        if write:
-            await self.config.member(message.author).stickers_found.set(stickers_found)
+        await self._apply_counts(
+            message.guild.id,
+            {message.author.id: {sticker_id: 1 for sticker_id in matched_sticker_ids}},
+        )
 
     @commands.command()
     @commands.guild_only()
@@ -80,7 +213,7 @@ class Karma(commands.Cog):
             return
 
 
-        stickers_found : typing.Dict[str, typing.List[int]]= await self.config.member(user).stickers_found()
+        sticker_counts : typing.Dict[str, int] = await self.config.member(user).sticker_counts()
         valid_stickers = await self.config.guild(ctx.guild).valid_stickers()
 
         karma = 0.0
@@ -88,10 +221,10 @@ class Karma(commands.Cog):
         
         sticker_count = {str(sticker_id): 0 for sticker_id in valid_stickers.keys()}
 
-        for sticker_id, message_ids in stickers_found.items():
-            karma += valid_stickers[sticker_id] * len(message_ids)
-            count += len(message_ids)
-            sticker_count[str(sticker_id)] += len(message_ids)
+        for sticker_id, used in sticker_counts.items():
+            karma += valid_stickers[sticker_id] * used
+            count += used
+            sticker_count[str(sticker_id)] += used
 
         if count > 0:
             karma = float(karma) / count
@@ -124,35 +257,52 @@ class Karma(commands.Cog):
     async def reset_karma(self, ctx: commands.GuildContext) -> None:
         await self.config.guild(ctx.guild).clear()
         await self.config.clear_all_members(ctx.guild)
+        await self.config.guild(ctx.guild).schema_version.set(SCHEMA_VERSION)
         await ctx.send("Karma reset.")
             
 
     @commands.command()
     @commands.guild_only()
     @commands.is_owner()
-    async def count_karma(self, ctx: commands.GuildContext) -> None:
-        after_timestamp = await self.config.guild(ctx.guild).after_timestamp()
-        after = datetime.datetime.fromtimestamp(after_timestamp)
-        for channel in ctx.guild.text_channels:
-            try:
-                async for message in channel.history(limit=None, after=after):
-                    if not hasattr(message.author, 'guild'):
-                        continue
-                    await self._count_stickers(message)
-            except discord.Forbidden:
-                continue
-            except discord.DiscordServerError:
-                await ctx.send("Rate limited. Continuing in 5 seconds.")
-                await asyncio.sleep(5)
-                continue
+    async def count_karma(self, ctx: commands.GuildContext, restart: bool = False) -> None:
+        """Recounts karma from channel history.
+
+        Counts are cleared and rebuilt from every message sent before the count started; newer
+        messages are counted as they arrive.  An interrupted count resumes where it left off
+        unless `restart` is set.
+        """
+        guild_config = self.config.guild(ctx.guild)
+
+        if restart or (await guild_config.backfill())["until"] is None:
+            await self._clear_counts(ctx.guild)
+            await guild_config.backfill.set({
+                "until": datetime.datetime.now(tz=datetime.timezone.utc).timestamp(),
+                "channels": {},
+            })
+
+        backfill = KarmaBackfill(
+            self.config,
+            ctx.guild,
+            valid_sticker_ids=(await guild_config.valid_stickers()).keys(),
+            after=datetime.datetime.fromtimestamp(await guild_config.after_timestamp()),
+            apply_counts=self._apply_counts,
+        )
+
+        message = await ctx.send("Counting karma...")
 
-        await ctx.send("Karma counted.")
+        async def on_progress(progress: str) -> None:
+            await message.edit(content=progress)
+
+        await backfill.run(on_progress=on_progress)
+        await guild_config.backfill.clear()
+
+        await message.edit(content=f"Karma counted. {backfill.progress()}")
 
     @commands.command(aliases=["serverkarma", "karma_server", "karmaserver", "karmaall", "karma_all", "totalkarma", "total_karma"])
     @commands.guild_only()
     @commands.has_guild_permissions(manage_roles=True)
     async def server_karma(self, ctx: commands.GuildContext) -> None:
-        members = await self.config.all_members(ctx.guild)
+        sticker_totals : typing.Dict[str, int] = await self.config.guild(ctx.guild).sticker_totals()
         valid_stickers = await self.config.guild(ctx.guild).valid_stickers()
 
         karma = 0.0
@@ -160,14 +310,11 @@ class Karma(commands.Cog):
 
         sticker_counts = {str(sticker_id): 0 for sticker_id in valid_stickers.keys()}
 
-        for i in members:
-            stickers_found : typing.Dict[str, typing.List[int]]= members[i]['stickers_found']
-
-            for sticker_id, message_ids in stickers_found.items():
-                karma += valid_stickers[sticker_id] * len(message_ids)
-                count += len(message_ids)
+        for sticker_id, used in sticker_totals.items():
+            karma += valid_stickers[sticker_id] * used
+            count += used
 
-                sticker_counts[str(sticker_id)] += len(message_ids)
+            sticker_counts[str(sticker_id)] += used
 
         if count > 0:
             karma = float(karma) / count
@@ -190,18 +337,9 @@ class Karma(commands.Cog):
     @commands.guild_only()
     @commands.has_guild_permissions(manage_roles=True)
     async def topkarma(self, ctx: commands.GuildContext) -> None:
-        members = await self.config.all_members(ctx.guild)
+        leaderboard : typing.Dict[str, typing.Dict[str, int]] = await self.config.guild(ctx.guild).leaderboard()
         valid_stickers = await self.config.guild(ctx.guild).valid_stickers()
 
-        count : typing.Dict[str, typing.Dict[str, int]]= {}
-
-        for i in members:
-            stickers_found : typing.Dict[str, typing.List[int]]= members[i]['stickers_found']
-            count[i] = {str(i): 0 for i in valid_stickers.keys()}
-
-            for sticker_id, message_ids in stickers_found.items():
-                count[i][sticker_id] += len(message_ids)
-
         embed = discord.Embed(title=f"Most Frequent Karma Manipulators")
 
         for i in valid_stickers.keys():
@@ -211,13 +349,13 @@ class Karma(commands.Cog):
 
             desc = ""
 
-            sorted_count = sorted(count.items(), key=lambda x: x[1][i], reverse=True)
+            sorted_count = sorted(leaderboard.get(str(i), {}).items(), key=lambda x: x[1], reverse=True)
 
             place = 1
 
-            for j in sorted_count[:10]:
+            for j in sorted_count[:LEADERBOARD_SIZE]:
                 user = ctx.bot.get_user(int(j[0]))
-                desc += f"{place}) {user.mention if user is not None else f'`{j[0]}`'}: {j[1][i]}\n"
+                desc += f"{place}) {user.mention if user is not None else f'`{j[0]}`'}: {j[1]}\n"
                 place += 1
 
             embed.add_field(name=f"`{sticker.name}` Usage", value=desc, inline=False)
@@ -0,0 +1,71 @@
+import heapq
+import sys
+import typing
+
+# (command, scope, guild ID, scope ID), e.g. ("hello", "member", guild_id, member_id)
+CooldownKey = typing.Tuple[str, str, int, int]
+
+
+class CooldownStore:
+    """Custom command cooldowns keyed by plain IDs.
+
+    Each key maps to the timestamp its cooldown ends.  A min-heap of expirations is swept as
+    time passes, so entries are dropped once they can no longer block anything and the store
+    only ever holds cooldowns that are still running.
+    """
+
+    def __init__(self) -> None:
+        self._expirations: typing.Dict[CooldownKey, float] = {}
+        self._heap: typing.List[typing.Tuple[float, CooldownKey]] = []
+
+    def __len__(self) -> int:
+        return len(self._expirations)
+
+    def is_cooling(self, key: CooldownKey, now: float) -> bool:
+        expiration = self._expirations.get(key)
+        return expiration is not None and expiration > now
+
+    def hit(self, key: CooldownKey, now: float, rate: float) -> None:
+        """Starts a `rate` second cooldown on the key."""
+        expiration = now + rate
+        self._expirations[key] = expiration
+        heapq.heappush(self._heap, (expiration, key))
+
+    def sweep(self, now: float) -> int:
+        """Evicts every expired cooldown.
+
+        Returns:
+            int: The number of cooldowns evicted.
+        """
+        evicted = 0
+
+        while len(self._heap) > 0 and self._heap[0][0] <= now:
+            expiration, key = heapq.heappop(self._heap)
+            # Skip heap entries superseded by a later hit on the same key.
+            if self._expirations.get(key) == expiration:
+                del self._expirations[key]
+                evicted += 1
+
+        return evicted
+
+    def memory_usage(self) -> int:
+        """Approximates the bytes held by the store's containers and keys."""
+        return (
+            sys.getsizeof(self._expirations)
+            + sys.getsizeof(self._heap)
+            + sum(sys.getsizeof(entry) + sys.getsizeof(entry[1]) for entry in self._heap)
+        )
+
+    def heap_size(self) -> int:
+        return len(self._heap)
+
+    def dump(self, now: float) -> typing.List[typing.List[typing.Any]]:
+        """Returns the running cooldowns as JSON-serializable `[command, scope, guild_id, scope_id, expiration]` rows."""
+        self.sweep(now)
+        return [[*key, expiration] for key, expiration in self._expirations.items()]
+
+    def load(self, rows: typing.Iterable[typing.Sequence[typing.Any]], now: float) -> None:
+        """Restores rows written by `dump`, skipping any that have since expired."""
+        for command, scope, guild_id, scope_id, expiration in rows:
+            if expiration > now:
+                self.hit((command, scope, guild_id, scope_id), now, expiration - now)
@@ -3,7 +3,8 @@
 import asyncio
 import re
 import random
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from typing import Iterable, List, Mapping, Tuple, Dict, Set, Literal, Union
 import typing
 from urllib.parse import quote_plus
@@ -12,7 +13,6 @@ from discord.ext.commands._types import CoroFunc
 from discord.ext.commands import DynamicCooldownMapping
 
 import discord
-import rapidfuzz
 
 from redbot.core import Config, commands
 from redbot.core.commands import Parameter
@@ -21,6 +21,9 @@ from redbot.core.utils import menus, AsyncIter
 from redbot.core.utils.chat_formatting import box, pagify, escape, humanize_list
 from redbot.core.utils.predicates import MessagePredicate
 
+from .cooldowns import CooldownStore
+from .search import SearchIndex
+
 _ = Translator("CustomCommands", __file__)
 
 def cooldown_for_non_permitted_users(ctx: commands.Context):
@@ -91,6 +94,73 @@ class ResponseTooLong(CCError):
 class InvalidPermissions(CCError):
     pass
 
+
+class CompiledResponse:
+    """A single response with its arguments and placeholders parsed ahead of time."""
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.params = ModCustomCommands.prepare_args(raw)
+        self.placeholders: List[str] = re.findall(r"{([^}]+)\}", raw)
+        self.arguments: List[Tuple[str, str, str]] = re.findall(r"{((\d+)[^.}]*(\.[^:}]+)?[^}]*)\}", raw)
+        self.low = min(int(argument[1]) for argument in self.arguments) if self.arguments else 0
+        self._command: typing.Optional[commands.Command] = None
+
+    def get_command(self, name: str, callback: CoroFunc) -> commands.Command:
+        """Returns the command wrapper used to parse this response's arguments, building it once."""
+        if self._command is None:
+            # wrap the command here so it won't register with the bot
+            fake_cc = commands.command(name=name)(callback)
+            fake_cc.params = self.params
+            fake_cc.requires.ready_event.set()
+            self._command = fake_cc
+        return self._command
+
+
+class CompiledCommand:
+    """A custom command ready to dispatch without touching Config."""
+
+    def __init__(self, name: str, ccinfo: dict):
+        self.name = name
+        self.cooldowns: Dict[str, int] = ccinfo.get("cooldowns", {})
+        self.allow_anywhere: bool = ccinfo.get("allow_anywhere", False)
+
+        responses = ccinfo["response"]
+        if isinstance(responses, str):
+            responses = [responses]
+        elif not isinstance(responses, list):
+            responses = []
+
+        self.responses = [CompiledResponse(response) for response in responses]
+
+
+class CommandTable:
+    """Every custom command in a guild, compiled, along with the guild's blocked channels."""
+
+    def __init__(self, guild_data: dict):
+        self.commands: Dict[str, CompiledCommand] = {}
+        self.blocked_channel_ids: Set[int] = set(guild_data.get("blocked_channel_ids") or [])
+
+        for name, ccinfo in guild_data.get("commands", {}).items():
+            if not ccinfo:
+                continue
+            try:
+                compiled = CompiledCommand(name, ccinfo)
+            except ArgParseError as e:
+                print(f"ModCustomCommands: Skipping command `{name}` with invalid arguments: {e}")
+                continue
+            if len(compiled.responses) > 0:
+                self.commands[name] = compiled
+
+    def may_invoke(self, content: str, prefixes: Iterable[str]) -> bool:
+        """Cheaply checks whether a message could be invoking one of these commands."""
+        for prefix in prefixes:
+            if content.startswith(prefix):
+                words = content[len(prefix):].split(maxsplit=1)
+                if len(words) > 0 and words[0] in self.commands:
+                    return True
+        return False
+
 ############################# DO NOT EDIT #############################
 
 class CommandObj:
@@ -98,6 +168,28 @@ class CommandObj:
         self.config = kwargs.get("config")
         self.bot = kwargs.get("bot")
         self.db = self.config.guild
+        self.tables: Dict[int, CommandTable] = {}
+        self.search_indexes: Dict[int, SearchIndex] = {}
+
+    async def get_table(self, guild: discord.Guild) -> CommandTable:
+        """Returns the guild's compiled commands, reading Config only on first use."""
+        if guild.id not in self.tables:
+            self.tables[guild.id] = CommandTable(await self.db(guild).all())
+        return self.tables[guild.id]
+
+    def invalidate(self, guild_id: int) -> None:
+        """Drops the guild's compiled commands.  Call after any command or blocked channel change."""
+        self.tables.pop(guild_id, None)
+
+    async def get_search_index(self, guild: discord.Guild) -> SearchIndex:
+        """Returns the guild's search index, building it on first use."""
+        if guild.id not in self.search_indexes:
+            self.search_indexes[guild.id] = SearchIndex(await self.get_commands(self.db(guild)))
+        return self.search_indexes[guild.id]
+
+    def _update_search_index(self, guild_id: int, command: str, ccinfo: typing.Optional[dict]) -> None:
+        if guild_id in self.search_indexes:
+            self.search_indexes[guild_id].update(command, ccinfo)
 
     @staticmethod
     async def get_commands(config) -> dict:
@@ -212,6 +304,8 @@ class CommandObj:
             "allow_anywhere": elevated_perms
         }
         await self.db(ctx.guild).commands.set_raw(command, value=ccinfo)
+        self.invalidate(ctx.guild.id)
+        self._update_search_index(ctx.guild.id, command, ccinfo)
 
     async def edit(
         self,
@@ -318,6 +412,8 @@ class CommandObj:
         ccinfo["edited_at"] = self.get_now()
 
         await self.db(ctx.guild).commands.set_raw(command, value=ccinfo)
+        self.invalidate(ctx.guild.id)
+        self._update_search_index(ctx.guild.id, command, ccinfo)
 
     async def delete(self, ctx: commands.Context, command: str):
         """Delete an already existing custom command"""
@@ -332,6 +428,8 @@ class CommandObj:
                 raise InvalidPermissions()
 
         await self.db(ctx.guild).commands.set_raw(command, value=None)
+        self.invalidate(ctx.guild.id)
+        self._update_search_index(ctx.guild.id, command, None)
 
 #######################################################################
 
@@ -352,8 +450,15 @@ class ModCustomCommands(commands.Cog):
         self.key = 414589031223512
         self.config = Config.get_conf(None, self.key, cog_name="CustomCommands")
         self.config.register_guild(commands={})
+        self.config.register_global(mcc_cooldowns=[])
         self.commandobj = CommandObj(config=self.config, bot=self.bot)
-        self.cooldowns = {}
+        self.cooldowns = CooldownStore()
+
+    async def cog_load(self) -> None:
+        self.cooldowns.load(await self.config.mcc_cooldowns(), time.time())
+
+    async def cog_unload(self) -> None:
+        await self.config.mcc_cooldowns.set(self.cooldowns.dump(time.time()))
 
     async def _list(self, ctx: commands.Context, cc_dict: dict):
         results = self.prepare_command_list(ctx, sorted(cc_dict.items(), key=lambda t: t[0]))
@@ -447,24 +552,14 @@ class ModCustomCommands(commands.Cog):
         """
         Searches through custom commands, according to the query.
 
-        Uses fuzzy searching to find close matches.
+        Uses fuzzy searching to find close matches in command names and responses.
 
         **Arguments:**
 
         - `<query>` The query to search for. Can be multiple words.
         """
-        cc_commands = await CommandObj.get_commands(self.config.guild(ctx.guild))
-        extracted = rapidfuzz.process.extract(
-            query, list(cc_commands.keys()), processor=rapidfuzz.utils.default_process
-        )
-        accepted = []
-        for key, score, __ in extracted:
-            if score > 60:
-                # Match was decently strong
-                accepted.append((key, cc_commands[key]))
-            else:
-                # Match wasn't strong enough
-                pass
+        index = await self.commandobj.get_search_index(ctx.guild)
+        accepted = [(key, index.entries[key]) for key, __ in index.search(query)]
         if len(accepted) == 0:
             return await ctx.send(_("No close matches were found."))
         results = self.prepare_command_list(ctx, accepted)
@@ -870,6 +965,17 @@ class ModCustomCommands(commands.Cog):
         except CommandNotEdited:
             pass
 
+    @modcustomcom.command(name="cooldownstats", hidden=True)
+    @commands.is_owner()
+    async def mcc_cooldown_stats(self, ctx: commands.Context):
+        """Show how many custom command cooldowns are being tracked."""
+        self.cooldowns.sweep(time.time())
+        await ctx.send(
+            f"Running Cooldowns: `{len(self.cooldowns)}`\n"
+            f"Heap Entries: `{self.cooldowns.heap_size()}`\n"
+            f"Approximate Memory: `{self.cooldowns.memory_usage() / 1024:.1f} KiB`"
+        )
+
     @modcustomcom.group(name="default")
     @commands.mod_or_permissions(moderate_members=True)
     async def mcc_default(self, ctx: commands.Context):
@@ -894,6 +1000,7 @@ class ModCustomCommands(commands.Cog):
                 return await ctx.send(_("Custom commands can be used anywhere."))
             channels = [c for c in ctx.guild.channels if c.id in blocked_channel_ids]
         await self.config.guild(ctx.guild).blocked_channel_ids.set([c.id for c in channels])
+        self.commandobj.invalidate(ctx.guild.id)
         await ctx.send(_("Custom commands cannot be used in {channels}.").format(channels=humanize_list([f"{c.mention}" for c in channels])))
 
 ############################# DO NOT EDIT #############################
@@ -915,23 +1022,26 @@ class ModCustomCommands(commands.Cog):
         if await self.bot.cog_disabled_in_guild(self, message.guild):
             return
 
+        table = await self.commandobj.get_table(message.guild)
+
+        # Skip building a context for messages that can't be one of this guild's commands.
+        if not table.may_invoke(message.content, await self.bot.get_valid_prefixes(message.guild)):
+            return
+
         ctx = await self.bot.get_context(message)
 
         if ctx.prefix is None:
             return
 
         try:
-            raw_response, cooldowns = await self.commandobj.get(
-                message=message, command=ctx.invoked_with
-            )
-            if isinstance(raw_response, list):
-                raw_response = random.choice(raw_response)
-            elif isinstance(raw_response, str):
-                pass
-            else:
+            compiled = table.commands.get(ctx.invoked_with)
+            if compiled is None:
                 raise NotFound()
-            if cooldowns:
-                self.test_cooldowns(ctx, ctx.invoked_with, cooldowns)
+            if not compiled.allow_anywhere and message.channel.id in table.blocked_channel_ids:
+                raise InvalidPermissions()
+            response = random.choice(compiled.responses)
+            if compiled.cooldowns:
+                self.test_cooldowns(ctx, ctx.invoked_with, compiled.cooldowns)
         except InvalidPermissions:
             await ctx.send(_("Custom commands cannot be used in this channel."), delete_after=5)
             await message.delete(delay=5)
@@ -939,15 +1049,11 @@ class ModCustomCommands(commands.Cog):
         except CCError:
             return
 
-        # wrap the command here so it won't register with the bot
-        fake_cc = commands.command(name=ctx.invoked_with)(self.cc_callback)
-        fake_cc.params = self.prepare_args(raw_response)
-        fake_cc.requires.ready_event.set()
-        ctx.command = fake_cc
+        ctx.command = response.get_command(ctx.invoked_with, self.cc_callback)
 
         await self.bot.invoke(ctx)
         if not ctx.command_failed:
-            await self.cc_command(*ctx.args, **ctx.kwargs, raw_response=raw_response)
+            await self.cc_command(*ctx.args, **ctx.kwargs, response=response)
 
     async def cc_callback(self, *args, **kwargs) -> None:
         """
@@ -958,19 +1064,16 @@ class ModCustomCommands(commands.Cog):
         # fake command to take advantage of discord.py's parsing and events
         pass
 
-    async def cc_command(self, ctx, *cc_args, raw_response, **cc_kwargs) -> None:
+    async def cc_command(self, ctx, *cc_args, response: CompiledResponse, **cc_kwargs) -> None:
         cc_args = (*cc_args, *cc_kwargs.values())
-        results = re.findall(r"{([^}]+)\}", raw_response)
-        for result in results:
+        raw_response = response.raw
+        for result in response.placeholders:
             param = self.transform_parameter(result, ctx.message)
             raw_response = raw_response.replace("{" + result + "}", param)
-        results = re.findall(r"{((\d+)[^.}]*(\.[^:}]+)?[^}]*)\}", raw_response)
-        if results:
-            low = min(int(result[1]) for result in results)
-            for result in results:
-                index = int(result[1]) - low
-                arg = self.transform_arg(result[0], result[2], cc_args[index])
-                raw_response = raw_response.replace("{" + result[0] + "}", arg)
+        for result in response.arguments:
+            index = int(result[1]) - response.low
+            arg = self.transform_arg(result[0], result[2], cc_args[index])
+            raw_response = raw_response.replace("{" + result[0] + "}", arg)
         await ctx.send(raw_response)
 
     @staticmethod
@@ -1048,25 +1151,24 @@ class ModCustomCommands(commands.Cog):
         return dict((p.name, p) for p in fin)
 
     def test_cooldowns(self, ctx, command, cooldowns):
-        now = datetime.utcnow()
-        new_cooldowns = {}
+        now = time.time()
+        self.cooldowns.sweep(now)
+        new_cooldowns = []
         for per, rate in cooldowns.items():
             if per == "guild":
-                key = (command, ctx.guild)
+                key = (command, per, ctx.guild.id, ctx.guild.id)
             elif per == "channel":
-                key = (command, ctx.guild, ctx.channel)
+                key = (command, per, ctx.guild.id, ctx.channel.id)
             elif per == "member":
-                key = (command, ctx.guild, ctx.author)
+                key = (command, per, ctx.guild.id, ctx.author.id)
             else:
                 raise ValueError(per)
-            cooldown = self.cooldowns.get(key)
-            if cooldown:
-                cooldown += timedelta(seconds=rate)
-                if cooldown > now:
-                    raise OnCooldown()
-            new_cooldowns[key] = now
+            if self.cooldowns.is_cooling(key, now):
+                raise OnCooldown()
+            new_cooldowns.append((key, rate))
         # only update cooldowns if the command isn't on cooldown
-        self.cooldowns.update(new_cooldowns)
+        for key, rate in new_cooldowns:
+            self.cooldowns.hit(key, now, rate)
 
     @classmethod
     def transform_arg(cls, result, attr, obj) -> str:
@@ -0,0 +1,117 @@
+import typing
+
+import rapidfuzz
+
+# Queries are only compared against the responses sharing the most trigrams with them.  Every
+# command name is always scored.
+MAX_CANDIDATES = 200
+
+
+def _trigrams(text: str) -> typing.Set[str]:
+    trigrams: typing.Set[str] = set()
+    for token in text.split():
+        padded = f" {token} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def _response_text(ccinfo: dict) -> str:
+    responses = ccinfo.get("response")
+    if isinstance(responses, list):
+        return " ".join(responses)
+    elif isinstance(responses, str):
+        return responses
+    return ""
+
+
+class SearchIndex:
+    """A guild's custom commands, with their responses indexed by trigram."""
+
+    def __init__(self, cc_commands: typing.Dict[str, dict]):
+        self.entries: typing.Dict[str, dict] = {}
+        self.names: typing.Dict[str, str] = {}
+        self.texts: typing.Dict[str, str] = {}
+        self.postings: typing.Dict[str, typing.Set[str]] = {}
+
+        for command, ccinfo in cc_commands.items():
+            self.update(command, ccinfo)
+
+    def update(self, command: str, ccinfo: typing.Optional[dict]) -> None:
+        """Adds, replaces or (if `ccinfo` is empty) removes a command."""
+        self.remove(command)
+
+        if not ccinfo:
+            return
+
+        self.entries[command] = ccinfo
+        self.names[command] = rapidfuzz.utils.default_process(command)
+        self.texts[command] = rapidfuzz.utils.default_process(_response_text(ccinfo))
+
+        for trigram in _trigrams(self.texts[command]):
+            self.postings.setdefault(trigram, set()).add(command)
+
+    def remove(self, command: str) -> None:
+        if command not in self.entries:
+            return
+
+        for trigram in _trigrams(self.texts[command]):
+            postings = self.postings.get(trigram)
+            if postings is not None:
+                postings.discard(command)
+                if len(postings) == 0:
+                    del self.postings[trigram]
+
+        del self.entries[command]
+        del self.names[command]
+        del self.texts[command]
+
+    def _candidates(self, query: str) -> typing.List[str]:
+        counts: typing.Dict[str, int] = {}
+        for trigram in _trigrams(query):
+            for command in self.postings.get(trigram, ()):
+                counts[command] = counts.get(command, 0) + 1
+
+        return sorted(counts, key=lambda command: counts[command], reverse=True)[:MAX_CANDIDATES]
+
+    def search(
+        self, query: str, *, limit: int = 5, score_cutoff: float = 60
+    ) -> typing.List[typing.Tuple[str, float]]:
+        """Fuzzy matches the query against command names and response text.
+
+        Name matches rank ahead of matches found only in response text.
+
+        Returns:
+            typing.List[typing.Tuple[str, float]]: Up to `limit` command names with their best score.
+        """
+        query = rapidfuzz.utils.default_process(query)
+
+        name_scores: typing.Dict[str, float] = {
+            command: score
+            for _, score, command in rapidfuzz.process.extract(
+                query,
+                self.names,
+                scorer=rapidfuzz.fuzz.WRatio,
+                processor=None,
+                score_cutoff=score_cutoff,
+                limit=limit,
+            )
+        }
+
+        text_scores: typing.Dict[str, float] = {}
+        candidates = [command for command in self._candidates(query) if command not in name_scores]
+
+        if len(name_scores) < limit and len(candidates) > 0:
+            for _, score, command in rapidfuzz.process.extract(
+                query,
+                {command: self.texts[command] for command in candidates},
+                scorer=rapidfuzz.fuzz.partial_token_set_ratio,
+                processor=None,
+                score_cutoff=score_cutoff,
+                limit=limit - len(name_scores),
+            ):
+                text_scores[command] = score
+
+        return [
+            *sorted(name_scores.items(), key=lambda item: item[1], reverse=True),
+            *sorted(text_scores.items(), key=lambda item: item[1], reverse=True),
+        ][:limit]
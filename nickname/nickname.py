@@ -1,5 +1,5 @@
+import asyncio
 from datetime import datetime, timedelta
-from functools import partial
 import json
 import random
 from types import MethodType
@@ -15,7 +15,6 @@ from redbot.core import config
 from redbot.core.bot import Red
 from redbot.core.config import Config
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore[import-untyped]
 from apscheduler.job import Job # type: ignore[import-untyped]
 
 from dogscogs.constants import COG_IDENTIFIER, TIMEZONE
@@ -29,8 +28,9 @@ from dogscogs.views.confirmation import ConfirmationView
 from battler.battler import Battler, BattleMessageComponents
 from battler.config import KeyType as BattlerKeyType
 from coins import Coins
+from jobscheduler import JobDeferred, SchedulerService, get_scheduler
 
-scheduler = AsyncIOScheduler(timezone="US/Eastern")
+JOB_NAMESPACE = "Nickname"
 
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
 
@@ -213,9 +213,12 @@ def bind_member(group: config.Group):
                 raise commands.BadArgument("ID was not found.")
             entry = found[0]
 
-        job = scheduler.get_job(str(entry["id"]))
-        if job is not None:
-            scheduler.remove_job(str(entry["id"]))
+        await Nickname.SCHEDULER.cancel_where(
+            JOB_NAMESPACE,
+            lambda record: record["payload"].get("member_id") == entry["target_id"]  # type: ignore[index]
+            and record["payload"].get("type") == entry["type"]  # type: ignore[index]
+            and record["payload"].get("entry_id") == entry["id"],  # type: ignore[index]
+        )
 
     async def remove(
         self,
@@ -361,6 +364,7 @@ class Nickname(commands.Cog):
     """
     Prevents reassigning nicknames of users until command is disabled.
     """
+    SCHEDULER : SchedulerService = None
 
     def __init__(self, bot: Red) -> None:
         self.bot = bot
@@ -374,9 +378,75 @@ class Nickname(commands.Cog):
 
         self.config.register_guild(**DEFAULT_GUILD)
 
-        scheduler.start()
+        self.seed_task : typing.Optional[asyncio.Task] = None
+
+        Nickname.SCHEDULER = get_scheduler(self.bot)
+        Nickname.SCHEDULER.register(JOB_NAMESPACE, {"undo_curse": self._undo_curse_job})
         pass
 
+    async def _schedule_undo_curse(
+        self,
+        member: discord.Member,
+        *,
+        type: CurseType,
+        entry_id: int,
+        expiration: datetime,
+        channel: typing.Optional[discord.abc.Messageable] = None,
+        instigator: typing.Optional[discord.Member] = None,
+    ) -> None:
+        """Journals a job that lifts the member's curse once it expires."""
+        await Nickname.SCHEDULER.schedule(
+            JOB_NAMESPACE,
+            f"{type.capitalize()}:{member.id}:{member.guild.id}",
+            handler="undo_curse",
+            run_at=expiration,
+            name=f"{type.capitalize()}:{member.id}:{entry_id}",
+            payload={
+                "guild_id": member.guild.id,
+                "member_id": member.id,
+                "type": type,
+                "entry_id": entry_id,
+                "channel_id": getattr(channel, "id", None),
+                "instigator_id": instigator.id if instigator is not None else None,
+            },
+        )
+
+    async def _undo_curse_job(
+        self,
+        *,
+        guild_id: int,
+        member_id: int,
+        type: CurseType,
+        entry_id: typing.Optional[int] = None,
+        channel_id: typing.Optional[int] = None,
+        instigator_id: typing.Optional[int] = None,
+    ) -> None:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None or guild.unavailable:
+            raise JobDeferred()
+
+        member = guild.get_member(member_id)
+        if member is None:
+            return
+
+        await self._unset(member, type=type)
+
+        if channel_id is None or member.id == self.bot.user.id: # type: ignore[union-attr]
+            return
+
+        channel = guild.get_channel(channel_id)
+        instigator = guild.get_member(instigator_id) if instigator_id is not None else None
+
+        if channel is None or instigator is None:
+            return
+
+        try:
+            await channel.send(f"{instigator.display_name}'s ({instigator.name}) Curse on {member.display_name} ({member.name}) has ended.", silent=True) # type: ignore[union-attr]
+        except discord.errors.HTTPException as _:
+            print(
+                f"Attempted to send a message and failed to DM (could be bot?):\n{entry_id}"
+            )
+
     async def _get_member_ids_by_entry(
         self,
         guild: discord.Guild,
@@ -512,19 +582,6 @@ class Nickname(commands.Cog):
             expiration=expiration,
         )
 
-        async def undo_curse(v: discord.Member):
-            await self._unset(v, type=type)
-            try:
-                if v.id != self.bot.user.id:
-                    await ctx.channel.send(f"{instigator.display_name}'s ({instigator.name}) Curse on {v.display_name} ({v.name}) has ended.", silent=True)
-                    # await v.send(f"{v.guild.get_member(entry['instigator_id']).display_name}'s Curse on you has ended.", silent=True)
-                pass
-            except discord.errors.HTTPException as _:
-                print(
-                    f"Attempted to send a message and failed to DM (could be bot?):\n{entry}"
-                )
-                pass
-
         for victim in cursed_users:
             entry = CreateNickQueueEntry(
                 name=name_func(victim),
@@ -537,13 +594,13 @@ class Nickname(commands.Cog):
             try:
                 await self._set(victim, entry=entry)
 
-                scheduler.add_job(
-                    partial(undo_curse, v=victim),
-                    name=f"Nickname:{type.capitalize()}:{victim.id}:{entry['id']}",
-                    id=f"Nickname:{type.capitalize()}:{victim.id}",
-                    trigger="date",
-                    next_run_time=expiration,
-                    replace_existing=True,
+                await self._schedule_undo_curse(
+                    victim,
+                    type=type,
+                    entry_id=entry["id"],
+                    expiration=expiration,
+                    channel=ctx.channel,
+                    instigator=instigator,
                 )
 
             except (PermissionError, Forbidden) as _:
@@ -599,7 +656,7 @@ class Nickname(commands.Cog):
     @commands.is_owner()
     @commands.guild_only()
     async def get_jobs(self, ctx: commands.GuildContext):
-        jobs : typing.List[Job] = scheduler.get_jobs()
+        jobs : typing.List[Job] = Nickname.SCHEDULER.get_jobs(JOB_NAMESPACE)
     
         if not jobs:
             await ctx.reply("No jobs are scheduled.")
@@ -1373,15 +1430,13 @@ class Nickname(commands.Cog):
                     unset = True
                     continue
                 else:
-                    scheduler.add_job(
-                        partial(undo_curse, type=curse["type"]),
-                        id=f"Nickname:{curse['type'].capitalize()}:{member.id}",
-                        name=f"Nickname:{curse['type'].capitalize()}:{member.id}:{curse['id']}",
-                        trigger="date",
-                        next_run_time=datetime.fromtimestamp(
+                    await self._schedule_undo_curse(
+                        member,
+                        type=curse["type"],
+                        entry_id=curse["id"],
+                        expiration=datetime.fromtimestamp(
                             curse["expiration"], tz=TIMEZONE
                         ),
-                        replace_existing=True,
                     )
                     pass
 
@@ -1404,14 +1459,46 @@ class Nickname(commands.Cog):
         return adjusted_members
 
     async def cog_load(self):
+        await Nickname.SCHEDULER.restore(JOB_NAMESPACE)
+        self.seed_task = asyncio.create_task(self._seed_jobs())
+
+    async def _seed_jobs(self):
+        if await Nickname.SCHEDULER.is_seeded(JOB_NAMESPACE):
+            return
+
+        # Guilds aren't cached until the bot is ready.
+        await self.bot.wait_until_red_ready()
+
+        # First run with the shared scheduler: journal every existing curse once.
+        is_complete = True
+
         for guild in self.bot.guilds:
-            members = await self._check_guild(guild)
+            if guild.unavailable:
+                is_complete = False
+                continue
+
+            try:
+                members = await self._check_guild(guild)
+            except Exception as e:
+                print(f"Failed to journal curses in {guild.name}: {e}")
+                is_complete = False
+                continue
+
             if len(members) > 0:
                 await self.bot.send_to_owners(
                     f"Nickname Cog: {len(members)} members had their curses removed after restart:"
                     + f"{','.join([f'{m.mention} ({m.id})' for m in members])}"
                 )
 
+        # Left unmarked so the next load scans whichever guilds were missed.
+        if is_complete:
+            await Nickname.SCHEDULER.mark_seeded(JOB_NAMESPACE)
+
+    async def cog_unload(self):
+        if self.seed_task is not None:
+            self.seed_task.cancel()
+        Nickname.SCHEDULER.unregister(JOB_NAMESPACE)
+
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
         """Checks for member nickname changes and locks them if so.
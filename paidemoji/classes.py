@@ -1,6 +1,8 @@
 from enum import Enum
 import typing
 
+PurchaseType = typing.Literal["EMOJI", "STICKER"]
+
 PaidEmojiType = typing.Union[typing.Literal['image'], typing.Literal['animated']]
 
 class PaidEmojiConfig(typing.TypedDict):
@@ -0,0 +1,176 @@
+import asyncio
+import collections
+from io import BytesIO
+import time
+import typing
+
+import aiohttp
+from PIL import Image, ImageSequence
+
+from paidemoji.classes import PurchaseType
+
+# Discord's upload limits.
+MAX_BYTES: typing.Dict[PurchaseType, int] = {
+    "EMOJI": 256 * 1024,
+    "STICKER": 512 * 1024,
+}
+MAX_DIMENSIONS: typing.Dict[PurchaseType, int] = {
+    "EMOJI": 128,
+    "STICKER": 320,
+}
+
+# Source images larger than this aren't downloaded at all.
+MAX_DOWNLOAD_BYTES = 8 * 1024 * 1024
+FETCH_TIMEOUT_SECS = 15
+CHUNK_SIZE = 64 * 1024
+
+# The smallest side an image is shrunk to while trying to fit the byte limit.
+MIN_DIMENSIONS = 32
+
+MAGIC_NUMBERS: typing.List[typing.Tuple[bytes, str]] = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+]
+
+
+class IngestedImage(typing.NamedTuple):
+    data: bytes
+    content_type: str
+    source_bytes: int
+    fetch_secs: float
+    process_secs: float
+
+
+INGESTION_HISTORY: typing.Deque[IngestedImage] = collections.deque(maxlen=50)
+
+
+def sniff_content_type(data: bytes) -> typing.Optional[str]:
+    """Identifies an image by its leading bytes rather than trusting the host's headers."""
+    for magic, content_type in MAGIC_NUMBERS:
+        if data.startswith(magic):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+async def fetch_image(session: aiohttp.ClientSession, url: str) -> bytes:
+    """Streams an image, giving up once it passes `MAX_DOWNLOAD_BYTES` or `FETCH_TIMEOUT_SECS`."""
+    try:
+        async with session.get(
+            url, timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECS)
+        ) as response:
+            if response.status != 200:
+                raise ValueError("Failed to fetch image.")
+
+            if response.content_length is not None and response.content_length > MAX_DOWNLOAD_BYTES:
+                raise ValueError(f"Image is larger than {MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB.")
+
+            buffer = bytearray()
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                buffer.extend(chunk)
+                if len(buffer) > MAX_DOWNLOAD_BYTES:
+                    raise ValueError(f"Image is larger than {MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB.")
+
+            return bytes(buffer)
+    except asyncio.TimeoutError:
+        raise ValueError("Timed out fetching image.")
+    except aiohttp.ClientError:
+        raise ValueError("Failed to fetch image.")
+
+
+def _encode(image: Image.Image, size: int, animated: bool) -> bytes:
+    output = BytesIO()
+
+    if animated:
+        frames = []
+        durations = []
+        for frame in ImageSequence.Iterator(image):
+            resized = frame.convert("RGBA")
+            resized.thumbnail((size, size))
+            frames.append(resized)
+            durations.append(frame.info.get("duration", 100))
+
+        frames[0].save(
+            output,
+            format="GIF",
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=image.info.get("loop", 0),
+            disposal=2,
+            optimize=True,
+        )
+    else:
+        resized = image.convert("RGBA")
+        resized.thumbnail((size, size))
+        resized.save(output, format="PNG", optimize=True)
+
+    return output.getvalue()
+
+
+def fit_image(data: bytes, content_type: str, type: PurchaseType) -> typing.Tuple[bytes, str]:
+    """Shrinks and re-encodes an image until it fits Discord's limits for the purchase type.
+
+    Static images become PNG and animated ones GIF.  Blocking; run in an executor.
+    """
+    max_bytes = MAX_BYTES[type]
+    max_dimensions = MAX_DIMENSIONS[type]
+
+    # Stickers must be PNG/APNG/GIF; emoji accept anything Discord can read.
+    allowed_types = ("image/png", "image/gif") if type == "STICKER" else ("image/png", "image/gif", "image/jpeg", "image/webp")
+
+    with Image.open(BytesIO(data)) as image:
+        # Emoji are only resized when they're too large to upload; stickers must also fit 320x320.
+        if (
+            len(data) <= max_bytes
+            and content_type in allowed_types
+            and (type == "EMOJI" or max(image.size) <= max_dimensions)
+        ):
+            return data, content_type
+
+        animated = getattr(image, "is_animated", False)
+        size = min(max_dimensions, max(image.size))
+
+        while size >= MIN_DIMENSIONS:
+            encoded = _encode(image, size, animated)
+            if len(encoded) <= max_bytes:
+                return encoded, "image/gif" if animated else "image/png"
+            size = int(size * 0.75)
+
+    raise ValueError(f"Image could not be shrunk below {max_bytes // 1024} kb.")
+
+
+async def ingest_image(session: aiohttp.ClientSession, url: str, type: PurchaseType) -> IngestedImage:
+    """Downloads an image and prepares it for upload as an emoji or sticker.
+
+    Raises:
+        ValueError: If the image can't be fetched, isn't an image, or can't be made to fit.
+    """
+    start = time.perf_counter()
+    data = await fetch_image(session, url)
+    fetched = time.perf_counter()
+
+    content_type = sniff_content_type(data)
+    if content_type is None:
+        raise ValueError("Link is not a PNG, GIF, JPEG or WEBP image.")
+
+    try:
+        fitted, content_type = await asyncio.get_running_loop().run_in_executor(
+            None, fit_image, data, content_type, type
+        )
+    except (OSError, Image.DecompressionBombError):
+        raise ValueError("Image could not be read.")
+
+    result = IngestedImage(
+        data=fitted,
+        content_type=content_type,
+        source_bytes=len(data),
+        fetch_secs=fetched - start,
+        process_secs=time.perf_counter() - fetched,
+    )
+    INGESTION_HISTORY.append(result)
+
+    return result
@@ -7,11 +7,14 @@ import discord
 from redbot.core import commands
 from redbot.core.bot import Red
 from redbot.core.config import Config
-import requests  # type: ignore[import-untyped]
+from discord.ext import tasks
+import aiohttp
 
 from coins.coins import Coins
-from paidemoji.classes import EmojiConfigurationPrompt, PaidEmojiConfig, StickerConfigurationPrompt, PaidStickerConfig
+from paidemoji.classes import EmojiConfigurationPrompt, PaidEmojiConfig, StickerConfigurationPrompt, PaidStickerConfig, PurchaseType
 from paidemoji.embeds import PaidEmojiEmbed, PaidStickerEmbed
+from paidemoji.ingest import INGESTION_HISTORY, ingest_image
+from paidemoji.usage import UsageBuffer
 from paidemoji.views import EmojiConfigurationModal, StickerConfigurationModal
 
 from dogscogs.constants import COG_IDENTIFIER
@@ -20,7 +23,8 @@ from dogscogs.views.confirmation import ConfirmationView
 from dogscogs.parsers.emoji import parse_emoji_ids
 
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
-PurchaseType = Literal["EMOJI", "STICKER"]
+
+USAGE_FLUSH_INTERVAL_SECS = 60 * 5 # 5 minutes
 
 DEFAULT_GUILD = {
     "emojis": [],
@@ -46,6 +50,17 @@ class PaidEmoji(commands.Cog):
 
         self.config.register_guild(**DEFAULT_GUILD)
 
+        self.session = aiohttp.ClientSession()
+        self.usage = UsageBuffer()
+
+    async def cog_load(self) -> None:
+        self.flush_usage.start()
+
+    async def cog_unload(self) -> None:
+        self.flush_usage.cancel()
+        await self._flush_usage()
+        await self.session.close()
+
     async def __add_emoji(
         self,
         *,
@@ -75,10 +90,7 @@ class PaidEmoji(commands.Cog):
         if name in [emoji.name for emoji in paid_emojis]:
             raise ValueError(f"Emoji with the name `{name}` already exists.")
 
-        fetch_image = requests.get(image_url)
-
-        if fetch_image.status_code != 200:
-            raise ValueError("Failed to fetch image.")
+        image = await ingest_image(self.session, image_url, "EMOJI")
 
         if price is None:
             price = await self.config.guild(guild).emoji_cost()
@@ -86,7 +98,7 @@ class PaidEmoji(commands.Cog):
         try:
             emoji = await guild.create_custom_emoji(
                 name=name,
-                image=fetch_image.content,
+                image=image.data,
                 reason=f"Paid Emoji by {author.name} for {price} {await Coins._get_currency_name(guild)}",
             )
         except discord.Forbidden:
@@ -104,9 +116,17 @@ class PaidEmoji(commands.Cog):
             used_count=0,
         )
 
-        emoji_configs.append(dict(emoji_config))  # type: ignore[arg-type]
-
-        await self.config.guild(guild).emojis.set(emoji_configs)
+        value = self.config.guild(guild).emojis
+        async with value.get_lock():
+            # Re-read so usage flushed while the emoji was being created isn't overwritten.
+            emoji_configs = [
+                config
+                for config in await value()
+                if guild.get_emoji(config["id"]) is not None
+            ]
+            emoji_configs.append(dict(emoji_config))  # type: ignore[arg-type]
+            await value.set(emoji_configs)
+        self.usage.invalidate(guild.id)
 
         return emoji, emoji_config
 
@@ -133,10 +153,13 @@ class PaidEmoji(commands.Cog):
         except discord.HTTPException:
             raise ValueError("Failed to delete emoji.")
 
-        emoji_configs = [
-            config for config in emoji_configs if config["id"] != emoji_config["id"]
-        ]
-        await self.config.guild(guild).emojis.set(emoji_configs)
+        value = self.config.guild(guild).emojis
+        async with value.get_lock():
+            emoji_configs = [
+                config for config in await value() if config["id"] != emoji_config["id"]
+            ]
+            await value.set(emoji_configs)
+        self.usage.invalidate(guild.id)
         pass
 
     async def __add_sticker(self,
@@ -169,10 +192,7 @@ class PaidEmoji(commands.Cog):
         if name in [sticker.name for sticker in paid_stickers]:
             raise ValueError(f"Sticker with the name `{name}` already exists.")
 
-        fetch_image = requests.get(image_url)
-
-        if fetch_image.status_code != 200:
-            raise ValueError("Failed to fetch image.")
+        image = await ingest_image(self.session, image_url, "STICKER")
 
         if price is None:
             price = await self.config.guild(guild).sticker_cost()
@@ -182,7 +202,7 @@ class PaidEmoji(commands.Cog):
                 name=name,
                 description=description,
                 emoji=emoji,
-                file=discord.File(BytesIO(fetch_image.content)),
+                file=discord.File(BytesIO(image.data), filename="sticker.gif" if image.content_type == "image/gif" else "sticker.png"),
                 reason=f"Paid Sticker by {author.name} for {price} {await Coins._get_currency_name(guild)}",
             )
         except discord.Forbidden:
@@ -199,9 +219,17 @@ class PaidEmoji(commands.Cog):
             used_count=0,
         )
 
-        sticker_configs.append(dict(sticker_config))  # type: ignore[arg-type]
-
-        await self.config.guild(guild).stickers.set(sticker_configs)
+        value = self.config.guild(guild).stickers
+        async with value.get_lock():
+            # Re-read so usage flushed while the sticker was being created isn't overwritten.
+            sticker_configs = [
+                config
+                for config in await value()
+                if discord.utils.get(guild.stickers, id=int(config["id"])) is not None
+            ]
+            sticker_configs.append(dict(sticker_config))  # type: ignore[arg-type]
+            await value.set(sticker_configs)
+        self.usage.invalidate(guild.id)
 
         return sticker, sticker_config
 
@@ -226,10 +254,13 @@ class PaidEmoji(commands.Cog):
         except discord.HTTPException:
             raise ValueError("Failed to delete sticker.")
 
-        sticker_configs = [
-            config for config in sticker_configs if config["id"] != sticker_config["id"]
-        ]
-        await self.config.guild(guild).stickers.set(sticker_configs)
+        value = self.config.guild(guild).stickers
+        async with value.get_lock():
+            sticker_configs = [
+                config for config in await value() if config["id"] != sticker_config["id"]
+            ]
+            await value.set(sticker_configs)
+        self.usage.invalidate(guild.id)
         pass
 
     async def __buy(self, ctx: commands.GuildContext, member: discord.Member, cost: int, type: PurchaseType):
@@ -399,6 +430,8 @@ class PaidEmoji(commands.Cog):
             await ctx.reply(str(e))
 
     async def __list(self, ctx: commands.GuildContext, type: PurchaseType):
+        await self._flush_usage()
+
         if type == "EMOJI":
             configs = await self.config.guild(ctx.guild).emojis()
             found = [
@@ -421,10 +454,15 @@ class PaidEmoji(commands.Cog):
         ]
 
         if len(found) != len(configs):
-            if type == "EMOJI":
-                await self.config.guild(ctx.guild).emojis.set(updated_configs)
-            elif type == "STICKER":
-                await self.config.guild(ctx.guild).stickers.set(updated_configs)
+            value = self.config.guild(ctx.guild).emojis if type == "EMOJI" else self.config.guild(ctx.guild).stickers
+            async with value.get_lock():
+                updated_configs = [
+                    c
+                    for c in await value()
+                    if c["id"] in [f.id for f in found]
+                ]
+                await value.set(updated_configs)
+            self.usage.invalidate(ctx.guild.id)
 
         async def get_page(index: int) -> typing.Tuple[discord.Embed, int]:
             if type == "EMOJI":
@@ -542,6 +580,26 @@ class PaidEmoji(commands.Cog):
         """Remove a paid emoji."""
         await self.__remove(ctx, emoji, "EMOJI")
 
+    @paidemoji.command(name="ingeststats", hidden=True)
+    @commands.is_owner()
+    async def emoji_ingest_stats(self, ctx: commands.GuildContext):
+        """Show how long recent emoji and sticker images took to download and process."""
+        if len(INGESTION_HISTORY) == 0:
+            await ctx.send("No images have been ingested yet.")
+            return
+
+        count = len(INGESTION_HISTORY)
+        fetch_ms = sum(image.fetch_secs for image in INGESTION_HISTORY) / count * 1000
+        process_ms = sum(image.process_secs for image in INGESTION_HISTORY) / count * 1000
+        reencoded = len([image for image in INGESTION_HISTORY if len(image.data) != image.source_bytes])
+
+        await ctx.send(
+            f"Recent Images: `{count}`\n"
+            f"Re-encoded: `{reencoded}`\n"
+            f"Average Fetch: `{fetch_ms:.1f}ms`\n"
+            f"Average Processing: `{process_ms:.1f}ms`"
+        )
+
     @paidemoji.command(name="cost")
     @commands.has_guild_permissions(manage_roles=True)
     async def emoji_cost(self, ctx: commands.GuildContext, cost: typing.Optional[int]):
@@ -591,6 +649,45 @@ class PaidEmoji(commands.Cog):
         )
         pass
 
+    async def _load_paid_ids(self, guild: discord.Guild) -> None:
+        if self.usage.is_loaded(guild.id):
+            return
+
+        guild_config = self.config.guild(guild)
+        self.usage.load(
+            guild.id,
+            [emoji["id"] for emoji in await guild_config.emojis()],
+            [sticker["id"] for sticker in await guild_config.stickers()],
+        )
+
+    async def _flush_usage(self) -> None:
+        """Writes buffered usage counts to each guild's emoji and sticker configs."""
+        for guild_id, kinds in self.usage.drain().items():
+            for kind, counts in kinds.items():
+                value = self.config.guild_from_id(guild_id).get_attr(kind)
+
+                try:
+                    async with value.get_lock():
+                        configs: typing.List[typing.Union[PaidEmojiConfig, PaidStickerConfig]] = await value()
+
+                        for config in configs:
+                            usage = counts.get(config["id"])
+                            if usage is not None:
+                                config["used_count"] += usage["used_count"]
+                                config["last_used_at"] = max(config["last_used_at"], usage["last_used_at"])
+
+                        await value.set(configs)
+                except Exception:
+                    self.usage.restore(guild_id, kind, counts)
+                    raise
+
+    @tasks.loop(seconds=USAGE_FLUSH_INTERVAL_SECS)
+    async def flush_usage(self):
+        try:
+            await self._flush_usage()
+        except Exception as e:
+            print(f"PaidEmoji: Failed to flush usage counts: {e}")
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         if message.author.bot:
@@ -599,68 +696,28 @@ class PaidEmoji(commands.Cog):
         if not message.guild:
             return
 
-        emoji_configs: typing.List[PaidEmojiConfig] = await self.config.guild(
-            message.guild
-        ).emojis()
-        changed = False
-
-        found_emoji_ids = parse_emoji_ids(message.content)
-
-        for i in range(len(emoji_configs)):
-            emoji_config = emoji_configs[i]
-
-            if emoji_config["id"] in found_emoji_ids:
-                emoji_configs[i]["used_count"] += 1
-                emoji_configs[i]["last_used_at"] = datetime.datetime.now().timestamp()
-                changed = True
-
-        if changed:
-            await self.config.guild(message.guild).emojis.set(emoji_configs)
-
-        sticker_configs: typing.List[PaidStickerConfig] = await self.config.guild(
-            message.guild
-        ).stickers()
-        changed = False
+        await self._load_paid_ids(message.guild)
 
-        found_sticker_ids = [sticker.id for sticker in message.stickers]
-
-        for i in range(len(sticker_configs)):
-            sticker_config = sticker_configs[i]
-
-            if sticker_config["id"] in found_sticker_ids:
-                sticker_configs[i]["used_count"] += 1
-                sticker_configs[i]["last_used_at"] = datetime.datetime.now().timestamp()
-                changed = True
-
-        if changed:
-            await self.config.guild(message.guild).stickers.set(sticker_configs)
-
-        pass
+        now = datetime.datetime.now().timestamp()
+        self.usage.record(message.guild.id, "emojis", parse_emoji_ids(message.content), now)
+        self.usage.record(message.guild.id, "stickers", [sticker.id for sticker in message.stickers], now)
 
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction: discord.Reaction, user: discord.User):
         if user.bot:
             return
 
-        if not reaction.is_custom_emoji():
+        if not reaction.is_custom_emoji() or reaction.message.guild is None:
             return
 
-        emoji_configs: typing.List[PaidEmojiConfig] = await self.config.guild(
-            reaction.message.guild
-        ).emojis()
-        changed = False
-
-        for i in range(len(emoji_configs)):
-            emoji_config = emoji_configs[i]
-
-            if reaction.emoji.id == emoji_config["id"]:  # type: ignore[union-attr]
-                emoji_configs[i]["used_count"] += 1
-                emoji_configs[i]["last_used_at"] = datetime.datetime.now().timestamp()
-                changed = True
+        await self._load_paid_ids(reaction.message.guild)
 
-        if changed:
-            await self.config.guild(reaction.message.guild).emojis.set(emoji_configs)
-        pass
+        self.usage.record(
+            reaction.message.guild.id,
+            "emojis",
+            [reaction.emoji.id],  # type: ignore[union-attr]
+            datetime.datetime.now().timestamp(),
+        )
 
     @commands.Cog.listener()
     async def on_guild_emojis_update(
@@ -669,19 +726,20 @@ class PaidEmoji(commands.Cog):
         before: typing.List[discord.Emoji],
         after: typing.List[discord.Emoji],
     ):
-        emoji_configs: typing.List[PaidEmojiConfig] = await self.config.guild(
-            guild
-        ).emojis()
-        changed = False
+        value = self.config.guild(guild).emojis
+        async with value.get_lock():
+            emoji_configs: typing.List[PaidEmojiConfig] = await value()
+            changed = False
 
-        emoji_configs = [
-            ec for ec in emoji_configs if ec["id"] in [e.id for e in after]
-        ]
-        found_after = {
-            ec["id"]: [e for e in after if e.id == ec["id"]][0] for ec in emoji_configs
-        }
+            emoji_configs = [
+                ec for ec in emoji_configs if ec["id"] in [e.id for e in after]
+            ]
+            found_after = {
+                ec["id"]: [e for e in after if e.id == ec["id"]][0] for ec in emoji_configs
+            }
 
-        await self.config.guild(guild).emojis.set(emoji_configs)
+            await value.set(emoji_configs)
+        self.usage.invalidate(guild.id)
         pass
 
     @commands.Cog.listener()
@@ -691,17 +749,18 @@ class PaidEmoji(commands.Cog):
         before: typing.List[discord.GuildSticker],
         after: typing.List[discord.GuildSticker],
     ):
-        sticker_configs: typing.List[PaidStickerConfig] = await self.config.guild(
-            guild
-        ).stickers()
-        changed = False
+        value = self.config.guild(guild).stickers
+        async with value.get_lock():
+            sticker_configs: typing.List[PaidStickerConfig] = await value()
+            changed = False
 
-        sticker_configs = [
-            sc for sc in sticker_configs if sc["id"] in [s.id for s in after]
-        ]
-        found_after = {
-            sc["id"]: [s for s in after if s.id == sc["id"]][0] for sc in sticker_configs
-        }
+            sticker_configs = [
+                sc for sc in sticker_configs if sc["id"] in [s.id for s in after]
+            ]
+            found_after = {
+                sc["id"]: [s for s in after if s.id == sc["id"]][0] for sc in sticker_configs
+            }
 
-        await self.config.guild(guild).stickers.set(sticker_configs)
+            await value.set(sticker_configs)
+        self.usage.invalidate(guild.id)
         pass
\ No newline at end of file
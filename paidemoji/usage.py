@@ -0,0 +1,69 @@
+import typing
+
+# Matches the guild config keys the counts are flushed to.
+UsageKind = typing.Literal["emojis", "stickers"]
+
+
+class UsageCount(typing.TypedDict):
+    used_count: int
+    last_used_at: float
+
+
+class UsageBuffer:
+    """Counts paid emoji and sticker usage in memory until it is flushed to Config."""
+
+    def __init__(self) -> None:
+        self.paid_ids: typing.Dict[int, typing.Dict[UsageKind, typing.Set[int]]] = {}
+        self.pending: typing.Dict[int, typing.Dict[UsageKind, typing.Dict[int, UsageCount]]] = {}
+
+    def is_loaded(self, guild_id: int) -> bool:
+        return guild_id in self.paid_ids
+
+    def load(self, guild_id: int, emoji_ids: typing.Iterable[int], sticker_ids: typing.Iterable[int]) -> None:
+        """Caches which emoji and sticker IDs in the guild are paid for."""
+        self.paid_ids[guild_id] = {
+            "emojis": set(emoji_ids),
+            "stickers": set(sticker_ids),
+        }
+
+    def invalidate(self, guild_id: int) -> None:
+        """Drops the guild's cached paid IDs.  Call after the guild's emoji or sticker configs change."""
+        self.paid_ids.pop(guild_id, None)
+
+    def record(self, guild_id: int, kind: UsageKind, ids: typing.Iterable[int], now: float) -> int:
+        """Counts one use of every paid ID in `ids`.
+
+        Returns:
+            int: The number of paid IDs counted.
+        """
+        paid_ids = self.paid_ids.get(guild_id, {}).get(kind, set())
+        counted = 0
+
+        for id in set(ids):
+            if id not in paid_ids:
+                continue
+
+            counts = self.pending.setdefault(guild_id, {}).setdefault(kind, {})
+            usage = counts.setdefault(id, {"used_count": 0, "last_used_at": now})
+            usage["used_count"] += 1
+            usage["last_used_at"] = now
+            counted += 1
+
+        return counted
+
+    def drain(self) -> typing.Dict[int, typing.Dict[UsageKind, typing.Dict[int, UsageCount]]]:
+        """Returns and clears every pending count."""
+        pending, self.pending = self.pending, {}
+        return pending
+
+    def restore(self, guild_id: int, kind: UsageKind, counts: typing.Dict[int, UsageCount]) -> None:
+        """Puts drained counts back, merging them with anything recorded since, so a failed flush loses nothing."""
+        pending = self.pending.setdefault(guild_id, {}).setdefault(kind, {})
+
+        for id, usage in counts.items():
+            current = pending.get(id)
+            if current is None:
+                pending[id] = usage
+            else:
+                current["used_count"] += usage["used_count"]
+                current["last_used_at"] = max(current["last_used_at"], usage["last_used_at"])
@@ -1,4 +1,3 @@
-import asyncio
 from typing import Literal
 import typing
 
@@ -10,8 +9,12 @@ from redbot.core.config import Config
 from dogscogs.constants import COG_IDENTIFIER
 from dogscogs.views.confirmation import ConfirmationView
 
+from bulkroles import get_executor
+
 from .config import GuildConfig
 
+BULK_NAMESPACE = "RoleBlocker"
+
 REGISTERED_ROLE_TOKEN = "$REGISTERED_ROLES$"
 REGISTERED_ROLE_COUNT_TOKEN = "$REGISTERED_ROLE_COUNT$"
 ASSIGNED_ROLE_TOKEN = "$ASSIGNED_ROLE$"
@@ -56,39 +59,46 @@ class RoleBlocker(commands.Cog):
 
         return members
 
-    async def __convert(self, ctx: commands.GuildContext, members: typing.Optional[typing.Sequence[discord.Member]] = None) -> int:
+    async def __convert(self, ctx: commands.GuildContext, members: typing.Optional[typing.Sequence[discord.Member]] = None, message: typing.Optional[discord.Message] = None) -> int:
         registered_role_count = await self.config.guild(ctx.guild).registered_role_count()
         assigned_role_id = await self.config.guild(ctx.guild).assigned_role_id()
         assigned_role = ctx.guild.get_role(assigned_role_id)
         registered_role_ids = await self.config.guild(ctx.guild).registered_role_ids()
 
-        count = 0
-
         if members is None:
             members = ctx.guild.members
 
+        edits : typing.List[typing.Tuple[int, typing.List[int], typing.List[int]]] = []
+
         for member in members:
             found_roles = [role for role in member.roles if role.id in registered_role_ids]
             if len(found_roles) >= registered_role_count:
-                if assigned_role is not None and assigned_role.id not in [role.id for role in member.roles]:
-                    try:
-                        await member.add_roles(assigned_role, reason="Roleblocker assigned role.")
-                    except discord.Forbidden:
-                        await self.bot.send_to_owners(f"Roleblocker: I do not have permission to add role `{assigned_role_id}` to {member.mention} in {ctx.guild.name}.")
+                roles_to_be_added : typing.List[int] = []
+                roles_to_be_removed : typing.List[int] = []
 
-                    count += 1
+                if assigned_role is not None and assigned_role.id not in [role.id for role in member.roles]:
+                    roles_to_be_added.append(assigned_role.id)
 
                 if len(found_roles) > registered_role_count:
                     found_roles.sort(key=lambda role: role.created_at)
-                    roles_to_be_removed = found_roles[registered_role_count:]
-                    try:
-                        await member.remove_roles(*roles_to_be_removed, reason="Removing extra registered roles.")
-                    except discord.Forbidden:
-                        await self.bot.send_to_owners(f"Roleblocker: I do not have permission to remove roles from {member.mention} in {ctx.guild.name}.")
+                    roles_to_be_removed = [role.id for role in found_roles[registered_role_count:]]
+
+                if len(roles_to_be_added) > 0 or len(roles_to_be_removed) > 0:
+                    edits.append((member.id, roles_to_be_added, roles_to_be_removed))
+
+        result = await get_executor(self.bot).run(
+            BULK_NAMESPACE,
+            ctx.guild,
+            edits,
+            description="Converting users...",
+            reason="Roleblocker assigned role and removed extra registered roles.",
+            message=message,
+        )
 
-                await asyncio.sleep(1)
+        if result.failed > 0:
+            await self.bot.send_to_owners(f"Roleblocker: I could not update roles for {result.failed} members in {ctx.guild.name}.")
 
-        return count
+        return result.changed
 
     @commands.group()
     @commands.has_guild_permissions(manage_roles=True)
@@ -102,7 +112,6 @@ class RoleBlocker(commands.Cog):
     @commands.guild_only()
     async def role_convert(self, ctx: commands.GuildContext, from_role: discord.Role, to_role: discord.Role, filter_roles: commands.Greedy[discord.Role]):
         """Convert all users with a role to another role."""
-        count = 0
         view = ConfirmationView(
             author=ctx.author,
         )
@@ -121,24 +130,25 @@ class RoleBlocker(commands.Cog):
             await confirmation_message.delete()
             return 
         
-        await confirmation_message.edit(content=f"Converting users from {from_role.mention} to {to_role.mention}...\n{f'(Only users with {filter_roles_string})' if len(filter_roles) > 0 else ''}", view=None)
+        description = f"Converting users from {from_role.mention} to {to_role.mention}...\n{f'(Only users with {filter_roles_string})' if len(filter_roles) > 0 else ''}"
+        await confirmation_message.edit(content=description, view=None)
+
+        members = [
+            member for member in from_role.members
+            if all(role in member.roles for role in filter_roles)
+        ]
+
+        result = await get_executor(self.bot).run(
+            BULK_NAMESPACE,
+            ctx.guild,
+            [(member.id, [to_role.id], [from_role.id]) for member in members],
+            description=description,
+            reason="Role conversion.",
+            message=confirmation_message,
+        )
 
-        for member in ctx.guild.members:
-            if from_role in member.roles:
-                if len(filter_roles) > 0:
-                    if not all(role in member.roles for role in filter_roles):
-                        continue
-                count += 1
-                try:
-                    await member.remove_roles(from_role, reason="Role conversion.")
-                    if to_role not in member.roles:
-                        await member.add_roles(to_role, reason="Role conversion.")
-                except discord.Forbidden:
-                    await self.bot.send_to_owners(f"Roleblocker: I do not have permission to convert roles for {member.mention} in {ctx.guild.name}.")
-
-                await asyncio.sleep(1)
-
-        await confirmation_message.edit(content=f"Converted {count} users from {from_role.mention} to {to_role.mention}.")
+        if result.failed > 0:
+            await self.bot.send_to_owners(f"Roleblocker: I could not convert roles for {result.failed} members in {ctx.guild.name}.")
         pass
 
     @roleblocker.command()
@@ -224,7 +234,7 @@ class RoleBlocker(commands.Cog):
 
         if not await view.wait() and view.value:
             await confirmation_message.edit(content="Converting users...", view=None)
-            count = await self.__convert(ctx, members=found_members)
+            count = await self.__convert(ctx, members=found_members, message=confirmation_message)
             await ctx.send(f"{count} users have been converted.")
 
         await confirmation_message.delete()
@@ -0,0 +1,166 @@
+import time
+import typing
+
+import numpy as np
+
+RGB = typing.Tuple[int, int, int]
+
+# sRGB (D65) to CIE XYZ.
+_RGB_TO_XYZ = np.array(
+    [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ]
+)
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+_EPSILON = (6 / 29) ** 3
+
+
+def rgb_to_lab(rgb: typing.Union[np.ndarray, typing.Sequence[RGB]]) -> np.ndarray:
+    """Converts a batch of 0-255 RGB colors to CIE Lab.
+
+    Args:
+        rgb (typing.Union[np.ndarray, typing.Sequence[RGB]]): An `(N, 3)` array of RGB colors.
+
+    Returns:
+        np.ndarray: An `(N, 3)` array of `(L, a, b)` values.
+    """
+    srgb = np.asarray(rgb, dtype=np.float64).reshape(-1, 3) / 255.0
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+
+    xyz = (linear @ _RGB_TO_XYZ.T) / _D65_WHITE
+    f = np.where(xyz > _EPSILON, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+
+    return np.stack(
+        [
+            116 * f[:, 1] - 16,
+            500 * (f[:, 0] - f[:, 1]),
+            200 * (f[:, 1] - f[:, 2]),
+        ],
+        axis=1,
+    )
+
+
+def _squared_distances(source: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Returns the `(len(source), len(target))` matrix of squared Lab distances."""
+    return ((source[:, np.newaxis, :] - target[np.newaxis, :, :]) ** 2).sum(axis=2)
+
+
+def generate_palette(
+    n: int,
+    Lmin: float = 5,
+    Lmax: float = 95,
+    steps: int = 32,
+    seed: typing.Optional[int] = None,
+) -> typing.List[RGB]:
+    """Picks `n` colors that are as far apart from each other as possible in Lab space.
+
+    Candidates are an evenly spaced RGB grid, filtered by lightness.  Colors are chosen by
+    farthest-point sampling: each pick is the candidate farthest from everything picked so far.
+
+    Args:
+        n (int): The number of colors.
+        Lmin (float, optional): The minimum lightness. Defaults to 5.
+        Lmax (float, optional): The maximum lightness. Defaults to 95.
+        steps (int, optional): Grid points per RGB channel. Defaults to 32.
+        seed (typing.Optional[int], optional): Seed for the first pick. Defaults to random.
+
+    Returns:
+        typing.List[RGB]: The chosen colors.
+    """
+    axis = np.linspace(0, 255, steps).round().astype(np.int64)
+    candidates = np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), axis=-1).reshape(-1, 3)
+
+    lab = rgb_to_lab(candidates)
+    in_range = (lab[:, 0] >= Lmin) & (lab[:, 0] <= Lmax)
+    candidates, lab = candidates[in_range], lab[in_range]
+
+    if n > len(candidates):
+        raise ValueError(f"Only {len(candidates)} candidate colors are available for {n} colors.")
+
+    chosen = [int(np.random.default_rng(seed).integers(len(candidates)))]
+    min_distances = _squared_distances(lab, lab[chosen])[:, 0]
+
+    for _ in range(n - 1):
+        index = int(np.argmax(min_distances))
+        chosen.append(index)
+        min_distances = np.minimum(min_distances, _squared_distances(lab, lab[[index]])[:, 0])
+
+    return [(int(r), int(g), int(b)) for r, g, b in candidates[chosen]]
+
+
+def nearest_indices(
+    source: typing.Sequence[RGB], target: typing.Sequence[RGB]
+) -> typing.List[int]:
+    """Finds the closest target color, by Lab distance, for every source color.
+
+    Returns:
+        typing.List[int]: For each source color, the index of its nearest target color.
+    """
+    if len(source) == 0:
+        return []
+
+    if len(target) == 0:
+        raise ValueError("No target colors to choose from.")
+
+    return np.argmin(_squared_distances(rgb_to_lab(source), rgb_to_lab(target)), axis=1).tolist()
+
+
+def plan_reassignment(
+    previous: typing.Sequence[typing.Tuple[RGB, typing.Sequence[int]]],
+    colors: typing.Sequence[RGB],
+) -> typing.Dict[int, int]:
+    """Maps every member of the old color roles to the closest new color.
+
+    Args:
+        previous (typing.Sequence[typing.Tuple[RGB, typing.Sequence[int]]]): Each old role's color and member IDs.
+        colors (typing.Sequence[RGB]): The new colors.
+
+    Returns:
+        typing.Dict[int, int]: Member IDs mapped to the index of their new color.
+    """
+    closest = nearest_indices([color for color, _ in previous], colors)
+
+    plan: typing.Dict[int, int] = {}
+    for (_, member_ids), index in zip(previous, closest):
+        for member_id in member_ids:
+            plan[member_id] = index
+
+    return plan
+
+
+def benchmark(n: int = 256, repeat: int = 5) -> None:
+    """Times palette generation and nearest-color assignment for `n` colors.
+
+    Run with `python rolecolors/palette.py [n]`.
+    """
+    def timed(func: typing.Callable[[], typing.Any]) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    palette = generate_palette(n, seed=0)
+    previous = generate_palette(n, seed=1)
+
+    def python_nearest() -> typing.List[int]:
+        source, target = rgb_to_lab(previous).tolist(), rgb_to_lab(palette).tolist()
+        return [
+            min(range(len(target)), key=lambda i: sum((s - t) ** 2 for s, t in zip(color, target[i])))
+            for color in source
+        ]
+
+    assert python_nearest() == nearest_indices(previous, palette)
+
+    print(f"generate_palette({n}):           {timed(lambda: generate_palette(n, seed=0)):8.2f} ms")
+    print(f"nearest_indices({n}x{n}):        {timed(lambda: nearest_indices(previous, palette)):8.2f} ms")
+    print(f"pure Python nearest ({n}x{n}):   {timed(python_nearest):8.2f} ms")
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
@@ -1,11 +1,9 @@
 import asyncio
 from datetime import datetime, timedelta
-from functools import partial
 import re
 from typing import Literal
 import typing
 
-# import numpy as np
 import d20 # type: ignore[import-untyped]
 
 import discord
@@ -13,11 +11,9 @@ from redbot.core import commands
 from redbot.core.bot import Red
 from redbot.core.config import Config
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler # type: ignore[import-untyped]
-from apscheduler.jobstores.base import JobLookupError # type: ignore[import-untyped]
 
 from dogscogs.constants import COG_IDENTIFIER, TIMEZONE
-from dogscogs.constants.colors import color_diff, hex_to_rgb, get_palette
+from dogscogs.constants.colors import hex_to_rgb
 from dogscogs.constants.discord.embed import MAX_DESCRIPTION_LENGTH as DISCORD_EMBED_MAX_DESCRIPTION_LENGTH
 from dogscogs.parsers.date import parse_duration_string, duration_string
 from dogscogs.views.confirmation import ConfirmationView
@@ -25,8 +21,14 @@ from dogscogs.core.converter import DogCogConverter
 
 from coins import Coins
 from battler import Battler
+from jobscheduler import JobDeferred, SchedulerService, get_scheduler
 
-scheduler = AsyncIOScheduler(timezone="US/Eastern")
+from .palette import generate_palette, nearest_indices, plan_reassignment
+
+JOB_NAMESPACE = "RoleColors"
+
+# How many members are moved to their new color role at once.
+REASSIGN_CONCURRENCY = 5
 
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
 
@@ -37,6 +39,8 @@ DEFAULT_GUILD = {
     "color_change_duration_secs": 60 * 60 * 24,  # 1 day
     "curse_succesive_increase": 1.0,
     "curse_succesive_max": 5,
+    "cursed_members": {},
+    "is_cursed_index_built": False,
 }
 
 DEFAULT_MEMBER = {
@@ -78,33 +82,19 @@ class ColorRoleConverter(DogCogConverter):
         ):
             try:
                 color : discord.Color = getattr(discord.Colour, argument.lower())()
-                role = min(
-                    color_roles,
-                    key=lambda r: color_diff(
-                        (color.r, color.g, color.b), hex_to_rgb(f"{r.colour.value:06x}")
-                    )
-                )
+                rgb = (color.r, color.g, color.b)
             except:
                 raise commands.BadArgument(f"Invalid hex color format: `{argument}`.  Please use `#rrggbb`.")
         else:
-            role = min(
-                color_roles,
-                key=lambda r: color_diff(
-                    hex_to_rgb(argument), hex_to_rgb(f"{r.colour.value:06x}")
-                ),
-            )
+            rgb = hex_to_rgb(argument)
 
-        if role is None:
-            raise commands.BadArgument("No color role found.  Please ask your moderator to add more color roles.")
-        elif role.id not in color_role_ids:
-            raise commands.BadArgument(f"String is not a color role: {argument}.")
-        
-        return role
+        return color_roles[nearest_indices([rgb], [r.colour.to_rgb() for r in color_roles])[0]]
 
 class RoleColors(commands.Cog):
     """
     Assigns color roles for a specific user.
     """
+    SCHEDULER : SchedulerService = None
 
     def __init__(self, bot: Red) -> None:
         self.bot = bot
@@ -117,7 +107,53 @@ class RoleColors(commands.Cog):
         self.config.register_guild(**DEFAULT_GUILD)
         self.config.register_member(**DEFAULT_MEMBER)
 
-        scheduler.start()
+        self.seed_task : typing.Optional[asyncio.Task] = None
+
+        RoleColors.SCHEDULER = get_scheduler(self.bot)
+        RoleColors.SCHEDULER.register(JOB_NAMESPACE, {"uncurse": self._uncurse_job})
+
+    async def _schedule_uncurse(
+        self,
+        member: discord.Member,
+        expiration: datetime,
+        channel: typing.Optional[discord.abc.Messageable] = None,
+    ) -> None:
+        """Journals a job that lifts the member's color curse once it expires."""
+        await RoleColors.SCHEDULER.schedule(
+            JOB_NAMESPACE,
+            f"ColorCurse:{member.id}:{member.guild.id}",
+            handler="uncurse",
+            run_at=expiration,
+            payload={
+                "guild_id": member.guild.id,
+                "member_id": member.id,
+                "channel_id": getattr(channel, "id", None),
+            },
+        )
+
+    async def _uncurse_job(
+        self,
+        *,
+        guild_id: int,
+        member_id: int,
+        channel_id: typing.Optional[int] = None,
+    ) -> None:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None or guild.unavailable:
+            raise JobDeferred()
+
+        member = guild.get_member(member_id)
+        if member is None or await self.config.member(member).cursed_until() is None:
+            return
+
+        await self._uncurse_member(member)
+
+        if channel_id is None:
+            return
+
+        channel = guild.get_channel(channel_id)
+        if channel is not None:
+            await channel.send(f"{member.mention} has been uncursed.") # type: ignore[union-attr]
 
     async def _set(
         self,
@@ -199,13 +235,8 @@ class RoleColors(commands.Cog):
 
         await self.config.guild_from_id(ctx.guild.id).role_ids.set([])
 
-        colors = [
-            (int(rgb[0]), int(rgb[1]), int(rgb[2]))
-            for rgb in get_palette(n=amount, Lmin=5, Lmax=95, maxLoops=100000)
-        ]
-        # colors = [(int(rgb[0]*255), int(rgb[1]*255), int(rgb[2]*255)) for rgb in rgb_list]
-        # colors = [(int(rgb[0]*255), int(rgb[1]*255), int(rgb[2]*255))
-        #           for rgb in rgbs(amount)]
+        # Optimizing the palette takes long enough to stall the event loop.
+        colors = await asyncio.to_thread(generate_palette, n=amount, Lmin=5, Lmax=95)
 
         for rgb in colors:
             name = "Color:#{0:02x}{1:02x}{2:02x}".format(rgb[0], rgb[1], rgb[2])
@@ -218,18 +249,25 @@ class RoleColors(commands.Cog):
                 )
             )
 
-        for role_config in previous_role_configs:
+        plan = plan_reassignment(
+            [(role_config["color"], role_config["members"]) for role_config in previous_role_configs],
+            colors,
+        )
 
-            def color_diff_current(r: discord.Role):
-                return color_diff(
-                    role_config["color"], hex_to_rgb(f"{r.colour.value:06x}")
-                )
+        semaphore = asyncio.Semaphore(REASSIGN_CONCURRENCY)
 
-            closest_role: discord.Role = min(new_roles, key=color_diff_current)
-            for member_id in role_config["members"]:
-                member = guild.get_member(member_id)
-                if member is not None:
-                    await member.add_roles(closest_role)
+        async def reassign(member: discord.Member, role: discord.Role):
+            async with semaphore:
+                try:
+                    await member.add_roles(role)
+                except discord.HTTPException as e:
+                    print(f"RoleColors: Failed to reassign {member.id} to {role.id}: {e}")
+
+        await asyncio.gather(*[
+            reassign(member, new_roles[index])
+            for member_id, index in plan.items()
+            if (member := guild.get_member(member_id)) is not None
+        ])
 
         await self.config.guild_from_id(ctx.guild.id).role_ids.set(
             [role.id for role in new_roles]
@@ -348,7 +386,39 @@ class RoleColors(commands.Cog):
         except PermissionError:
             pass
 
-        await self.config.member(member).cursed_until.set(None)
+        await self._set_cursed_until(member, None)
+
+    async def _set_cursed_until(self, member: discord.Member, cursed_until: typing.Optional[float]):
+        """Sets a member's curse expiration and keeps the guild's curse index in step."""
+        await self.config.member(member).cursed_until.set(cursed_until)
+
+        guild_config = self.config.guild(member.guild)
+        async with guild_config.cursed_members.get_lock():
+            if cursed_until is None:
+                await guild_config.clear_raw("cursed_members", str(member.id))
+            else:
+                await guild_config.set_raw("cursed_members", str(member.id), value=cursed_until)
+
+    async def _get_cursed_members(self, guild: discord.Guild) -> typing.Dict[int, float]:
+        """Returns the IDs of cursed members mapped to their curse expiration.
+
+        Guilds cursed before the index existed are indexed from member data once.
+        """
+        guild_config = self.config.guild(guild)
+
+        async with guild_config.cursed_members.get_lock():
+            if not await guild_config.is_cursed_index_built():
+                member_configs = await self.config.all_members(guild)
+                await guild_config.cursed_members.set({
+                    str(member_id): value['cursed_until']
+                    for member_id, value in member_configs.items()
+                    if value['cursed_until'] is not None
+                })
+                await guild_config.is_cursed_index_built.set(True)
+
+            cursed_members : typing.Dict[str, float] = await guild_config.cursed_members()
+
+        return {int(member_id): cursed_until for member_id, cursed_until in cursed_members.items()}
 
     async def _update_member(self, member: discord.Member) -> bool:
         """Checks to see if a member should be uncursed, and readds the curse to the scheduler if it's still persistant."""
@@ -359,17 +429,9 @@ class RoleColors(commands.Cog):
                 await self._uncurse_member(member)
                 return True
             else:
-                if not scheduler.running:
-                    scheduler.start()
-
-                scheduler.add_job(
-                    partial(self._update_member, member),
-                    id=f"ColorCurse:{member.id}",
-                    trigger="date",
-                    next_run_time=datetime.fromtimestamp(
-                        cursed_until, tz=TIMEZONE
-                    ),
-                    replace_existing=True,
+                await self._schedule_uncurse(
+                    member,
+                    datetime.fromtimestamp(cursed_until, tz=TIMEZONE),
                 )
 
         return False
@@ -377,23 +439,54 @@ class RoleColors(commands.Cog):
     async def _check_guild(self, guild: discord.Guild) -> typing.List[discord.Member]:
         fixed_members = []
 
-        for member in guild.members:
-            cursed_until = await self.config.member(member).cursed_until()
-            if cursed_until is not None:
-                if await self._update_member(member):
-                    fixed_members.append(member)
+        for member_id in await self._get_cursed_members(guild):
+            member = guild.get_member(member_id)
+            if member is not None and await self._update_member(member):
+                fixed_members.append(member)
 
         return fixed_members
 
     async def cog_load(self):
+        await RoleColors.SCHEDULER.restore(JOB_NAMESPACE)
+        self.seed_task = asyncio.create_task(self._seed_jobs())
+
+    async def _seed_jobs(self):
+        if await RoleColors.SCHEDULER.is_seeded(JOB_NAMESPACE):
+            return
+
+        # Guilds aren't cached until the bot is ready.
+        await self.bot.wait_until_red_ready()
+
+        # First run with the shared scheduler: journal every existing curse once.
+        is_complete = True
+
         for guild in self.bot.guilds:
-            members = await self._check_guild(guild)
+            if guild.unavailable:
+                is_complete = False
+                continue
+
+            try:
+                members = await self._check_guild(guild)
+            except Exception as e:
+                print(f"Failed to journal curses in {guild.name}: {e}")
+                is_complete = False
+                continue
+
             if len(members) > 0:
                 await self.bot.send_to_owners(
                     f"Rolecolors Cog: {len(members)} members had their curses removed in {guild.name} after restart:\n" +
                     "\n".join([f"{member.mention} ({member.id})" for member in members])
                 )
 
+        # Left unmarked so the next load scans whichever guilds were missed.
+        if is_complete:
+            await RoleColors.SCHEDULER.mark_seeded(JOB_NAMESPACE)
+
+    async def cog_unload(self):
+        if self.seed_task is not None:
+            self.seed_task.cancel()
+        RoleColors.SCHEDULER.unregister(JOB_NAMESPACE)
+
     async def _calculate_cost(self, member: discord.Member) -> int:
         """Calculates the cost of a curse for a member. Resets every end of week (Sunday).
         """
@@ -535,27 +628,14 @@ class RoleColors(commands.Cog):
             set_role = await self._set(ctx, cursed_user, role)
 
             if set_role is not None:
-                await self.config.member(cursed_user).cursed_until.set(expiration.timestamp())
-
-                if not scheduler.running:
-                    scheduler.start()
-
-                async def curse_end():
-                    await self._uncurse_member(cursed_user)
-                    await ctx.channel.send(f"{cursed_user.mention} has been uncursed.")
+                await self._set_cursed_until(cursed_user, expiration.timestamp())
 
                 successive = await self.config.member(ctx.author).successive()
                 successive['Painted']["count"] += 1
                 successive['Painted']["last_timestamp"] = datetime.now(tz=TIMEZONE).timestamp()
                 await self.config.member(ctx.author).successive.set(successive)
 
-                scheduler.add_job(
-                    curse_end,
-                    id=f"ColorCurse:{cursed_user.id}",
-                    trigger="date",
-                    next_run_time=expiration,
-                    replace_existing=True,
-                )
+                await self._schedule_uncurse(cursed_user, expiration, ctx.channel)
 
         try:
             await Battler._send_battler_dm(ctx.author, content=f"You spent `{color_change_cost} {await Coins._get_currency_name(ctx.guild)} to try to curse {target.display_name}`\nNew Balance: `{new_balance}`", silent=True)
@@ -586,6 +666,7 @@ class RoleColors(commands.Cog):
             return
 
         await self._uncurse_member(member)
+        await RoleColors.SCHEDULER.cancel(JOB_NAMESPACE, f"ColorCurse:{member.id}:{member.guild.id}")
 
         await ctx.channel.send(f"{member.mention} has been uncursed.")
 
@@ -593,12 +674,12 @@ class RoleColors(commands.Cog):
     @commands.has_guild_permissions(manage_roles=True)
     async def list(self, ctx: commands.GuildContext):
         """Lists all users who are affected by a curse."""
-        member_configs = await self.config.all_members(ctx.guild)
-        afflicted_member_ids = [key for key, value in member_configs.items() if value['cursed_until'] is not None]
+        cursed_members = await self._get_cursed_members(ctx.guild)
+        afflicted_member_ids = list(cursed_members.keys())
         role_color_ids = await self.config.guild_from_id(ctx.guild.id).role_ids()
         role_colors = [role for role in ctx.guild.roles if role.id in role_color_ids]
         
-        afflicted_member_ids.sort(key=lambda x: member_configs[x]['cursed_until'])
+        afflicted_member_ids.sort(key=lambda x: cursed_members[x])
         
         afflicted_members = [x for x in [ctx.guild.get_member(id) for id in afflicted_member_ids] if x is not None]
 
@@ -619,7 +700,7 @@ class RoleColors(commands.Cog):
 
                 role = found_roles[0]
 
-                time_field = f"<t:{int(datetime.fromtimestamp(member_configs[member.id]['cursed_until'], tz=TIMEZONE).timestamp())}:F>"
+                time_field = f"<t:{int(datetime.fromtimestamp(cursed_members[member.id], tz=TIMEZONE).timestamp())}:F>"
 
                 string = f"{member.mention} ({member.name}) was cursed to {role.mention} until: {time_field}\n"
 
@@ -1,4 +1,3 @@
-import asyncio
 from typing import Literal
 
 import discord
@@ -9,9 +8,13 @@ from redbot.core.config import Config
 from dogscogs.constants import COG_IDENTIFIER
 from dogscogs.views.confirmation import ConfirmationView
 
+from bulkroles import get_executor
+
 
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
 
+BULK_NAMESPACE = "RoleTools"
+
 
 class RoleTools(commands.Cog):
     """
@@ -83,21 +86,20 @@ class RoleTools(commands.Cog):
             await confirmation_message.delete()
             return
         
-        await confirmation_message.edit(content=f"Adding {new_role.mention} to users...\n{f'(Only users with {filter_roles_string})' if len(filter_roles) > 0 else ''}", view=None)
-
-        count = 0
-
-        for member in members:
-            try:
-                if new_role not in member.roles:
-                    await member.add_roles(new_role, reason="Role addition.")
-                count += 1
-            except discord.Forbidden:
-                await self.bot.send_to_owners(f"RoleTools: I do not have permission to add roles for {member.mention} in {ctx.guild.name}.")
-
-            await asyncio.sleep(1)
+        description = f"Adding {new_role.mention} to users...\n{f'(Only users with {filter_roles_string})' if len(filter_roles) > 0 else ''}"
+        await confirmation_message.edit(content=description, view=None)
+
+        result = await get_executor(self.bot).run(
+            BULK_NAMESPACE,
+            ctx.guild,
+            [(member.id, [new_role.id], []) for member in members],
+            description=description,
+            reason="Role addition.",
+            message=confirmation_message,
+        )
 
-        await confirmation_message.edit(content=f"Added {new_role.mention} to {count} users.")
+        if result.failed > 0:
+            await self.bot.send_to_owners(f"RoleTools: I could not add {new_role.name} to {result.failed} members in {ctx.guild.name}.")
 
     @roletools.command()
     @commands.has_guild_permissions(manage_roles=True)
@@ -136,21 +138,20 @@ class RoleTools(commands.Cog):
             await confirmation_message.delete()
             return
         
-        await confirmation_message.edit(content=f"Removing {remove_role.mention} from users...\n{f'(Only users with {filter_roles_string})' if len(filter_roles) > 0 else ''}", view=None)
-
-        count = 0
-
-        for member in members:
-            try:
-                if remove_role in member.roles:
-                    await member.remove_roles(remove_role, reason="Role removal.")
-                count += 1
-            except discord.Forbidden:
-                await self.bot.send_to_owners(f"RoleTools: I do not have permission to remove roles for {member.mention} in {ctx.guild.name}.")
-
-            await asyncio.sleep(1)
+        description = f"Removing {remove_role.mention} from users...\n{f'(Only users with {filter_roles_string})' if len(filter_roles) > 0 else ''}"
+        await confirmation_message.edit(content=description, view=None)
+
+        result = await get_executor(self.bot).run(
+            BULK_NAMESPACE,
+            ctx.guild,
+            [(member.id, [], [remove_role.id]) for member in members],
+            description=description,
+            reason="Role removal.",
+            message=confirmation_message,
+        )
 
-        await confirmation_message.edit(content=f"Removed {remove_role.mention} from {count} users.")
+        if result.failed > 0:
+            await self.bot.send_to_owners(f"RoleTools: I could not remove {remove_role.name} from {result.failed} members in {ctx.guild.name}.")
 
 
     @roletools.command()
@@ -181,20 +182,18 @@ class RoleTools(commands.Cog):
             await confirmation_message.delete()
             return 
         
-        await confirmation_message.edit(content=f"Converting users from {from_role.mention} to {to_role.mention}...\n{f'(Only users with {filter_roles_string})' if len(filter_roles) > 0 else ''}", view=None)
-
-        count = 0
-
-        for member in members:
-            try:
-                await member.remove_roles(from_role, reason="Role conversion.")
-                if to_role not in member.roles:
-                    await member.add_roles(to_role, reason="Role conversion.")
-                count += 1
-            except discord.Forbidden:
-                await self.bot.send_to_owners(f"RoleTools: I do not have permission to convert roles for {member.mention} in {ctx.guild.name}.")
-
-            await asyncio.sleep(1)
+        description = f"Converting users from {from_role.mention} to {to_role.mention}...\n{f'(Only users with {filter_roles_string})' if len(filter_roles) > 0 else ''}"
+        await confirmation_message.edit(content=description, view=None)
+
+        result = await get_executor(self.bot).run(
+            BULK_NAMESPACE,
+            ctx.guild,
+            [(member.id, [to_role.id], [from_role.id]) for member in members],
+            description=description,
+            reason="Role conversion.",
+            message=confirmation_message,
+        )
 
-        await confirmation_message.edit(content=f"Converted {count} users from {from_role.mention} to {to_role.mention}.")
+        if result.failed > 0:
+            await self.bot.send_to_owners(f"RoleTools: I could not convert roles for {result.failed} members in {ctx.guild.name}.")
         pass
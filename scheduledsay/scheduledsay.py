@@ -8,18 +8,21 @@ from redbot.core.bot import Red
 from redbot.core.config import Config
 
 from apscheduler.job import Job # type: ignore[import-untyped]
-from apscheduler.schedulers.asyncio import AsyncIOScheduler # type: ignore[import-untyped]
 from apscheduler.triggers.cron import CronTrigger # type: ignore[import-untyped]
 from apscheduler.triggers.date import DateTrigger # type: ignore[import-untyped]
 from apscheduler.triggers.interval import IntervalTrigger # type: ignore[import-untyped]
 
 from dogscogs.constants import TIMEZONE
 
+from jobscheduler import SchedulerService, get_scheduler
+
 from .config import GuildConfig, Schedule
 from .views import ScheduledSayListPaginatedEmbed
 
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
 
+JOB_NAMESPACE = "ScheduledSay"
+
 DEFAULT_GUILD : GuildConfig = {
     "schedules": [],
 }
@@ -28,7 +31,7 @@ class ScheduledSay(commands.Cog):
     """
     Schedules the bot to say something somewhere.
     """
-    SCHEDULER : AsyncIOScheduler = None
+    SCHEDULER : SchedulerService = None
 
     def __init__(self, bot: Red) -> None:
         self.bot = bot
@@ -40,11 +43,7 @@ class ScheduledSay(commands.Cog):
 
         self.config.register_guild(**DEFAULT_GUILD)
 
-        if not hasattr(self.bot, 'ssay_scheduler'):
-            setattr(self.bot, 'ssay_scheduler', AsyncIOScheduler(timezone="US/Eastern"))
-            getattr(self.bot, 'ssay_scheduler').start()
-
-        ScheduledSay.SCHEDULER = getattr(self.bot, 'ssay_scheduler')
+        ScheduledSay.SCHEDULER = get_scheduler(self.bot)
 
     @staticmethod
     async def schedule_message(config: Config, guild: discord.Guild, schedule_id: str) -> None:
@@ -54,8 +53,7 @@ class ScheduledSay(commands.Cog):
         if schedule is None:
             raise ValueError("No schedule found for the given id.")
 
-        if ScheduledSay.SCHEDULER.get_job(schedule['id']) is not None:
-            ScheduledSay.SCHEDULER.remove_job(schedule['id'])
+        ScheduledSay.SCHEDULER.remove_job(JOB_NAMESPACE, schedule['id'])
 
         if schedule['is_active']:        
             if schedule['type'] == "at":
@@ -84,11 +82,11 @@ class ScheduledSay(commands.Cog):
                 trigger = CronTrigger.from_crontab(' '.join(split), timezone=TIMEZONE)
 
             ScheduledSay.SCHEDULER.add_job(
+                JOB_NAMESPACE,
+                schedule['id'],
                 ScheduledSay.run_scheduled_message, 
                 trigger,
-                id=schedule['id'],
                 args=[config, guild, schedule['id']],
-                replace_existing=True
             )
 
     @staticmethod
@@ -126,7 +124,7 @@ class ScheduledSay(commands.Cog):
     async def cog_load(self) -> None:
         guild_configs : typing.Dict[int, GuildConfig] = await self.config.all_guilds()
 
-        ScheduledSay.SCHEDULER.remove_all_jobs()
+        ScheduledSay.SCHEDULER.remove_namespace_jobs(JOB_NAMESPACE)
 
         for id, guild_config in guild_configs.items():
             guild = await self.bot.fetch_guild(id)
@@ -139,6 +137,9 @@ class ScheduledSay(commands.Cog):
                 pass
         pass
 
+    async def cog_unload(self) -> None:
+        ScheduledSay.SCHEDULER.remove_namespace_jobs(JOB_NAMESPACE)
+
     @commands.group()
     @commands.guild_only()
     @commands.has_guild_permissions(manage_messages=True)
@@ -150,14 +151,14 @@ class ScheduledSay(commands.Cog):
     @commands.has_guild_permissions(manage_messages=True)
     async def jobs(self, ctx: commands.Context):
         """List scheduled jobs."""
-        jobs : typing.List[Job] = ScheduledSay.SCHEDULER.get_jobs()
+        jobs : typing.List[Job] = ScheduledSay.SCHEDULER.get_jobs(JOB_NAMESPACE)
 
         description = ""
 
         for job in jobs:
             next_run_time : datetime.datetime = job.next_run_time
 
-            description += f"\tID: {job.id}"
+            description += f"\tID: {job.id.split(':', 1)[1]}"
 
             if next_run_time is not None:
                 description += f" @ <t:{int(next_run_time.timestamp())}>"
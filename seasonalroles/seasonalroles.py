@@ -17,8 +17,19 @@ DEFAULT_GUILD = {
 
 DEFAULT_CHANNEL = {
     "roles": [],
+    # Members already given this season's roles; cleared whenever the channel's roles are set.
+    "granted_member_ids": [],
 } # type: ignore[var-annotated]
 
+class SeasonalChannel():
+    """An in-memory copy of a channel's seasonal roles and who has been given them."""
+    role_ids: typing.Set[int]
+    granted_member_ids: typing.Set[int]
+
+    def __init__(self, channel_config: dict):
+        self.role_ids = set(channel_config["roles"])
+        self.granted_member_ids = set(channel_config["granted_member_ids"])
+
 class SeasonalRoles(commands.Cog):
     """
     Automatically applies roles to users who post in a channel.
@@ -35,6 +46,30 @@ class SeasonalRoles(commands.Cog):
         self.config.register_guild(**DEFAULT_GUILD)
         self.config.register_channel(**DEFAULT_CHANNEL)
 
+        self.channels : typing.Dict[int, SeasonalChannel] = {}
+        self.guild_settings : typing.Dict[int, dict] = {}
+
+    async def cog_load(self) -> None:
+        for channel_id, channel_config in (await self.config.all_channels()).items():
+            if len(channel_config["roles"]) > 0:
+                self.channels[channel_id] = SeasonalChannel(channel_config)
+
+    async def get_guild_settings(self, guild: discord.Guild) -> dict:
+        """Returns the guild's settings, reading Config only on first use."""
+        if guild.id not in self.guild_settings:
+            self.guild_settings[guild.id] = await self.config.guild(guild).all()
+        return self.guild_settings[guild.id]
+
+    async def _start_season(self, channel: typing.Union[discord.TextChannel, discord.Thread], role_ids: typing.List[int]) -> None:
+        """Sets the channel's roles and forgets who was given the previous ones."""
+        await self.config.channel(channel).roles.set(role_ids)
+        await self.config.channel(channel).granted_member_ids.set([])
+
+        if len(role_ids) > 0:
+            self.channels[channel.id] = SeasonalChannel({"roles": role_ids, "granted_member_ids": []})
+        else:
+            self.channels.pop(channel.id, None)
+
     @commands.is_owner()
     async def red_delete_data_for_user(self, *, requester: RequestType, user_id: int) -> None:
         # TODO: Replace this with the proper end user data removal handling.
@@ -53,6 +88,7 @@ class SeasonalRoles(commands.Cog):
     async def enable(self, ctx: commands.GuildContext) -> None:
         """Enable seasonal roles."""
         await self.config.guild(ctx.guild).enabled.set(True)
+        self.guild_settings.pop(ctx.guild.id, None)
         await ctx.send("Seasonal roles enabled.")
 
     @seasonalroles.command()
@@ -61,6 +97,7 @@ class SeasonalRoles(commands.Cog):
     async def disable(self, ctx: commands.GuildContext) -> None:
         """Disable seasonal roles."""
         await self.config.guild(ctx.guild).enabled.set(False)
+        self.guild_settings.pop(ctx.guild.id, None)
         await ctx.send("Seasonal roles disabled.")
 
     @seasonalroles.command()
@@ -72,6 +109,7 @@ class SeasonalRoles(commands.Cog):
             is_enabled = await self.config.guild(ctx.guild).enabled()
         else:
             await self.config.guild(ctx.guild).enabled.set(is_enabled)
+            self.guild_settings.pop(ctx.guild.id, None)
 
         await ctx.send(f"Seasonal roles are {'enabled' if is_enabled else 'disabled'}.")
 
@@ -85,7 +123,7 @@ class SeasonalRoles(commands.Cog):
             roles = [channel.guild.get_role(role_id) for role_id in role_ids] # type: ignore[assignment]
             roles = [role for role in roles if role] # type: ignore[assignment]
         else:
-            await self.config.channel(channel).roles.set([role.id for role in roles])
+            await self._start_season(channel, [role.id for role in roles])
 
         if not roles:
             await ctx.send(f"No roles set for {channel.mention}.")
@@ -98,7 +136,7 @@ class SeasonalRoles(commands.Cog):
     @commands.has_guild_permissions(manage_roles=True)
     async def clear(self, ctx: commands.GuildContext, channel: discord.TextChannel) -> None:
         """Clear the seasonal roles for a channel."""
-        await self.config.channel(channel).roles.set([])
+        await self._start_season(channel, [])
         await ctx.send(f"Roles cleared for {channel.mention}.")
 
     @seasonalroles.command()
@@ -138,6 +176,7 @@ class SeasonalRoles(commands.Cog):
             will_delete = await self.config.guild(ctx.guild).will_delete()
         else:
             await self.config.guild(ctx.guild).will_delete.set(will_delete)
+            self.guild_settings.pop(ctx.guild.id, None)
 
         await ctx.send(f"Messages will {'be' if will_delete else 'not be'} deleted after applying roles.")
 
@@ -146,23 +185,37 @@ class SeasonalRoles(commands.Cog):
         if message.author.bot:
             return
 
-        guild = message.guild
-        if not guild:
+        seasonal = self.channels.get(message.channel.id)
+        if seasonal is None:
             return
 
-        if not await self.config.guild(guild).enabled():
+        guild = message.guild
+        if not guild:
             return
 
-        channel = message.channel
-        data = await self.config.channel(channel).roles()
-        roles = [r for r in [guild.get_role(role_id) for role_id in data] if r is not None]
-        if len(roles) == 0:
+        settings = await self.get_guild_settings(guild)
+        if not settings["enabled"]:
             return
 
         member : discord.Member = message.author # type: ignore[assignment]
-        await member.add_roles(*roles, reason="Seasonal roles")
 
-        if await self.config.guild(guild).will_delete():
+        if member.id not in seasonal.granted_member_ids:
+            # Marked first so a burst of messages only sends one request.
+            seasonal.granted_member_ids.add(member.id)
+
+            roles = [guild.get_role(role_id) for role_id in seasonal.role_ids if member.get_role(role_id) is None]
+            roles = [role for role in roles if role is not None]
+
+            try:
+                if len(roles) > 0:
+                    await member.add_roles(*roles, reason="Seasonal roles")
+            except discord.HTTPException:
+                seasonal.granted_member_ids.discard(member.id)
+                raise
+
+            await self.config.channel(message.channel).granted_member_ids.set(list(seasonal.granted_member_ids))
+
+        if settings["will_delete"]:
             await message.delete(delay=5)
 
     @commands.Cog.listener()
@@ -177,6 +230,11 @@ class SeasonalRoles(commands.Cog):
                 data["roles"].remove(role.id)
                 await self.config.channel(guild.get_channel_or_thread(channel_id)).roles.set(data["roles"])
 
+                if channel_id in self.channels:
+                    self.channels[channel_id].role_ids.discard(role.id)
+                    if len(self.channels[channel_id].role_ids) == 0:
+                        del self.channels[channel_id]
+
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
         guild = channel.guild
@@ -187,6 +245,7 @@ class SeasonalRoles(commands.Cog):
             return
 
         await self.config.channel(channel).clear()
+        self.channels.pop(channel.id, None)
 
     @commands.Cog.listener()
     async def on_thread_delete(self, thread: discord.Thread) -> None:
@@ -195,6 +254,7 @@ class SeasonalRoles(commands.Cog):
             return
 
         await self.config.channel(thread).clear()
+        self.channels.pop(thread.id, None)
 
     @commands.Cog.listener()
     async def on_thread_remove(self, thread: discord.Thread) -> None:
@@ -203,3 +263,4 @@ class SeasonalRoles(commands.Cog):
             return
 
         await self.config.channel(thread).clear()
+        self.channels.pop(thread.id, None)
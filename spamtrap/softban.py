@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import time
+import typing
+
+import discord
+from redbot.core.bot import Red
+from redbot.core.config import Config
+
+# How long a trapped user stays banned before they're let back in.
+SOFTBAN_SECS = 10
+
+# Ban and unban requests sent at once.  discord.py waits out rate limits itself, so this only
+# keeps a raid from piling hundreds of requests onto the same bucket.
+BAN_CONCURRENCY = 5
+UNBAN_CONCURRENCY = 5
+
+# How long to wait before retrying an unban that failed for reasons other than permissions.
+UNBAN_RETRY_SECS = 30
+
+SoftBanKey = typing.Tuple[int, int]  # (guild_id, user_id)
+
+
+class SoftBanStats(typing.TypedDict):
+    bans_in_flight: int
+    unbans_pending: int
+    unbans_in_flight: int
+    banned: int
+    unbanned: int
+
+
+class SoftBanQueue:
+    """Bans issued by the spam trap and the unbans waiting on them.
+
+    Every pending unban is written to the guild's `pending_unbans` before the ban is sent, so a
+    restart mid-way never leaves a user banned.  Due unbans are sent by `drain`.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self.config = config
+
+        self.heap: typing.List[typing.Tuple[float, int, int]] = []
+        self.pending: typing.Dict[SoftBanKey, float] = {}
+        self.banning: typing.Set[SoftBanKey] = set()
+        self.unbanning: typing.Set[SoftBanKey] = set()
+
+        self.ban_semaphore = asyncio.Semaphore(BAN_CONCURRENCY)
+        self.unban_semaphore = asyncio.Semaphore(UNBAN_CONCURRENCY)
+
+        self.banned: typing.Dict[int, int] = {}
+        self.unbanned: typing.Dict[int, int] = {}
+
+    def load(self, guild_id: int, pending_unbans: typing.Dict[str, float]) -> None:
+        """Queues the guild's persisted unbans."""
+        for user_id, unban_at in pending_unbans.items():
+            self._push((guild_id, int(user_id)), unban_at)
+
+    def _push(self, key: SoftBanKey, unban_at: float) -> None:
+        self.pending[key] = unban_at
+        heapq.heappush(self.heap, (unban_at, *key))
+
+    async def _forget(self, key: SoftBanKey) -> None:
+        self.pending.pop(key, None)
+        await self.config.guild_from_id(key[0]).pending_unbans.clear_raw(str(key[1]))
+
+    def is_handling(self, guild_id: int, user_id: int) -> bool:
+        """Whether the user is already being banned or waiting to be unbanned."""
+        key = (guild_id, user_id)
+        return key in self.banning or key in self.pending or key in self.unbanning
+
+    async def ban(self, member: discord.Member, *, delete_message_seconds: int, reason: str) -> bool:
+        """Bans the member and queues their unban.
+
+        Raises:
+            discord.HTTPException: If the ban failed.  The unban is dropped.
+
+        Returns:
+            bool: False if the member was already being handled.
+        """
+        key = (member.guild.id, member.id)
+        if self.is_handling(*key):
+            return False
+
+        self.banning.add(key)
+        try:
+            unban_at = time.time() + SOFTBAN_SECS
+            await self.config.guild(member.guild).pending_unbans.set_raw(str(member.id), value=unban_at)
+
+            try:
+                async with self.ban_semaphore:
+                    await member.ban(reason=reason, delete_message_seconds=delete_message_seconds)
+            except discord.HTTPException:
+                await self._forget(key)
+                raise
+
+            # Counted from the ban itself, not from when it was queued behind others.
+            unban_at = time.time() + SOFTBAN_SECS
+            await self.config.guild(member.guild).pending_unbans.set_raw(str(member.id), value=unban_at)
+            self._push(key, unban_at)
+            self.banned[key[0]] = self.banned.get(key[0], 0) + 1
+        finally:
+            self.banning.discard(key)
+
+        return True
+
+    async def _unban(self, bot: Red, key: SoftBanKey) -> None:
+        guild_id, user_id = key
+        guild = bot.get_guild(guild_id)
+
+        if guild is None:
+            self._push(key, time.time() + UNBAN_RETRY_SECS)
+            return
+
+        try:
+            async with self.unban_semaphore:
+                await guild.unban(discord.Object(id=user_id), reason="Unbanned after posting in spam trap channel.")
+            self.unbanned[guild_id] = self.unbanned.get(guild_id, 0) + 1
+        except discord.NotFound:
+            pass  # Already unbanned by hand.
+        except discord.Forbidden:
+            print(f"Insufficient permissions to unban user {user_id} in guild {guild}.")
+        except discord.HTTPException as e:
+            print(f"Error unbanning user {user_id} in guild {guild}, retrying: {e}")
+            self._push(key, time.time() + UNBAN_RETRY_SECS)
+            return
+
+        await self._forget(key)
+
+    async def drain(self, bot: Red) -> int:
+        """Sends every unban that's due.
+
+        Returns:
+            int: The number of unbans attempted.
+        """
+        now = time.time()
+        due: typing.List[SoftBanKey] = []
+
+        while len(self.heap) > 0 and self.heap[0][0] <= now:
+            unban_at, guild_id, user_id = heapq.heappop(self.heap)
+            key = (guild_id, user_id)
+            # Skip entries superseded by a later push for the same user.
+            if self.pending.get(key) != unban_at:
+                continue
+            del self.pending[key]
+            due.append(key)
+
+        if len(due) == 0:
+            return 0
+
+        self.unbanning.update(due)
+        try:
+            await asyncio.gather(*[self._unban(bot, key) for key in due])
+        finally:
+            self.unbanning.difference_update(due)
+
+        return len(due)
+
+    def stats(self, guild_id: int) -> SoftBanStats:
+        return {
+            "bans_in_flight": len([key for key in self.banning if key[0] == guild_id]),
+            "unbans_pending": len([key for key in self.pending if key[0] == guild_id]),
+            "unbans_in_flight": len([key for key in self.unbanning if key[0] == guild_id]),
+            "banned": self.banned.get(guild_id, 0),
+            "unbanned": self.unbanned.get(guild_id, 0),
+        }
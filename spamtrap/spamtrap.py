@@ -1,14 +1,18 @@
-import asyncio
 from datetime import timedelta
 from typing import Literal
 import typing
 
 import discord
+from discord.ext import tasks
 from redbot.core import commands
 from redbot.core.bot import Red
 from redbot.core.config import Config
 from dogscogs.constants import COG_IDENTIFIER
 
+from .softban import SoftBanQueue
+
+UNBAN_POLL_SECS = 2
+
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
 
 DEFAULT_GUILD = {
@@ -21,8 +25,32 @@ DEFAULT_GUILD = {
         "roles": [],
         "members": [],
     },
+    "pending_unbans": {},  # str(user_id) -> unban timestamp
 }
 
+class TrapSettings():
+    """An in-memory copy of a guild's spam trap settings, keyed by its trap channel."""
+    guild_id: int
+    channel_id: int
+    ban_message: str
+    delete_message_seconds: int
+    whitelist_role_ids: typing.Set[int]
+    whitelist_member_ids: typing.Set[int]
+
+    def __init__(self, guild_id: int, guild_config: dict):
+        self.guild_id = guild_id
+        self.channel_id = guild_config["channel_id"]
+        self.ban_message = guild_config["ban_message"]
+        self.delete_message_seconds = guild_config["delete_message_seconds"]
+        self.whitelist_role_ids = set(guild_config["whitelist"]["roles"])
+        self.whitelist_member_ids = set(guild_config["whitelist"]["members"])
+
+    def is_whitelisted(self, member: discord.Member) -> bool:
+        if member.id in self.whitelist_member_ids:
+            return True
+        return any(role.id in self.whitelist_role_ids for role in member.roles)
+
+
 class SpamTrap(commands.Cog):
     """
     Autobans and removes messages from a designated channel to catch spamming bots or compromised accounts.
@@ -38,6 +66,42 @@ class SpamTrap(commands.Cog):
 
         self.config.register_guild(**DEFAULT_GUILD)
 
+        # Trap channel ID -> settings, for enabled guilds with a trap channel set.
+        self.traps : typing.Dict[int, TrapSettings] = {}
+        self.softbans = SoftBanQueue(self.config)
+
+    async def cog_load(self) -> None:
+        for guild_id, guild_config in (await self.config.all_guilds()).items():
+            self._set_trap(guild_id, guild_config)
+            self.softbans.load(guild_id, guild_config["pending_unbans"])
+
+        self.unban_worker.start()
+
+    async def cog_unload(self) -> None:
+        # Anything still queued is persisted and picked up on the next load.
+        self.unban_worker.cancel()
+
+    @tasks.loop(seconds=UNBAN_POLL_SECS)
+    async def unban_worker(self) -> None:
+        try:
+            await self.softbans.drain(self.bot)
+        except Exception as e:
+            print(f"Error draining spam trap unbans: {e}")
+
+    @unban_worker.before_loop
+    async def before_unban_worker(self) -> None:
+        await self.bot.wait_until_red_ready()
+
+    def _set_trap(self, guild_id: int, guild_config: dict) -> None:
+        for channel_id in [channel_id for channel_id, trap in self.traps.items() if trap.guild_id == guild_id]:
+            del self.traps[channel_id]
+
+        if guild_config["is_enabled"] and guild_config["channel_id"] is not None:
+            self.traps[guild_config["channel_id"]] = TrapSettings(guild_id, guild_config)
+
+    async def refresh_trap(self, guild: discord.Guild) -> None:
+        """Reloads the guild's cached trap settings.  Call after any of its settings change."""
+        self._set_trap(guild.id, await self.config.guild(guild).all())
 
     @commands.guild_only()
     @commands.has_permissions(manage_roles=True)
@@ -56,6 +120,7 @@ class SpamTrap(commands.Cog):
             return
 
         await self.config.guild(ctx.guild).is_enabled.set(b)
+        await self.refresh_trap(ctx.guild)
         await ctx.send(f"The spam trap has been {'enabled' if b else 'disabled'}.")
 
     @commands.guild_only()
@@ -63,6 +128,7 @@ class SpamTrap(commands.Cog):
     async def enable(self, ctx: commands.GuildContext) -> None:
         """Enable the spam trap for the server."""
         await self.config.guild(ctx.guild).is_enabled.set(True)
+        await self.refresh_trap(ctx.guild)
         await ctx.send("The spam trap has been enabled.")
 
     @commands.guild_only()
@@ -70,6 +136,7 @@ class SpamTrap(commands.Cog):
     async def disable(self, ctx: commands.GuildContext) -> None:
         """Disable the spam trap for the server."""
         await self.config.guild(ctx.guild).is_enabled.set(False)
+        await self.refresh_trap(ctx.guild)
         await ctx.send("The spam trap has been disabled.")
 
 
@@ -91,9 +158,11 @@ class SpamTrap(commands.Cog):
             if channel is None:
                 await ctx.send("The previously set spam trap channel could not be found. Please set a new one.")
                 await self.config.guild(ctx.guild).channel_id.set(None)
+                await self.refresh_trap(ctx.guild)
                 return
             
         await self.config.guild(ctx.guild).channel_id.set(channel.id)
+        await self.refresh_trap(ctx.guild)
         await ctx.send(f"The spam trap channel has been set to {channel.mention}.")
 
 
@@ -110,6 +179,7 @@ class SpamTrap(commands.Cog):
             return
 
         await self.config.guild(ctx.guild).ban_message.set(message)
+        await self.refresh_trap(ctx.guild)
         await ctx.send(f"The spam trap ban message has been updated to:\n> {message}")
 
 
@@ -162,6 +232,7 @@ class SpamTrap(commands.Cog):
             return
 
         await self.config.guild(ctx.guild).delete_message_seconds.set(seconds)
+        await self.refresh_trap(ctx.guild)
         if seconds == 0:
             await ctx.send("Message deletion has been disabled. No messages will be deleted when banning a user.")
         else:
@@ -206,6 +277,7 @@ class SpamTrap(commands.Cog):
         guild_config["roles"] = list(set(guild_config["roles"]))
 
         await self.config.guild(ctx.guild).whitelist.set(guild_config)
+        await self.refresh_trap(ctx.guild)
 
         if len(added) > 0:
             await ctx.send("Whitelisted the following:\n" + "\n".join([f"- {mention}" for mention in mentions]), allowed_mentions=discord.AllowedMentions.none())
@@ -251,6 +323,7 @@ class SpamTrap(commands.Cog):
             mentions.append(item.mention)
 
         await self.config.guild(ctx.guild).whitelist.set(guild_config)
+        await self.refresh_trap(ctx.guild)
 
         if len(removed) > 0:
             await ctx.send("Removed from whitelist the following:\n" + "\n".join([f"- {mention}" for mention in mentions]), allowed_mentions=discord.AllowedMentions.none())
@@ -298,30 +371,32 @@ class SpamTrap(commands.Cog):
 
 
 
+    @commands.guild_only()
+    @spamtrap.command(aliases=["raid"])
+    async def queue(self, ctx: commands.GuildContext) -> None:
+        """Show how many spam trap bans and unbans are in progress."""
+        stats = self.softbans.stats(ctx.guild.id)
+        await ctx.send(
+            f"Bans in flight: `{stats['bans_in_flight']}`\n"
+            f"Unbans waiting: `{stats['unbans_pending']}` (`{stats['unbans_in_flight']}` in flight)\n"
+            f"Since load: `{stats['banned']}` banned, `{stats['unbanned']}` unbanned."
+        )
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message) -> None:
         """Listener for messages sent in the spam trap channel."""
-        if message.author.bot:
-            return
-
-        guild_config = await self.config.guild(message.guild).all()
-        if not guild_config["is_enabled"]:
+        trap = self.traps.get(message.channel.id)
+        if trap is None:
             return
 
-        channel_id = guild_config["channel_id"]
-        if channel_id is None or message.channel.id != channel_id:
+        if message.author.bot or not isinstance(message.author, discord.Member):
             return
 
-        # Check whitelist
-        if message.author.id in guild_config["whitelist"]["members"]:
+        if trap.is_whitelisted(message.author):
             return
 
-        for role in message.author.roles:
-            if role.id in guild_config["whitelist"]["roles"]:
-                return
-
         # timeout_duration = guild_config["timeout_secs"]
-        ban_message = guild_config["ban_message"]
+        ban_message = trap.ban_message
 
         try:
             # if timeout_duration > 0:
@@ -365,17 +440,19 @@ class SpamTrap(commands.Cog):
             #             print(f"Deleted {delete_count} messages from user {message.author}.")
             # else:
 
+            if self.softbans.is_handling(message.guild.id, message.author.id):
+                return
+
             try:
                 await message.author.send(ban_message)
             except discord.Forbidden:
                 pass  # Can't send DM to user
 
-            await message.author.ban(reason="Posted in spam trap channel.", delete_message_seconds=guild_config["delete_message_seconds"])
-
-            # wait 10 seconds
-            await asyncio.sleep(10)
-
-            await message.author.unban(reason="Unbanned after posting in spam trap channel.")
+            await self.softbans.ban(
+                message.author,
+                delete_message_seconds=trap.delete_message_seconds,
+                reason="Posted in spam trap channel.",
+            )
         except discord.Forbidden:
             # Log the lack of permissions or notify admins as needed
             print(f"Insufficient permissions to ban or timeout user {message.author} in guild {message.guild}.")
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Literal
 import typing
 
@@ -5,7 +6,6 @@ import discord
 from redbot.core import commands
 from redbot.core.bot import Red
 from redbot.core.config import Config
-from types import SimpleNamespace
 
 from dogscogs.constants import COG_IDENTIFIER
 
@@ -19,6 +19,9 @@ DEFAULT_MEMBER = {
     "previous_roles": []
 } # type: ignore[var-annotated]
 
+# Members whose roles are restored at once; further joins wait in the queue.
+RESTORE_CONCURRENCY = 3
+
 class StickyRoles(commands.Cog):
     """
     Returns user roles on rejoining.
@@ -36,6 +39,55 @@ class StickyRoles(commands.Cog):
 
         self.config.register_member(**DEFAULT_MEMBER)
 
+        self.join_queue : "asyncio.Queue[discord.Member]" = asyncio.Queue()
+        self.restore_workers : typing.List[asyncio.Task] = []
+        # (guild_id, member_id) of members whose roles haven't been restored yet.
+        self.pending_restores : typing.Set[typing.Tuple[int, int]] = set()
+
+    async def cog_load(self) -> None:
+        self.restore_workers = [
+            asyncio.create_task(self._restore_worker()) for _ in range(RESTORE_CONCURRENCY)
+        ]
+
+    async def cog_unload(self) -> None:
+        for worker in self.restore_workers:
+            worker.cancel()
+
+    async def _restore_worker(self) -> None:
+        while True:
+            member = await self.join_queue.get()
+            try:
+                await self.restore_roles(member)
+            except Exception as e:
+                print(f"Error restoring roles for {member.name} ({member.id}): {e}")
+            finally:
+                self.pending_restores.discard((member.guild.id, member.id))
+                self.join_queue.task_done()
+
+    async def restore_roles(self, member: discord.Member) -> None:
+        """Reapplies the member's previous roles in a single request.
+
+        Roles are resolved from the guild's cache; any the bot can't assign are skipped.
+        """
+        guild: discord.Guild = member.guild
+
+        # They may have left again while queued.
+        current = guild.get_member(member.id)
+        if current is None:
+            return
+        member = current
+
+        previous_roles = await self.config.member(member).previous_roles()
+
+        roles = [guild.get_role(role_id) for role_id in previous_roles]
+        roles = [role for role in roles if role is not None and role.is_assignable() and role not in member.roles]
+
+        if len(roles) > 0:
+            try:
+                await member.add_roles(*roles, reason="Reapplying user roles on rejoin.")
+            except discord.Forbidden:
+                print(f"Failed to apply roles {', '.join(role.name for role in roles)} to {member.name} ({member.id})")
+
     
     @commands.hybrid_group()
     @commands.has_guild_permissions(manage_roles=True)
@@ -77,20 +129,9 @@ class StickyRoles(commands.Cog):
 
         if not (await self.config.guild(guild).is_enabled()):
             return
-        
-        bot_top_role = guild.get_member(self.bot.user.id).top_role # type: ignore[union-attr]
-
-        previous_roles = await self.config.member(member).previous_roles()
-        
-        roles = await member.guild.fetch_roles()
-        roles = [role for role in roles if role.id in previous_roles and not role.is_default() and role.position < bot_top_role.position]
 
-        if len(roles) > 0:
-            for role in roles:
-                try:
-                    await member.add_roles(role, reason="Reapplying user roles on rejoin.")
-                except discord.Forbidden:
-                    print(f"Failed to apply role '{role.name}' to {member.name} ({member.id})")
+        self.pending_restores.add((guild.id, member.id))
+        self.join_queue.put_nowait(member)
         pass
 
     @commands.Cog.listener()
@@ -98,6 +139,10 @@ class StickyRoles(commands.Cog):
         """
         Remember roles the user had.
         """
+        # Left again before their roles came back; keep what was saved.
+        if (member.guild.id, member.id) in self.pending_restores:
+            return
+
         roles = [role.id for role in member.roles]
 
         await self.config.member(member).previous_roles.set(roles)
@@ -0,0 +1,130 @@
+import asyncio
+import collections
+import time
+import typing
+
+import aiohttp
+
+API_URL = "https://api.urbandictionary.com/v0"
+
+CACHE_TTL_SECS = 60 * 60
+CACHE_MAX_ENTRIES = 256
+FETCH_TIMEOUT_SECS = 10
+
+
+class Definition(typing.NamedTuple):
+    word: str
+    definition: str
+    example: str
+    upvotes: int
+    downvotes: int
+
+
+class UrbanDictionaryClient:
+    """Looks up terms on Urban Dictionary without blocking the event loop.
+
+    Results are kept in a TTL + LRU cache, and concurrent lookups of the same term share one
+    request.  Pass `base_url` to point the client at a local server, e.g. in tests.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        base_url: str = API_URL,
+        ttl: float = CACHE_TTL_SECS,
+        max_entries: int = CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.cache: "collections.OrderedDict[str, typing.Tuple[float, typing.List[Definition]]]" = collections.OrderedDict()
+        self.in_flight: typing.Dict[str, "asyncio.Future[typing.List[Definition]]"] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def _get_cached(self, key: str) -> typing.Optional[typing.List[Definition]]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+
+        fetched_at, definitions = entry
+        if time.monotonic() - fetched_at > self.ttl:
+            del self.cache[key]
+            return None
+
+        self.cache.move_to_end(key)
+        return definitions
+
+    def _set_cached(self, key: str, definitions: typing.List[Definition]) -> None:
+        self.cache[key] = (time.monotonic(), definitions)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    async def _fetch(self, term: str) -> typing.List[Definition]:
+        try:
+            async with self.session.get(
+                f"{self.base_url}/define",
+                params={"term": term},
+                timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECS),
+            ) as response:
+                if response.status != 200:
+                    raise ValueError("Urban Dictionary could not be reached.")
+                data = await response.json(content_type=None)
+        except asyncio.TimeoutError:
+            raise ValueError("Timed out looking up definition.")
+        except aiohttp.ClientError:
+            raise ValueError("Urban Dictionary could not be reached.")
+
+        return [
+            Definition(
+                word=entry.get("word", term),
+                definition=entry.get("definition", ""),
+                example=entry.get("example", ""),
+                upvotes=int(entry.get("thumbs_up", 0)),
+                downvotes=int(entry.get("thumbs_down", 0)),
+            )
+            for entry in data.get("list", [])
+        ]
+
+    async def define(self, term: str) -> typing.List[Definition]:
+        """Returns every definition for the term, best first.
+
+        Raises:
+            ValueError: If Urban Dictionary couldn't be reached.
+        """
+        key = term.strip().lower()
+
+        definitions = self._get_cached(key)
+        if definitions is not None:
+            self.hits += 1
+            return definitions
+
+        if key in self.in_flight:
+            self.hits += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        self.misses += 1
+        future: "asyncio.Future[typing.List[Definition]]" = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+
+        try:
+            definitions = await self._fetch(term)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here so an unawaited failure isn't logged as never retrieved.
+            future.exception()
+            raise
+        else:
+            self._set_cached(key, definitions)
+            future.set_result(definitions)
+            return definitions
+        finally:
+            del self.in_flight[key]
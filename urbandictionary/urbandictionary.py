@@ -1,8 +1,9 @@
+import collections
 from typing import Literal
 import typing
 
+import aiohttp
 import discord
-import udpy  # type: ignore[import-not-found]
 
 from redbot.core import commands
 from redbot.core.bot import Red
@@ -10,33 +11,32 @@ from redbot.core.config import Config
 
 from dogscogs.constants import COG_IDENTIFIER
 
+from .client import Definition, UrbanDictionaryClient
+
 RequestType = Literal["discord_deleted_user", "owner", "user", "user_strict"]
 
 PREV_DEFINITION_EMOJI = '⬅️'
 NEXT_DEFINITION_EMOJI = '➡️'
 URBAN_DICTIONARY_THUMBNAIL = "http://puppy-bot.com/puppy-bot-discord/media/random/urbandictionary.png"
 
+# Lookups that can still be paged; the oldest stop responding to reactions first.
+MAX_LOOKUP_SESSIONS = 100
 
-class UrbanDictionary(commands.Cog):
-    """
-    Looks up definitions on urban dictionary.
-    """
 
-    def __init__(self, bot: Red) -> None:
-        self.bot = bot
-        self.config = Config.get_conf(
-            self,
-            identifier=COG_IDENTIFIER,
-            force_registration=True,
-        )
+class LookupSession():
+    """The definitions shown on one lookup message and which one is showing."""
+    definitions: typing.List[Definition]
+    index: int
 
-        self.client = udpy.UrbanClient()
-        self.currentLookup: typing.List[udpy.UrbanDefinition] = []
-        self.currentIndex: int = 0
-        self.currentMessage: discord.Message = None # type: ignore[assignment]
+    def __init__(self, definitions: typing.List[Definition]):
+        self.definitions = definitions
+        self.index = 0
 
-    def get_embed(self):
-        definition = self.currentLookup[self.currentIndex]
+    def step(self, amount: int) -> None:
+        self.index = (self.index + amount) % len(self.definitions)
+
+    def get_embed(self) -> discord.Embed:
+        definition = self.definitions[self.index]
         embed = discord.Embed(
             title=definition.word,
             description=definition.definition,
@@ -46,23 +46,29 @@ class UrbanDictionary(commands.Cog):
             embed.add_field(name="Example:",
                             value=definition.example, inline=True)
         embed.set_footer(
-            text=f"{self.currentIndex + 1}/{len(self.currentLookup)}       👍 {definition.upvotes} | 👎 {definition.downvotes}")
+            text=f"{self.index + 1}/{len(self.definitions)}       👍 {definition.upvotes} | 👎 {definition.downvotes}")
         return embed
-        pass
 
-    async def get_prev_definition(self):
-        self.currentIndex -= 1
-        if self.currentIndex < 0:
-            self.currentIndex = len(self.currentLookup) - 1
-        await self.currentMessage.edit(embed=self.get_embed())
-        pass
 
-    async def get_next_definition(self):
-        self.currentIndex += 1
-        if self.currentIndex >= len(self.currentLookup):
-            self.currentIndex = 0
-        await self.currentMessage.edit(embed=self.get_embed())
-        pass
+class UrbanDictionary(commands.Cog):
+    """
+    Looks up definitions on urban dictionary.
+    """
+
+    def __init__(self, bot: Red) -> None:
+        self.bot = bot
+        self.config = Config.get_conf(
+            self,
+            identifier=COG_IDENTIFIER,
+            force_registration=True,
+        )
+
+        self.session = aiohttp.ClientSession()
+        self.client = UrbanDictionaryClient(self.session)
+        self.sessions: "collections.OrderedDict[int, LookupSession]" = collections.OrderedDict()
+
+    async def cog_unload(self) -> None:
+        await self.session.close()
 
     @commands.command(usage="<term>", aliases=["ud", "urbandict"])
     async def urbandictionary(self, ctx: commands.Context, term):
@@ -71,35 +77,45 @@ class UrbanDictionary(commands.Cog):
         Args:
             term (str): The term to search against.
         """
-        definitions: typing.List[udpy.UrbanDefinition] = self.client.get_definition(term)
+        try:
+            definitions = await self.client.define(term)
+        except ValueError as e:
+            await ctx.channel.send(f"ERROR: {e}")
+            return
 
         if len(definitions) == 0:
             await ctx.channel.send(f"Unable to find definition for: `{term}`.")
             return
 
-        self.currentLookup = definitions
-        self.currentIndex = 0
-        self.currentMessage = await ctx.channel.send(embed=self.get_embed())
-        await self.currentMessage.add_reaction(PREV_DEFINITION_EMOJI)
-        await self.currentMessage.add_reaction(NEXT_DEFINITION_EMOJI)
+        session = LookupSession(definitions)
+        message = await ctx.channel.send(embed=session.get_embed())
+
+        self.sessions[message.id] = session
+        while len(self.sessions) > MAX_LOOKUP_SESSIONS:
+            self.sessions.popitem(last=False)
+
+        await message.add_reaction(PREV_DEFINITION_EMOJI)
+        await message.add_reaction(NEXT_DEFINITION_EMOJI)
         pass
 
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction: discord.Reaction, user: discord.User):
         if user.bot == True:
             return
-        if self.currentMessage == None:
-            return
-        if reaction.message.id != self.currentMessage.id:
+
+        session = self.sessions.get(reaction.message.id)
+        if session is None:
             return
 
         await reaction.remove(user)
 
         if reaction.emoji == PREV_DEFINITION_EMOJI:
-            await self.get_prev_definition()
-            pass
-        if reaction.emoji == NEXT_DEFINITION_EMOJI:
-            await self.get_next_definition()
-            pass
+            session.step(-1)
+        elif reaction.emoji == NEXT_DEFINITION_EMOJI:
+            session.step(1)
+        else:
+            return
 
+        self.sessions.move_to_end(reaction.message.id)
+        await reaction.message.edit(embed=session.get_embed())
         pass